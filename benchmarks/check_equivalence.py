@@ -0,0 +1,220 @@
+"""Check that the batch fast paths reproduce the per-PID reference functions.
+
+Each case generates a synthetic capture, runs every reference function and its
+batch counterpart, and compares scores, alerts, features and tree shape. The
+merged partial aggregates of the capture split into several chunks must give
+the same results as the batch paths. A two-process ppid cycle checks that the
+subtree hashing terminates and covers both processes. Batch
+results are also compared with the golden snapshots in benchmarks/golden/, so
+drift shows up even when both implementations change together.
+
+    python benchmarks/check_equivalence.py                  # compare (exit 1 on mismatch)
+    python benchmarks/check_equivalence.py --update-golden  # rewrite the snapshots
+
+Snapshots depend on the synthetic generator; regenerate them when it changes.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from src.data.synthetic_generator import generate_audit_log
+from src.data.log_loader import load_audit_log
+from src.data.data_processor import create_dataframe
+from src.analysis.security_analyzer import SecurityAnalyzer
+from src.analysis.behavior_analyzer import BehaviorAnalyzer
+from src.analysis.ml_behavior_analyzer import MLBehaviorAnalyzer
+from src.analysis.process_tree import build_process_tree, build_process_tree_batch
+from src.analysis.feature_hashing import SyscallFeatureHasher
+from src.analysis.partial_aggregates import aggregate_log_files
+from src.analysis.process_annotations import annotate_processes
+from src.visualization.fragment_cache import rule_set_version, subtree_hashes
+from config import Config
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+CASES = {
+    'deep': {'events': 4000, 'depth': 7, 'fanout': 2, 'seed': 1},
+    'wide': {'events': 6000, 'depth': 3, 'fanout': 12, 'seed': 2, 'pid_reuse': 0.002,
+             'attacks': ('reverse_shell', 'privilege_escalation', 'process_injection',
+                         'crypto_miner', 'file_tampering')}
+}
+
+# Chunk size for the partial aggregates check (several chunks per case)
+AGGREGATE_CHUNK_BYTES = 200000
+
+# Relative/absolute tolerance for scores and features (features are float32)
+TOLERANCE = 1e-6
+
+def close(a, b):
+    return math.isclose(a, b, rel_tol=TOLERANCE, abs_tol=TOLERANCE)
+
+def tree_shape(process_tree):
+    """[pid, process, ppid, child pids] per node, in key order."""
+    return [
+        [int(pid), None if info['process'] is None else str(info['process']), info['ppid'],
+         [child['pid'] for child in info['children']]]
+        for pid, info in process_tree.items()
+    ]
+
+def feature_snapshot(features, base_size):
+    """Dense base features plus the non-zero hashed columns."""
+    values = np.asarray(features, dtype=np.float64)
+    hashed = values[base_size:]
+    return {
+        'base': values[:base_size].tolist(),
+        'hashed': {str(index): float(hashed[index]) for index in np.flatnonzero(hashed)}
+    }
+
+def run_case(name, params, directory):
+    """Reference, batch and merged partial aggregate outputs for one generated capture."""
+    log_path = os.path.join(directory, f"{name}.ndjson")
+    generate_audit_log(log_path, **params)
+    df = create_dataframe(load_audit_log(log_path))
+
+    reference, batch = {}, {}
+    reference['tree'] = tree_shape(build_process_tree(df))
+    process_tree = build_process_tree_batch(df)
+    batch['tree'] = tree_shape(process_tree)
+
+    behavior_analyzer = BehaviorAnalyzer(verbose=False)
+    frequencies, timestamps = behavior_analyzer.calculate_syscall_frequency(df)
+    batch_scores = behavior_analyzer.calculate_behavior_scores(df)
+    reference['behavior'], batch['behavior'] = {}, {}
+    for pid in process_tree:
+        score, categories = behavior_analyzer.calculate_behavior_score(frequencies, timestamps, pid)
+        reference['behavior'][str(pid)] = [float(score), {k: float(v) for k, v in categories.items()}]
+        score, categories = batch_scores.get(pid, (0, {}))
+        batch['behavior'][str(pid)] = [float(score), {k: float(v) for k, v in categories.items()}]
+
+    security_analyzer = SecurityAnalyzer()
+    batch_alerts = security_analyzer.analyze_processes(process_tree, df)
+    reference['alerts'] = {str(pid): security_analyzer.analyze_process(pid, info, df)
+                           for pid, info in process_tree.items()}
+    batch['alerts'] = {str(pid): alerts for pid, alerts in batch_alerts.items()}
+
+    ml_analyzer = MLBehaviorAnalyzer(
+        behavior_analyzer.syscall_categories,
+        hashed_features=True,  # the hashed block is always checked, whatever the default
+        hash_size=Config.ML_HASH_SIZE
+    )
+    pids, matrix = ml_analyzer.extract_features_batch(df)
+    batch['features'] = {str(int(pid)): feature_snapshot(row, ml_analyzer.base_feature_size)
+                         for pid, row in zip(pids, matrix)}
+    reference['features'] = {}
+    for pid in df['pid'].unique():
+        features = ml_analyzer.extract_features(df, pid)
+        if features is not None:
+            reference['features'][str(int(pid))] = feature_snapshot(features, ml_analyzer.base_feature_size)
+
+    hasher = SyscallFeatureHasher(Config.ML_HASH_SIZE)
+    aggregates = aggregate_log_files([log_path], security_analyzer.suspicious_behaviors, hasher,
+                                     chunk_bytes=AGGREGATE_CHUNK_BYTES, workers=2)
+    merged = {}
+    merged_tree = aggregates.process_tree()
+    merged['tree'] = tree_shape(merged_tree)
+    merged_scores = aggregates.behavior_scores(behavior_analyzer)
+    merged['behavior'] = {}
+    for pid in merged_tree:
+        score, categories = merged_scores.get(pid, (0, {}))
+        merged['behavior'][str(pid)] = [float(score), {k: float(v) for k, v in categories.items()}]
+    merged['alerts'] = {str(pid): alerts for pid, alerts in aggregates.alerts(merged_tree, security_analyzer).items()}
+    pids, matrix = aggregates.features(ml_analyzer)
+    merged['features'] = {str(int(pid)): feature_snapshot(row, ml_analyzer.base_feature_size)
+                          for pid, row in zip(pids, matrix)}
+    return reference, batch, merged
+
+def write_ppid_cycle(path):
+    """Capture where PIDs 10 and 11 are each other's parent."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for sequence, (pid, ppid) in enumerate([(10, 11), (11, 10), (10, 11), (11, 10)], 1):
+            f.write(json.dumps({
+                '@timestamp': f"2024-11-29T10:0{sequence}:00.000Z",
+                'user': {'name': 'root', 'id': '0'},
+                'process': {'name': f"proc{pid}", 'pid': pid, 'executable': f"/bin/proc{pid}",
+                            'args': [f"/bin/proc{pid}"], 'parent': {'pid': ppid}},
+                'auditd': {'data': {'syscall': 'execve'}, 'message_type': 'syscall',
+                           'result': 'success', 'sequence': sequence},
+                'host': {'name': 'synthetic-host'}
+            }) + '\n')
+
+def check_ppid_cycle(directory):
+    """Problems hashing the subtrees of a ppid cycle (an empty list when both PIDs get a hash)."""
+    log_path = os.path.join(directory, 'cycle.ndjson')
+    write_ppid_cycle(log_path)
+    df = create_dataframe(load_audit_log(log_path))
+    process_tree = build_process_tree_batch(df)
+    security_analyzer, behavior_analyzer = SecurityAnalyzer(), BehaviorAnalyzer(verbose=False)
+    annotations = annotate_processes(process_tree, security_analyzer, behavior_analyzer, df)
+    hashes = subtree_hashes(process_tree, annotations, rule_set_version(security_analyzer, behavior_analyzer))
+    return [f"/{pid}: no subtree hash" for pid in process_tree if pid not in hashes]
+
+def diff(expected, actual, path=''):
+    """Paths where actual differs from expected (floats within TOLERANCE)."""
+    if isinstance(expected, float) or isinstance(actual, float):
+        if isinstance(expected, (int, float)) and isinstance(actual, (int, float)) and close(expected, actual):
+            return []
+        return [f"{path}: {expected!r} != {actual!r}"]
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        problems = [f"{path}/{key}: missing" for key in expected if key not in actual]
+        problems += [f"{path}/{key}: unexpected" for key in actual if key not in expected]
+        for key in expected:
+            if key in actual:
+                problems.extend(diff(expected[key], actual[key], f"{path}/{key}"))
+        return problems
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path}: length {len(expected)} != {len(actual)}"]
+        problems = []
+        for index, (a, b) in enumerate(zip(expected, actual)):
+            problems.extend(diff(a, b, f"{path}[{index}]"))
+        return problems
+    return [] if expected == actual else [f"{path}: {expected!r} != {actual!r}"]
+
+def report(label, problems, limit=5):
+    print(f"  {'ok  ' if not problems else 'FAIL'} {label}" + (f" ({len(problems)} differences)" if problems else ''))
+    for problem in problems[:limit]:
+        print(f"         {problem}")
+    return not problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batch fast paths with the per-PID reference functions.")
+    parser.add_argument('--update-golden', action='store_true', help="rewrite the golden snapshots")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    args = parser.parse_args()
+
+    passed = True
+    with tempfile.TemporaryDirectory(prefix='audit_equivalence_') as directory:
+        for name in args.cases:
+            print(f"\nCase '{name}': {CASES[name]}")
+            reference, batch, merged = run_case(name, CASES[name], directory)
+            for check in ('tree', 'behavior', 'alerts', 'features'):
+                passed &= report(f"{check}: batch vs reference", diff(reference[check], batch[check]))
+            for check in ('tree', 'behavior', 'alerts', 'features'):
+                passed &= report(f"{check}: merged aggregates vs batch", diff(batch[check], merged[check]))
+
+            golden_path = os.path.join(GOLDEN_DIR, f"{name}.json")
+            if args.update_golden or not os.path.exists(golden_path):
+                os.makedirs(GOLDEN_DIR, exist_ok=True)
+                with open(golden_path, 'w', encoding='utf-8') as f:
+                    json.dump(batch, f, ensure_ascii=False, indent=1, sort_keys=True)
+                print(f"  wrote {golden_path}")
+                continue
+            with open(golden_path, 'r', encoding='utf-8') as f:
+                golden = json.load(f)
+            for check in ('tree', 'behavior', 'alerts', 'features'):
+                passed &= report(f"{check}: batch vs golden", diff(golden.get(check), batch[check]))
+
+        print("\nCase 'ppid_cycle'")
+        passed &= report("subtree hashes terminate", check_ppid_cycle(directory))
+
+    print("\nAll outputs match" if passed else "\nOutputs differ")
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
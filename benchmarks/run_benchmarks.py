@@ -0,0 +1,218 @@
+"""Time and memory-profile every pipeline stage on synthetic captures of increasing size.
+
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 1000000 -o results.json
+    python benchmarks/run_benchmarks.py --sizes 100000 --compare results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.synthetic_generator import generate_audit_log
+from src.data.log_loader import load_audit_log
+from src.data.data_processor import create_dataframe
+from src.analysis.security_analyzer import SecurityAnalyzer
+from src.analysis.behavior_analyzer import BehaviorAnalyzer
+from src.analysis.ml_behavior_analyzer import MLBehaviorAnalyzer
+from src.analysis.process_tree import build_process_tree, build_process_tree_batch
+from src.analysis.process_annotations import annotate_processes
+from src.analysis.analysis_reporter import generate_comparison_report
+from src.visualization.mermaid_generator import (
+    generate_mermaid_diagram, generate_aggregated_mermaid_diagram, generate_gantt_diagram
+)
+from src.visualization.heatmap_generator import compute_syscall_heatmap
+from src.visualization.graph_export import export_tree_json
+from config import Config
+
+class StageFailed(Exception):
+    pass
+
+class Recorder:
+    """Runs stages, recording wall time and (optionally) peak traced memory."""
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    def run(self, name, func, *args, **kwargs):
+        missing = [arg for arg in args if isinstance(arg, StageFailed)]
+        if missing:
+            self.stages[name] = {'skipped': str(missing[0])}
+            print(f"  {name:<24} {self._describe(self.stages[name])}")
+            return StageFailed(f"{name} skipped")
+
+        if self.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            # Analyzer debug output would dominate both the timing and the terminal
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = func(*args, **kwargs)
+        except Exception as e:
+            result = StageFailed(f"{name} failed: {e}")
+            self.stages[name] = {'error': f"{type(e).__name__}: {e}"}
+        else:
+            self.stages[name] = {'seconds': round(time.perf_counter() - started, 4)}
+            if self.trace_memory:
+                self.stages[name]['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+        print(f"  {name:<24} {self._describe(self.stages[name])}")
+        return result
+
+    @staticmethod
+    def _describe(stage):
+        if 'seconds' not in stage:
+            return stage.get('error') or stage.get('skipped')
+        memory = f"  peak {stage['peak_mb']:.1f} MB" if 'peak_mb' in stage else ''
+        return f"{stage['seconds']:.3f}s{memory}"
+
+def train_ml(df, behavior_analyzer):
+    ml_analyzer = MLBehaviorAnalyzer(
+        behavior_analyzer.syscall_categories,
+        hashed_features=Config.ML_HASHED_FEATURES,
+        hash_size=Config.ML_HASH_SIZE
+    )
+    ml_analyzer.train(df)
+    return ml_analyzer
+
+def annotate(process_tree, security_analyzer, behavior_analyzer, df, tables):
+    frequencies, timestamps = tables
+    return annotate_processes(process_tree, security_analyzer, behavior_analyzer, df, frequencies, timestamps)
+
+def flowchart(process_tree, annotations):
+    if len(process_tree) > Config.FLOWCHART_AGGREGATE_THRESHOLD:
+        return generate_aggregated_mermaid_diagram(process_tree, None, None, None, top_k=Config.FLOWCHART_TOP_K,
+                                                   annotations=annotations)
+    return generate_mermaid_diagram(process_tree, None, None, None, annotations)
+
+def benchmark_size(events, directory, args):
+    """Generate one capture and run every stage on it."""
+    log_path = os.path.join(directory, f"synthetic_{events}.ndjson")
+    summary = generate_audit_log(log_path, events=events, depth=args.depth, fanout=args.fanout, seed=args.seed)
+    print(f"\n{events} events, {summary['processes']} processes "
+          f"({os.path.getsize(log_path) / 2 ** 20:.1f} MB)")
+
+    recorder = Recorder(not args.no_memory)
+    logs = recorder.run('load_audit_log', load_audit_log, log_path)
+    df = recorder.run('create_dataframe', create_dataframe, logs)
+    del logs
+    recorder.run('build_process_tree', build_process_tree, df)
+    process_tree = recorder.run('build_process_tree_batch', build_process_tree_batch, df)
+
+    security_analyzer, behavior_analyzer = SecurityAnalyzer(), BehaviorAnalyzer(verbose=False)
+    tables = recorder.run('syscall_frequency', behavior_analyzer.calculate_syscall_frequency, df)
+    recorder.run('annotate_per_pid', annotate, process_tree, security_analyzer, behavior_analyzer, df, tables)
+    annotations = recorder.run('annotate_processes', annotate_processes, process_tree, security_analyzer,
+                               behavior_analyzer, df)
+    ml_analyzer = recorder.run('ml_train', train_ml, df, behavior_analyzer)
+
+    recorder.run('flowchart', flowchart, process_tree, annotations)
+    recorder.run('gantt', generate_gantt_diagram, process_tree, None, None, df, annotations,
+                 max_tasks=Config.GANTT_MAX_TASKS, bucket_count=Config.GANTT_TIME_BUCKETS)
+    recorder.run('heatmap', compute_syscall_heatmap, df, behavior_analyzer.syscall_categories,
+                 time_bins=Config.HEATMAP_TIME_BINS, max_processes=Config.HEATMAP_MAX_PROCESSES)
+    recorder.run('export_tree_json', export_tree_json, process_tree, annotations,
+                 os.path.join(directory, 'process_tree.json'))
+    recorder.run('comparison_report', generate_comparison_report, df, behavior_analyzer, ml_analyzer,
+                 process_tree, workers=args.workers, verbose=False, output_dir=directory)
+
+    if not args.keep_logs:
+        os.remove(log_path)
+    return {
+        'events': events,
+        'rows': None if isinstance(df, StageFailed) else len(df),
+        'processes': summary['processes'],
+        'stages': recorder.stages
+    }
+
+def compare(results, baseline_path, threshold):
+    """Print per-stage time ratios against a previous results file; returns the regressions."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        previous_results = json.load(f)
+    baseline = {run['events']: run['stages'] for run in previous_results['runs']}
+
+    regressions = []
+    print(f"\nComparison against {baseline_path} (regression threshold {threshold:.0%}):")
+    if previous_results['meta'].get('memory_traced') != results['meta']['memory_traced']:
+        print("  warning: only one of the two runs traced memory, so timings are not comparable")
+    for run in results['runs']:
+        previous = baseline.get(run['events'])
+        if previous is None:
+            print(f"  {run['events']} events: no baseline run")
+            continue
+        for name, stage in run['stages'].items():
+            before = previous.get(name, {}).get('seconds')
+            if before is None or 'seconds' not in stage:
+                continue
+            ratio = stage['seconds'] / max(before, 1e-9)
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressions.append((run['events'], name, ratio))
+            print(f"  {run['events']:>10} {name:<24} {before:.3f}s -> {stage['seconds']:.3f}s ({ratio:.2f}x){flag}")
+    return regressions
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage across capture sizes.")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10000, 100000],
+                        help="event counts to generate and benchmark")
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--fanout', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, help="report scoring workers (default: Config.REPORT_WORKERS)")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip tracemalloc (its overhead inflates timings)")
+    parser.add_argument('--keep-logs', action='store_true', help="keep the generated captures")
+    parser.add_argument('--work-dir', help="where captures and outputs are written (default: a temp dir)")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help="results JSON file")
+    parser.add_argument('--compare', help="previous results JSON to compare stage timings against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+    args.workers = args.workers or Config.REPORT_WORKERS
+
+    results = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'memory_traced': not args.no_memory,
+            'seed': args.seed
+        },
+        'runs': []
+    }
+    with tempfile.TemporaryDirectory(prefix='audit_bench_') as temp_dir:
+        directory = args.work_dir or temp_dir
+        os.makedirs(directory, exist_ok=True)
+        for events in args.sizes:
+            results['runs'].append(benchmark_size(events, directory, args))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
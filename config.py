@@ -2,6 +2,107 @@ class Config:
     OUTPUT_DIR = './output'
     LOG_FILE = './input/auditbeat-20241129-7.ndjson'
     
+    # Hashed full-vocabulary syscall features for the ML analyzer (opt-in with
+    # --ml-hashed-features: they change the ML scores)
+    ML_HASHED_FEATURES = False
+    ML_HASH_SIZE = 2 ** 12
+    
+    # Per-executable behavioral baselines, updated after every capture
+    BASELINE_FILE = './output/baselines.json'
+    BASELINE_MIN_SAMPLES = 3
+    
+    # Worker processes for sharded report scoring (None = all cores)
+    REPORT_WORKERS = None
+    
+    # Flowcharts above this many processes use the aggregated level-of-detail view
+    FLOWCHART_AGGREGATE_THRESHOLD = 300
+    FLOWCHART_TOP_K = 50
+    
+    # Gantt charts above this many tasks merge same-executable processes into time-bucketed lanes
+    GANTT_MAX_TASKS = 500
+    GANTT_TIME_BUCKETS = 48
+    
+    # Process x time-bin syscall heatmap
+    HEATMAP_TIME_BINS = 240
+    HEATMAP_MAX_PROCESSES = 500
+    
+    # Trees above this many processes are also written as one page per
+    # top-level subtree (optionally per time window), rendered in parallel
+    PARTITION_THRESHOLD = 1000
+    PARTITION_WINDOW_SECONDS = None
+    OUTPUT_WORKERS = None
+    
+    # Rendered subtree fragments cached by content hash (None disables);
+    # fragments unused for the max age, then the least recently used beyond
+    # the size cap, are evicted at the start of each run (None: no limit)
+    FRAGMENT_CACHE_DIR = './output/.fragment_cache'
+    FRAGMENT_CACHE_MAX_BYTES = 256 * 2 ** 20
+    FRAGMENT_CACHE_MAX_AGE_DAYS = 30
+    
+    # Stage-graph pipeline: cached stage outputs (None disables), workers and
+    # backend ('process', 'thread' or 'serial'); overridable from the command line
+    PIPELINE_CACHE_DIR = './output/.pipeline_cache'
+    PIPELINE_WORKERS = None
+    PIPELINE_BACKEND = 'process'
+    
+    # Sampling mode for huge captures (--sample-rate / --sample-reservoir):
+    # privilege syscalls, failures and the first SAMPLE_RARE_COUNT events of
+    # each syscall are always kept; scores get bootstrap confidence intervals.
+    # Exec and file-removal syscalls are kept too, so the 60s window rules
+    # count them exactly instead of from a few heavily weighted rows
+    SAMPLE_KEEP_SYSCALLS = ['setuid', 'setgid', 'setreuid', 'setregid', 'setresuid', 'setresgid',
+                            'capset', 'chmod', 'chown', 'ptrace',
+                            'execve', 'fork', 'clone', 'unlink', 'rename', 'rmdir']
+    SAMPLE_RARE_COUNT = 50
+    SAMPLE_SEED = 0
+    SCORE_CI_LEVEL = 0.95
+    SCORE_CI_RESAMPLES = 200
+    
+    # Event storage: 'memory' (one DataFrame), 'sqlite' (out-of-core store
+    # read in chunks of whole processes, for captures larger than RAM) or
+    # 'aggregates' (per-PID partial aggregates reduced in parallel)
+    EVENT_STORE = 'memory'
+    EVENT_STORE_PATH = './output/events.sqlite'
+    EVENT_STORE_BATCH_ROWS = 50000
+    EVENT_STORE_CHUNK_ROWS = 500000
+    
+    # --store aggregates: the capture is reduced in byte ranges of this size
+    # (one per pool task) into mergeable per-PID aggregates
+    AGGREGATE_CHUNK_BYTES = 64 * 2 ** 20
+    
+    # --cluster: processes with the same executable, parent executable, root
+    # and failure flags whose MinHash-estimated syscall-set similarity is at
+    # least CLUSTER_THRESHOLD are scored once, through a representative
+    # (security alerts are still checked per process)
+    CLUSTER_PROCESSES = False
+    CLUSTER_NUM_PERM = 64
+    CLUSTER_BANDS = 16
+    CLUSTER_THRESHOLD = 0.8
+    
+    # Ancestry risk: a process inherits its riskiest ancestor's risk (1.0 when
+    # flagged, else its behavior score), decayed per generation; unflagged
+    # processes inheriting at least the threshold are drawn as tainted
+    LINEAGE_DECAY = 0.8
+    LINEAGE_TAINT_THRESHOLD = 0.5
+    # Flagged ancestors kept in a process's suspicious path (nearest first kept)
+    LINEAGE_PATH_LIMIT = 8
+    
+    # --fleet: rows in the roll-up's riskiest process and executable tables
+    FLEET_TOP_PROCESSES = 50
+    
+    # --diff: joined processes whose syscall mix moved by at least this total
+    # variation distance are reported; each report table keeps this many rows
+    DIFF_MIX_THRESHOLD = 0.2
+    DIFF_MAX_ROWS = 200
+    
+    # Local query service (--serve): localhost only
+    SERVER_HOST = '127.0.0.1'
+    SERVER_PORT = 8765
+    SERVER_DIAGRAM_CACHE = 256
+    
+    # Per-process debug output from the analyzers (--quiet turns it off)
+    VERBOSE = True
+    
     MERMAID_CONFIG = {
         'curve': 'basis',
         'nodeSpacing': 50,
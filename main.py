@@ -1,82 +1,680 @@
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
 import os
+import re
+import shutil
 from src.data.log_loader import load_audit_log
+from src.data.event_filter import EventFilter
+from src.data.sampling import EventSampler
+from src.data.event_store import EventStore
+from src.data.fleet_loader import event_host, load_host_frames, UNKNOWN_HOST
 from src.data.data_processor import create_dataframe
 from src.analysis.security_analyzer import SecurityAnalyzer
 from src.analysis.behavior_analyzer import BehaviorAnalyzer
 from src.analysis.ml_behavior_analyzer import MLBehaviorAnalyzer
-from src.analysis.process_tree import build_process_tree
-from src.visualization.mermaid_generator import generate_mermaid_diagram, generate_gantt_diagram
+from src.analysis.process_tree import build_process_tree_batch
+from src.analysis.baseline_store import BaselineStore, compute_process_profiles
+from src.analysis.process_annotations import annotate_processes, annotations_from_results
+from src.analysis.feature_hashing import SyscallFeatureHasher
+from src.analysis.partial_aggregates import aggregate_log_files
+from src.analysis.fleet_analyzer import analyze_fleet, fleet_rollup
+from src.analysis.capture_diff import process_details, capture_fingerprints, diff_captures
+from src.analysis.behavior_clusters import BehaviorClusterer
+from src.analysis.lineage_risk import lineage_risk
+from src.visualization.mermaid_generator import (
+    generate_mermaid_diagram, generate_aggregated_mermaid_diagram, generate_gantt_diagram
+)
 from src.visualization.html_generator import create_html_output
-from src.analysis.analysis_reporter import generate_comparison_report, validate_behavior_scores
+from src.visualization.graph_export import export_tree_json, export_tree_dot
+from src.visualization.tree_viewer import create_tree_viewer_html
+from src.visualization.heatmap_generator import compute_syscall_heatmap, create_heatmap_html
+from src.visualization.partitioned_output import save_partitioned_visualizations
+from src.visualization.fleet_report import create_fleet_report_html
+from src.visualization.diff_report import create_diff_report_html
+from src.visualization.fragment_cache import (
+    FragmentCache, rule_set_version, subtree_hashes, generate_incremental_mermaid_diagram,
+    generate_cached_aggregated_diagram
+)
+from src.analysis.analysis_reporter import (
+    generate_comparison_report, generate_chunked_comparison_report, write_comparison_report, sort_results,
+    validate_behavior_scores
+)
+from src.pipeline import Stage, StageGraph, BACKENDS
+from src.server import AnalysisIndex, serve
 from config import Config
 
-def initialize_analyzers(df):
-    """Initialize and prepare all analyzers."""
+def initialize_analyzers():
+    """Initialize the rule-based analyzers."""
     print("Initializing analyzers...")
-    security_analyzer = SecurityAnalyzer()
-    behavior_analyzer = BehaviorAnalyzer()
-    
-    # Initialize and train ML analyzer
+    return SecurityAnalyzer(), BehaviorAnalyzer(verbose=Config.VERBOSE)
+
+def create_ml_analyzer(behavior_analyzer):
     print("Initializing ML analyzer...")
-    ml_analyzer = MLBehaviorAnalyzer(behavior_analyzer.syscall_categories)
+    return MLBehaviorAnalyzer(
+        behavior_analyzer.syscall_categories,
+        hashed_features=Config.ML_HASHED_FEATURES,
+        hash_size=Config.ML_HASH_SIZE
+    )
+
+def train_ml_analyzer(df, behavior_analyzer):
+    """Initialize and train the ML analyzer."""
+    ml_analyzer = create_ml_analyzer(behavior_analyzer)
     ml_analyzer.train(df)
-    
-    return security_analyzer, behavior_analyzer, ml_analyzer
+    return ml_analyzer
 
-def generate_visualizations(process_tree, security_analyzer, behavior_analyzer, df):
-    """Generate all visualizations."""
-    print("Generating visualizations...")
-    traditional_mermaid = generate_mermaid_diagram(process_tree, security_analyzer, behavior_analyzer, df)
-    gantt_mermaid = generate_gantt_diagram(process_tree, security_analyzer, behavior_analyzer, df)
-    return traditional_mermaid, gantt_mermaid
+def score_against_baselines(df, behavior_analyzer, event_filter=None, sampler=None):
+    """Score processes against their executable's stored baseline, then fold this capture in."""
+    print("Scoring against per-executable baselines...")
+    return update_baselines(compute_process_profiles(df, behavior_analyzer.syscall_categories),
+                            partial_capture(event_filter, sampler))
 
-def save_visualizations(traditional_mermaid, gantt_mermaid, output_dir):
+def partial_capture(event_filter, sampler):
+    """True when the run only sees part of the capture (filtered or sampled)."""
+    return (event_filter is not None and event_filter.active) or sampler is not None
+
+def update_baselines(profiles, partial=False):
+    """Score profiles against the stored baselines, then fold them in.
+
+    Partial captures are only scored: their profiles would count processes twice
+    or skew the stored rates.
+    """
+    store = BaselineStore.load(Config.BASELINE_FILE, Config.BASELINE_MIN_SAMPLES)
+    baseline_scores = store.score_profiles(profiles)
+    
+    if partial:
+        print("Filtered or sampled capture; scoring only, baselines left unchanged")
+    elif store.update(profiles):
+        store.save()
+    else:
+        print("Capture already folded into the baselines; not counting it again")
+    return baseline_scores
+
+def save_visualizations(traditional_mermaid, gantt_mermaid, output_dir, process_tree=None, annotations=None,
+                        heatmap=None):
     """Save visualization files."""
     print("Saving visualizations...")
     os.makedirs(output_dir, exist_ok=True)
     
+    if heatmap is not None:
+        with open(os.path.join(output_dir, 'process_heatmap.html'), 'w', encoding='utf-8') as f:
+            f.write(create_heatmap_html(heatmap))
+    
+    # Scalable exports: compact JSON + DOT and the canvas tree viewer
+    if process_tree is not None and annotations is not None:
+        export_tree_json(process_tree, annotations, os.path.join(output_dir, 'process_tree.json'))
+        export_tree_dot(process_tree, annotations, os.path.join(output_dir, 'process_tree.dot'))
+        with open(os.path.join(output_dir, 'process_tree_viewer.html'), 'w', encoding='utf-8') as f:
+            f.write(create_tree_viewer_html('process_tree.json'))
+    
     with open(os.path.join(output_dir, 'process_flow.html'), 'w', encoding='utf-8') as f:
         f.write(create_html_output(traditional_mermaid, diagram_type="flowchart"))
     
     with open(os.path.join(output_dir, 'process_gantt.html'), 'w', encoding='utf-8') as f:
         f.write(create_html_output(gantt_mermaid, diagram_type="gantt"))
 
-def main():
-    # Load and process data
-    print("Loading audit logs...")
-    logs = load_audit_log(Config.LOG_FILE)
-    
+def load_logs(log_files, event_filter=None, sampler=None):
+    print(f"Loading audit logs from {len(log_files)} file(s)...")
+    logs = []
+    for log_file in log_files:
+        logs.extend(load_audit_log(log_file, event_filter, sampler))
+    if sampler is not None:
+        print(f"Sampled {len(logs)} events ({sampler!r})")
+    hosts = {event_host(log) for log in logs} - {UNKNOWN_HOST}
+    if len(hosts) > 1:
+        print(f"Warning: events from {len(hosts)} hosts share one PID space; use --fleet to analyze them per host")
+    return logs
+
+def process_logs(logs):
     print("Processing data...")
+    return create_dataframe(logs)
+
+def validate_key_processes(df, behavior_analyzer, validation_pids):
+    """Validate behavior scores for the requested processes off one frequency table."""
+    print("\nValidating behavior scores for key processes...")
+    frequencies, timestamps = behavior_analyzer.calculate_syscall_frequency(
+        df[df['pid'].isin(validation_pids)]
+    )
+    for pid in validation_pids:
+        validate_behavior_scores(df, behavior_analyzer, pid, frequencies, timestamps)
+
+def ingest_event_store(log_files, event_filter=None, sampler=None):
+    """Bulk-load the capture into the SQLite event store (reused while inputs and options match)."""
+    store = EventStore(Config.EVENT_STORE_PATH)
+    source = repr((input_fingerprint(log_files), repr(event_filter), repr(sampler)))
+    print(f"Loading audit logs from {len(log_files)} file(s) into {Config.EVENT_STORE_PATH}...")
+    loaded = store.ingest(log_files, source, event_filter, sampler, batch_size=Config.EVENT_STORE_BATCH_ROWS)
+    print(f"Stored {loaded} events" if loaded else "Reusing the existing event store")
+    return store
+
+def build_stored_process_tree(event_store):
+    return build_process_tree_batch(event_store.tree_frame())
+
+def annotate_stored_processes(process_tree, security_analyzer, behavior_analyzer, event_store):
+    """annotate_processes over the store, one chunk of whole processes at a time."""
+    annotations = {}
+    for df in event_store.iter_process_frames(Config.EVENT_STORE_CHUNK_ROWS):
+        chunk_tree = {pid: process_tree[pid] for pid in df['pid'].unique().tolist() if pid in process_tree}
+        annotations.update(annotate_processes(chunk_tree, security_analyzer, behavior_analyzer, df))
+    # Placeholder parents have no events of their own
+    rest = {pid: info for pid, info in process_tree.items() if pid not in annotations}
+    annotations.update(annotate_processes(rest, security_analyzer, behavior_analyzer, event_store.empty_frame()))
+    return {pid: annotations[pid] for pid in process_tree}
+
+def validate_stored_processes(event_store, behavior_analyzer, validation_pids):
+    validate_key_processes(event_store.process_frame(validation_pids), behavior_analyzer, validation_pids)
+
+def render_stored_gantt(process_tree, security_analyzer, behavior_analyzer, event_store, annotations):
+    """The timeline only needs each process's first and last event."""
+    return render_gantt(process_tree, security_analyzer, behavior_analyzer, event_store.process_bounds(),
+                        annotations)
+
+def train_stored_ml_analyzer(event_store, behavior_analyzer):
+    """Train the ML analyzer from the store's features, one chunk of whole processes at a time."""
+    ml_analyzer = create_ml_analyzer(behavior_analyzer)
+    ml_analyzer.train_chunks(event_store.iter_process_frames(Config.EVENT_STORE_CHUNK_ROWS))
+    return ml_analyzer
+
+def write_stored_report(event_store, behavior_analyzer, ml_analyzer, process_tree, baseline_scores, lineage):
+    print("Generating analysis comparison..." if ml_analyzer is not None
+          else "Generating analysis comparison (ML skipped, traditional scores only)...")
+    generate_chunked_comparison_report(
+        event_store.iter_process_frames(Config.EVENT_STORE_CHUNK_ROWS), behavior_analyzer, ml_analyzer,
+        process_tree, baseline_scores, verbose=Config.VERBOSE, output_dir=Config.OUTPUT_DIR, lineage=lineage
+    )
+    print(f"Open '{Config.OUTPUT_DIR}/analysis_comparison.html' to compare behavior scores (trad vs ML)")
+
+def score_stored_baselines(event_store, behavior_analyzer, event_filter=None, sampler=None):
+    print("Scoring against per-executable baselines...")
+    profiles = {}
+    for df in event_store.iter_process_frames(Config.EVENT_STORE_CHUNK_ROWS):
+        profiles.update(compute_process_profiles(df, behavior_analyzer.syscall_categories))
+    return update_baselines(profiles, partial_capture(event_filter, sampler))
+
+def aggregate_events(log_files, security_analyzer):
+    """Reduce the capture chunk by chunk in a process pool into mergeable per-PID aggregates."""
+    print(f"Aggregating {len(log_files)} file(s) in chunks of {Config.AGGREGATE_CHUNK_BYTES} bytes...")
+    hasher = SyscallFeatureHasher(Config.ML_HASH_SIZE) if Config.ML_HASHED_FEATURES else None
+    return aggregate_log_files(log_files, security_analyzer.suspicious_behaviors, hasher,
+                               chunk_bytes=Config.AGGREGATE_CHUNK_BYTES, workers=Config.PIPELINE_WORKERS)
+
+def build_aggregated_process_tree(aggregates):
+    return aggregates.process_tree()
+
+def annotate_aggregated_processes(process_tree, security_analyzer, behavior_analyzer, aggregates):
+    return annotations_from_results(process_tree, aggregates.alerts(process_tree, security_analyzer),
+                                    aggregates.behavior_scores(behavior_analyzer))
+
+def render_aggregated_gantt(process_tree, security_analyzer, behavior_analyzer, aggregates, annotations):
+    return render_gantt(process_tree, security_analyzer, behavior_analyzer, aggregates.bounds_frame(), annotations)
+
+def train_aggregated_ml_analyzer(aggregates, behavior_analyzer):
+    """Train the ML analyzer on the aggregated per-process features."""
+    ml_analyzer = create_ml_analyzer(behavior_analyzer)
+    print("Training ML model...")
+    _, features, hashed = aggregates.feature_blocks(ml_analyzer)
+    ml_analyzer.train_features(features, hashed)
+    return ml_analyzer
+
+def write_aggregated_report(aggregates, behavior_analyzer, ml_analyzer, process_tree, baseline_scores, lineage):
+    print("Generating analysis comparison..." if ml_analyzer is not None
+          else "Generating analysis comparison (ML skipped, traditional scores only)...")
+    results = sort_results(aggregates.report_results(process_tree, behavior_analyzer, ml_analyzer))
+    write_comparison_report(results, process_tree, baseline_scores, Config.OUTPUT_DIR, lineage=lineage)
+    print(f"Open '{Config.OUTPUT_DIR}/analysis_comparison.html' to compare behavior scores (trad vs ML)")
+
+def score_aggregated_baselines(aggregates, behavior_analyzer):
+    print("Scoring against per-executable baselines...")
+    return update_baselines(aggregates.profiles(behavior_analyzer.syscall_categories))
+
+def load_fleet_logs(log_files, event_filter=None, sampler=None):
+    print(f"Loading audit logs from {len(log_files)} file(s) and merging them by time...")
+    host_frames = load_host_frames(log_files, event_filter, sampler)
+    print(f"Found {len(host_frames)} host(s): {', '.join(host_frames)}")
+    return host_frames
+
+def analyze_hosts(host_frames, security_analyzer, behavior_analyzer):
+    """Build and annotate each host's process tree, hosts in parallel."""
+    print("Analyzing hosts...")
+    return analyze_fleet(host_frames, security_analyzer, behavior_analyzer, workers=Config.PIPELINE_WORKERS)
+
+def write_fleet_report(fleet_results):
+    """Per-host tree exports and viewers, plus the fleet roll-up page and JSON."""
+    print("Generating fleet report...")
+    host_pages = {}
+    for host, result in fleet_results.items():
+        directory = os.path.join('hosts', re.sub(r'[^A-Za-z0-9_.-]', '_', host))
+        os.makedirs(os.path.join(Config.OUTPUT_DIR, directory), exist_ok=True)
+        export_tree_json(result['process_tree'], result['annotations'],
+                         os.path.join(Config.OUTPUT_DIR, directory, 'process_tree.json'))
+        with open(os.path.join(Config.OUTPUT_DIR, directory, 'process_tree_viewer.html'), 'w', encoding='utf-8') as f:
+            f.write(create_tree_viewer_html('process_tree.json'))
+        host_pages[host] = f"{directory}/process_tree_viewer.html"
+    
+    rollup = fleet_rollup(fleet_results, top=Config.FLEET_TOP_PROCESSES)
+    with open(os.path.join(Config.OUTPUT_DIR, 'fleet_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(rollup, f, ensure_ascii=False, indent=1)
+    with open(os.path.join(Config.OUTPUT_DIR, 'fleet_report.html'), 'w', encoding='utf-8') as f:
+        f.write(create_fleet_report_html(rollup, host_pages))
+    print(f"Open '{Config.OUTPUT_DIR}/fleet_report.html' for the fleet roll-up")
+
+def fingerprint_capture(log_files, security_analyzer, behavior_analyzer, event_filter=None, sampler=None):
+    """Load and annotate one capture, then group its processes by identity fingerprint."""
+    print(f"Fingerprinting {len(log_files)} file(s)...")
+    logs = load_logs(log_files, event_filter, sampler)
     df = create_dataframe(logs)
+    process_tree = build_process_tree_batch(df)
+    annotations = annotate_processes(process_tree, security_analyzer, behavior_analyzer, df)
+    return capture_fingerprints(df, process_tree, annotations, process_details(logs))
+
+def write_diff_report(baseline_fingerprints, current_fingerprints, baseline_files, log_files):
+    print("Comparing captures...")
+    diff = diff_captures(baseline_fingerprints, current_fingerprints,
+                         mix_threshold=Config.DIFF_MIX_THRESHOLD, top=Config.DIFF_MAX_ROWS)
+    os.makedirs(Config.OUTPUT_DIR, exist_ok=True)
+    with open(os.path.join(Config.OUTPUT_DIR, 'capture_diff.json'), 'w', encoding='utf-8') as f:
+        json.dump(diff, f, ensure_ascii=False, indent=1)
+    with open(os.path.join(Config.OUTPUT_DIR, 'capture_diff.html'), 'w', encoding='utf-8') as f:
+        f.write(create_diff_report_html(diff, ', '.join(map(os.path.basename, baseline_files)),
+                                        ', '.join(map(os.path.basename, log_files))))
+    summary = diff['summary']
+    print(f"{summary['new']} new, {summary['missing']} missing, {summary['changed_mix']} changed syscall mixes, "
+          f"{summary['new_alerts']} with new alerts")
+    print(f"Open '{Config.OUTPUT_DIR}/capture_diff.html' for the comparison")
+
+def cluster_processes(df, process_tree):
+    """Behavior clusters ({pid: representative}); None unless clustering is enabled."""
+    if not Config.CLUSTER_PROCESSES:
+        return None
+    clusterer = BehaviorClusterer(
+        num_perm=Config.CLUSTER_NUM_PERM, bands=Config.CLUSTER_BANDS,
+        threshold=Config.CLUSTER_THRESHOLD, seed=Config.SAMPLE_SEED
+    )
+    clusters = clusterer.cluster(process_tree, df)
+    representatives = sum(1 for pid, rep in clusters.items() if pid == rep)
+    print(f"Clustered {len(clusters)} processes into {representatives} behavior clusters")
+    return clusters
+
+def annotate_clustered_processes(process_tree, security_analyzer, behavior_analyzer, df, clusters):
+    return annotate_processes(process_tree, security_analyzer, behavior_analyzer, df, clusters=clusters)
+
+def compute_lineage(process_tree, annotations):
+    """Inherited risk, depth, flagged ancestors and subtree alert totals per process."""
+    return lineage_risk(process_tree, annotations, decay=Config.LINEAGE_DECAY,
+                        taint_threshold=Config.LINEAGE_TAINT_THRESHOLD, path_limit=Config.LINEAGE_PATH_LIMIT)
+
+def prepare_fragment_cache(process_tree, annotations, security_analyzer, behavior_analyzer, lineage):
+    """Content hashes per subtree let re-runs reuse unchanged rendered fragments."""
+    if not Config.FRAGMENT_CACHE_DIR:
+        return None, None
+    hashes = subtree_hashes(process_tree, annotations, rule_set_version(security_analyzer, behavior_analyzer),
+                            lineage)
+    cache = FragmentCache(Config.FRAGMENT_CACHE_DIR)
+    max_age = Config.FRAGMENT_CACHE_MAX_AGE_DAYS
+    removed = cache.evict(Config.FRAGMENT_CACHE_MAX_BYTES, max_age * 86400 if max_age is not None else None)
+    if removed:
+        print(f"Evicted {removed} stale cached fragments")
+    return cache, hashes
+
+def render_flowchart(process_tree, security_analyzer, behavior_analyzer, df, annotations, fragment_cache, hashes,
+                     lineage):
+    print("Generating flowchart...")
+    if len(process_tree) > Config.FLOWCHART_AGGREGATE_THRESHOLD and fragment_cache is not None:
+        mermaid = generate_cached_aggregated_diagram(process_tree, annotations, fragment_cache, hashes,
+                                                     top_k=Config.FLOWCHART_TOP_K, lineage=lineage)
+        print("Reused the cached aggregated flowchart" if fragment_cache.hits else "Cached the aggregated flowchart")
+        return mermaid
+    if len(process_tree) > Config.FLOWCHART_AGGREGATE_THRESHOLD:
+        return generate_aggregated_mermaid_diagram(
+            process_tree, security_analyzer, behavior_analyzer, df,
+            top_k=Config.FLOWCHART_TOP_K, annotations=annotations, lineage=lineage
+        )
+    if fragment_cache is not None:
+        mermaid = generate_incremental_mermaid_diagram(process_tree, annotations, fragment_cache, hashes=hashes,
+                                                       lineage=lineage)
+        print(f"Reused {fragment_cache.hits} cached subtree fragments")
+        return mermaid
+    return generate_mermaid_diagram(process_tree, security_analyzer, behavior_analyzer, df, annotations, lineage)
+
+def render_gantt(process_tree, security_analyzer, behavior_analyzer, df, annotations):
+    print("Generating timeline...")
+    return generate_gantt_diagram(
+        process_tree, security_analyzer, behavior_analyzer, df, annotations,
+        max_tasks=Config.GANTT_MAX_TASKS, bucket_count=Config.GANTT_TIME_BUCKETS
+    )
+
+def compute_heatmap(df, behavior_analyzer):
+    """Syscall-rate heatmap (size depends on bin counts, not events)."""
+    return compute_syscall_heatmap(
+        df, behavior_analyzer.syscall_categories,
+        time_bins=Config.HEATMAP_TIME_BINS, max_processes=Config.HEATMAP_MAX_PROCESSES
+    )
+
+def estimate_score_intervals(df, behavior_analyzer):
+    """Confidence intervals on behavior scores; only sampled captures (with a weight column) need them."""
+    if 'weight' not in df:
+        return None
+    print("Bootstrapping behavior score intervals...")
+    return behavior_analyzer.behavior_score_intervals(
+        df, confidence=Config.SCORE_CI_LEVEL, resamples=Config.SCORE_CI_RESAMPLES, seed=Config.SAMPLE_SEED
+    )
+
+def write_report(df, behavior_analyzer, ml_analyzer, process_tree, baseline_scores, score_intervals, clusters,
+                 lineage):
+    print("Generating analysis comparison..." if ml_analyzer is not None
+          else "Generating analysis comparison (ML skipped, traditional scores only)...")
+    generate_comparison_report(
+        df, behavior_analyzer, ml_analyzer, process_tree, baseline_scores,
+        workers=Config.REPORT_WORKERS, verbose=Config.VERBOSE, output_dir=Config.OUTPUT_DIR,
+        score_intervals=score_intervals, clusters=clusters, lineage=lineage
+    )
+    print(f"Open '{Config.OUTPUT_DIR}/analysis_comparison.html' to compare behavior scores (trad vs ML)")
+
+def write_visualizations(flowchart, gantt, process_tree, annotations, heatmap):
+    save_visualizations(flowchart, gantt, Config.OUTPUT_DIR, process_tree, annotations, heatmap)
+    print(f"Open '{Config.OUTPUT_DIR}/process_flow.html' for the process tree view")
+    print(f"Open '{Config.OUTPUT_DIR}/process_gantt.html' for the timeline view")
+    print(f"Open '{Config.OUTPUT_DIR}/process_tree_viewer.html' for the scalable tree viewer")
+    if heatmap is not None:
+        print(f"Open '{Config.OUTPUT_DIR}/process_heatmap.html' for the syscall activity heatmap")
+
+def write_partitioned(process_tree, annotations, df, fragment_cache, hashes, lineage):
+    """Large trees also get one page per top-level subtree."""
+    if len(process_tree) <= Config.PARTITION_THRESHOLD:
+        # Pages of an earlier, larger capture would be stale
+        shutil.rmtree(os.path.join(Config.OUTPUT_DIR, 'subtrees'), ignore_errors=True)
+        return
+    index_path = save_partitioned_visualizations(
+        process_tree, annotations, df, Config.OUTPUT_DIR,
+        window_seconds=Config.PARTITION_WINDOW_SECONDS, workers=Config.OUTPUT_WORKERS,
+        aggregate_threshold=Config.FLOWCHART_AGGREGATE_THRESHOLD, top_k=Config.FLOWCHART_TOP_K,
+        cache=fragment_cache, hashes=hashes, lineage=lineage
+    )
+    print(f"Open '{index_path}' for the per-subtree pages")
+
+ANALYZERS = ['security_analyzer', 'behavior_analyzer']
+
+FLEET_STAGES = [
+    Stage('fleet_load', load_fleet_logs, ['log_files', 'event_filter', 'sampler'], ['host_frames']),
+    Stage('analyzers', initialize_analyzers, [], ANALYZERS),
+    Stage('fleet', analyze_hosts, ['host_frames'] + ANALYZERS, ['fleet_results'], cacheable=True, version=3),
+    Stage('fleet_report', write_fleet_report, ['fleet_results'])
+]
+
+DIFF_STAGES = [
+    Stage('analyzers', initialize_analyzers, [], ANALYZERS),
+    Stage('diff_baseline', fingerprint_capture, ['baseline_files'] + ANALYZERS + ['event_filter', 'sampler'],
+          ['baseline_fingerprints'], cacheable=True, version=2),
+    Stage('diff_current', fingerprint_capture, ['log_files'] + ANALYZERS + ['event_filter', 'sampler'],
+          ['current_fingerprints'], cacheable=True, version=2),
+    Stage('diff_report', write_diff_report,
+          ['baseline_fingerprints', 'current_fingerprints', 'baseline_files', 'log_files'])
+]
+
+def build_stages(store='memory', fleet=False, diff=False):
+    """The analysis pipeline as a DAG of named stages.
     
-    # Initialize analyzers
-    security_analyzer, behavior_analyzer, ml_analyzer = initialize_analyzers(df)
+    In fleet mode events are split by host and each host's PID space is
+    analyzed separately (hosts in parallel), followed by the fleet roll-up.
+    In diff mode the baseline and current captures are fingerprinted
+    concurrently and compared.
     
-    # Build process tree
-    process_tree = build_process_tree(df)
+    With the SQLite store the event table is never held in memory: stages
+    that work per process (including ML training and the report) read chunks
+    or slices from the store instead, and stages that need the whole table
+    (heatmap, intervals, partition) drop out of the plan for lack of a 'df'.
+    With aggregates the capture is reduced in parallel into per-PID
+    aggregates, which answer the tree, annotations, timeline, baselines, ML
+    features and report; the same stages drop out.
+    """
+    if fleet:
+        return list(FLEET_STAGES)
+    if diff:
+        return list(DIFF_STAGES)
+    stages = [
+        Stage('load', load_logs, ['log_files', 'event_filter', 'sampler'], ['logs']),
+        Stage('dataframe', process_logs, ['logs'], ['df'], cacheable=True, version=2),
+        Stage('analyzers', initialize_analyzers, [], ANALYZERS),
+        Stage('ml', train_ml_analyzer, ['df', 'behavior_analyzer'], ['ml_analyzer'],
+              executor='process', cacheable=True),
+        Stage('tree', build_process_tree_batch, ['df'], ['process_tree'], cacheable=True),
+        Stage('validate', validate_key_processes, ['df', 'behavior_analyzer', 'validation_pids']),
+        Stage('clusters', cluster_processes, ['df', 'process_tree'], ['clusters'], cacheable=True),
+        Stage('annotate', annotate_clustered_processes, ['process_tree'] + ANALYZERS + ['df', 'clusters'],
+              ['annotations'], optional=['clusters']),
+        Stage('lineage', compute_lineage, ['process_tree', 'annotations'], ['lineage']),
+        Stage('fragments', prepare_fragment_cache, ['process_tree', 'annotations'] + ANALYZERS + ['lineage'],
+              ['fragment_cache', 'hashes'], optional=['lineage']),
+        Stage('flowchart', render_flowchart,
+              ['process_tree'] + ANALYZERS + ['df', 'annotations', 'fragment_cache', 'hashes', 'lineage'],
+              ['flowchart'], optional=['df', 'fragment_cache', 'hashes', 'lineage']),
+        Stage('gantt', render_gantt, ['process_tree'] + ANALYZERS + ['df', 'annotations'], ['gantt']),
+        Stage('heatmap', compute_heatmap, ['df', 'behavior_analyzer'], ['heatmap']),
+        Stage('baselines', score_against_baselines, ['df', 'behavior_analyzer', 'event_filter', 'sampler'],
+              ['baseline_scores']),
+        Stage('intervals', estimate_score_intervals, ['df', 'behavior_analyzer'], ['score_intervals'],
+              executor='process', cacheable=True),
+        Stage('report', write_report,
+              ['df', 'behavior_analyzer', 'ml_analyzer', 'process_tree', 'baseline_scores', 'score_intervals',
+               'clusters', 'lineage'],
+              optional=['ml_analyzer', 'baseline_scores', 'score_intervals', 'clusters', 'lineage']),
+        Stage('save', write_visualizations, ['flowchart', 'gantt', 'process_tree', 'annotations', 'heatmap'],
+              optional=['heatmap']),
+        Stage('partition', write_partitioned,
+              ['process_tree', 'annotations', 'df', 'fragment_cache', 'hashes', 'lineage'],
+              optional=['fragment_cache', 'hashes', 'lineage'])
+    ]
+    if store == 'memory':
+        return stages
     
-    # Validate behavior scores for specific processes
-    print("\nValidating behavior scores for key processes...")
-    target_pids = [4427, 4428, 4430]  # Python processes from example
-    for pid in target_pids:
-        validate_behavior_scores(df, behavior_analyzer, pid)
+    aggregated = [
+        Stage('aggregate', aggregate_events, ['log_files', 'security_analyzer'], ['aggregates'], cacheable=True,
+              version=3),
+        Stage('tree', build_aggregated_process_tree, ['aggregates'], ['process_tree']),
+        Stage('annotate', annotate_aggregated_processes, ['process_tree'] + ANALYZERS + ['aggregates'],
+              ['annotations']),
+        Stage('gantt', render_aggregated_gantt, ['process_tree'] + ANALYZERS + ['aggregates', 'annotations'],
+              ['gantt']),
+        Stage('baselines', score_aggregated_baselines, ['aggregates', 'behavior_analyzer'], ['baseline_scores']),
+        Stage('ml', train_aggregated_ml_analyzer, ['aggregates', 'behavior_analyzer'], ['ml_analyzer'],
+              executor='process', cacheable=True),
+        Stage('report', write_aggregated_report,
+              ['aggregates', 'behavior_analyzer', 'ml_analyzer', 'process_tree', 'baseline_scores', 'lineage'],
+              optional=['ml_analyzer', 'baseline_scores', 'lineage'])
+    ]
+    stored = [
+        Stage('store', ingest_event_store, ['log_files', 'event_filter', 'sampler'], ['event_store']),
+        Stage('tree', build_stored_process_tree, ['event_store'], ['process_tree'], cacheable=True),
+        Stage('validate', validate_stored_processes, ['event_store', 'behavior_analyzer', 'validation_pids']),
+        Stage('annotate', annotate_stored_processes, ['process_tree'] + ANALYZERS + ['event_store'],
+              ['annotations']),
+        Stage('gantt', render_stored_gantt, ['process_tree'] + ANALYZERS + ['event_store', 'annotations'],
+              ['gantt']),
+        Stage('baselines', score_stored_baselines, ['event_store', 'behavior_analyzer', 'event_filter', 'sampler'],
+              ['baseline_scores']),
+        Stage('ml', train_stored_ml_analyzer, ['event_store', 'behavior_analyzer'], ['ml_analyzer'],
+              executor='process', cacheable=True),
+        Stage('report', write_stored_report,
+              ['event_store', 'behavior_analyzer', 'ml_analyzer', 'process_tree', 'baseline_scores', 'lineage'],
+              optional=['ml_analyzer', 'baseline_scores', 'lineage'])
+    ]
+    replaced = {stage.name: stage for stage in (stored if store == 'sqlite' else aggregated)}
+    stages = [replaced.pop(stage.name, stage) for stage in stages if stage.name not in ('load', 'dataframe')]
+    return list(replaced.values()) + stages
+
+# Settings that change where or how fast outputs are produced, not what they are
+RUNTIME_SETTINGS = {
+    'LOG_FILE', 'OUTPUT_DIR', 'PIPELINE_CACHE_DIR', 'FRAGMENT_CACHE_DIR', 'PIPELINE_BACKEND',
+    'PIPELINE_WORKERS', 'REPORT_WORKERS', 'OUTPUT_WORKERS', 'VERBOSE',
+    'SERVER_HOST', 'SERVER_PORT', 'SERVER_DIAGRAM_CACHE', 'EVENT_STORE', 'EVENT_STORE_PATH',
+    'EVENT_STORE_BATCH_ROWS', 'EVENT_STORE_CHUNK_ROWS', 'AGGREGATE_CHUNK_BYTES',
+    'FRAGMENT_CACHE_MAX_BYTES', 'FRAGMENT_CACHE_MAX_AGE_DAYS'
+}
+
+def input_fingerprint(log_files):
+    """Identify the capture and settings so cached stage outputs are reused only when both match."""
+    files = []
+    for log_file in log_files:
+        stat = os.stat(log_file)
+        files.append((os.path.abspath(log_file), stat.st_size, stat.st_mtime_ns))
+    settings = sorted((k, repr(v)) for k, v in vars(Config).items()
+                      if k.isupper() and k not in RUNTIME_SETTINGS)
+    key = repr((files, settings))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def expand_inputs(patterns):
+    """Expand paths and glob patterns into a sorted, de-duplicated file list."""
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        files.update(match for match in matches if os.path.isfile(match))
+        if not matches and os.path.isfile(pattern):
+            files.add(pattern)
+    return sorted(files)
+
+def parse_args(argv=None):
+    stage_names = list(dict.fromkeys(stage.name for stage in build_stages() + FLEET_STAGES + DIFF_STAGES))
+    parser = argparse.ArgumentParser(description="Analyze auditbeat syscall logs.")
+    parser.add_argument('inputs', nargs='*', default=[Config.LOG_FILE],
+                        help=f"auditbeat NDJSON files or glob patterns (default: {Config.LOG_FILE})")
+    parser.add_argument('-o', '--output-dir', default=Config.OUTPUT_DIR, help="directory for generated files")
+    parser.add_argument('-j', '--workers', type=int, help="worker count for stages, report scoring and page rendering")
+    parser.add_argument('--backend', choices=BACKENDS, default=Config.PIPELINE_BACKEND,
+                        help="process: CPU-bound stages in processes; thread: threads only; serial: no concurrency")
+    filters = parser.add_argument_group('event filters (applied while loading)')
+    filters.add_argument('--since', help="keep events at or after this ISO time (UTC unless given)")
+    filters.add_argument('--until', help="keep events before this ISO time")
+    filters.add_argument('--user', action='append', default=[], help="user name or numeric uid (repeatable)")
+    filters.add_argument('--exe', action='append', default=[], help="process name or executable path (repeatable)")
+    filters.add_argument('--subtree', action='append', default=[], type=int, metavar='PID',
+                         help="keep this process and its descendants (repeatable)")
+    sampling = parser.add_argument_group('sampling (approximate results for huge captures)')
+    sampling = sampling.add_mutually_exclusive_group()
+    sampling.add_argument('--sample-rate', type=float, metavar='RATE',
+                          help="keep this fraction of events, chosen by a stable hash of each event")
+    sampling.add_argument('--sample-reservoir', type=int, metavar='N',
+                          help="keep a uniform sample of at most N events per process")
+    parser.add_argument('--validate', nargs='+', type=int, metavar='PID',
+                        help="print a score breakdown for these PIDs")
+    parser.add_argument('-q', '--quiet', action='store_true', help="suppress per-process debug output")
+    parser.add_argument('--stages', help="comma-separated stages to run (their inputs are run as needed); "
+                                         f"available: {', '.join(stage_names)}")
+    parser.add_argument('--skip', default='', help="comma-separated stages to leave out, e.g. ml")
+    parser.add_argument('--no-cache', action='store_true', help="recompute every stage")
+    parser.add_argument('--store', choices=['memory', 'sqlite', 'aggregates'], default=Config.EVENT_STORE,
+                        help="memory: one in-memory table; sqlite: out-of-core event store in the output "
+                             "directory; aggregates: per-process aggregates reduced in parallel "
+                             "(sqlite and aggregates skip the heatmap, intervals and partition pages)")
+    parser.add_argument('--ml-hashed-features', action='store_true',
+                        help="add hashed syscall, bigram and inter-arrival features to the ML model")
+    parser.add_argument('--cluster', action='store_true',
+                        help="analyze one representative per cluster of near-identical processes "
+                             "(MinHash over syscall sets, same executable and parent)")
+    parser.add_argument('--fleet', action='store_true',
+                        help="inputs come from several hosts: analyze each host's PID space separately "
+                             "(in parallel) and write a fleet roll-up report")
+    parser.add_argument('--diff', nargs='+', metavar='BASELINE',
+                        help="compare the inputs against this baseline capture (files or glob patterns): "
+                             "new/missing processes, changed syscall mixes and new alerts")
+    parser.add_argument('--serve', nargs='?', type=int, const=Config.SERVER_PORT, metavar='PORT',
+                        help=f"load and annotate once, then answer queries over HTTP on localhost "
+                             f"(default port {Config.SERVER_PORT}) instead of writing outputs")
+    args = parser.parse_args(argv)
     
-    # Generate visualizations
-    traditional_mermaid, gantt_mermaid = generate_visualizations(
-        process_tree, security_analyzer, behavior_analyzer, df
+    args.log_files = expand_inputs(args.inputs)
+    if not args.log_files:
+        parser.error(f"no input files match {' '.join(args.inputs)}")
+    if args.serve is not None and args.store != 'memory':
+        parser.error("--serve needs the in-memory table (--store memory)")
+    if args.fleet and (args.serve is not None or args.store != 'memory'):
+        parser.error("--fleet runs its own per-host analysis; it cannot be combined with --serve or --store")
+    args.baseline_files = expand_inputs(args.diff) if args.diff else []
+    if args.diff:
+        if not args.baseline_files:
+            parser.error(f"no baseline files match {' '.join(args.diff)}")
+        if args.fleet or args.serve is not None or args.store != 'memory':
+            parser.error("--diff cannot be combined with --fleet, --serve or --store")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    try:
+        args.event_filter = EventFilter(
+            start=args.since, end=args.until,
+            users=[user for user in args.user if not user.isdigit()],
+            uids=[user for user in args.user if user.isdigit()],
+            executables=args.exe, subtree_pids=args.subtree
+        )
+    except ValueError as e:
+        parser.error(f"invalid --since/--until time: {e}")
+    args.sampler = None
+    if args.sample_rate is not None or args.sample_reservoir is not None:
+        try:
+            size = {'rate': args.sample_rate} if args.sample_rate is not None else \
+                {'method': 'reservoir', 'reservoir_size': args.sample_reservoir}
+            args.sampler = EventSampler(
+                **size, rare_count=Config.SAMPLE_RARE_COUNT, keep_syscalls=Config.SAMPLE_KEEP_SYSCALLS,
+                seed=Config.SAMPLE_SEED
+            )
+        except ValueError as e:
+            parser.error(str(e))
+    if args.store == 'aggregates' and (args.event_filter.active or args.sampler is not None):
+        parser.error("--store aggregates reads whole captures; filters and sampling need --store memory or sqlite")
+    return args
+
+def configure(args):
+    """Apply command-line options to Config; stage functions read their settings from it."""
+    if args.output_dir != Config.OUTPUT_DIR:
+        for name in ('PIPELINE_CACHE_DIR', 'FRAGMENT_CACHE_DIR', 'EVENT_STORE_PATH', 'BASELINE_FILE'):
+            if getattr(Config, name):
+                setattr(Config, name, os.path.join(args.output_dir, os.path.basename(getattr(Config, name))))
+        Config.OUTPUT_DIR = args.output_dir
+    
+    workers = 1 if args.backend == 'serial' else args.workers
+    if workers is not None:
+        Config.PIPELINE_WORKERS = Config.REPORT_WORKERS = Config.OUTPUT_WORKERS = workers
+    Config.PIPELINE_BACKEND = args.backend
+    Config.VERBOSE = not args.quiet
+    Config.EVENT_STORE = args.store
+    Config.ML_HASHED_FEATURES = Config.ML_HASHED_FEATURES or args.ml_hashed_features
+    Config.CLUSTER_PROCESSES = Config.CLUSTER_PROCESSES or args.cluster
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure(args)
+    graph = StageGraph(
+        build_stages(Config.EVENT_STORE, fleet=args.fleet, diff=bool(args.diff)),
+        cache_dir=None if args.no_cache else Config.PIPELINE_CACHE_DIR,
+        max_workers=Config.PIPELINE_WORKERS,
+        backend=Config.PIPELINE_BACKEND,
+        verbose=Config.VERBOSE
     )
+    targets = [name.strip() for name in args.stages.split(',')] if args.stages else None
+    skip = {name.strip() for name in args.skip.split(',') if name.strip()}
+    # Validation is opt-in: it only runs for PIDs asked for on the command line
+    if not args.validate and not args.fleet and not args.diff:
+        skip.add('validate')
     
-    # Generate comparison report
-    print("Generating analysis comparison...")
-    generate_comparison_report(df, behavior_analyzer, ml_analyzer, process_tree)
+    if args.serve is not None:
+        targets = ['annotate']
     
-    # Save visualizations
-    save_visualizations(traditional_mermaid, gantt_mermaid, Config.OUTPUT_DIR)
+    context = graph.run(
+        initial={'log_files': args.log_files, 'event_filter': args.event_filter, 'sampler': args.sampler,
+                 'validation_pids': args.validate or [], 'baseline_files': args.baseline_files},
+        fingerprints={'log_files': input_fingerprint(args.log_files), 'event_filter': repr(args.event_filter),
+                      'sampler': repr(args.sampler),
+                      'baseline_files': input_fingerprint(args.baseline_files) if args.baseline_files else None},
+        targets=targets, skip=skip
+    )
+    print("Pipeline finished!")
     
-    print("Visualizations have been generated!")
-    print(f"Open '{Config.OUTPUT_DIR}/process_flow.html' for the process tree view")
-    print(f"Open '{Config.OUTPUT_DIR}/process_gantt.html' for the timeline view")
-    print(f"Open '{Config.OUTPUT_DIR}/analysis_comparison.html' to compare behavior scores (trad vs ML)")
+    if args.serve is not None:
+        index = AnalysisIndex(context['df'], context['process_tree'], context['annotations'],
+                              diagram_cache_size=Config.SERVER_DIAGRAM_CACHE)
+        try:
+            asyncio.run(serve(index, Config.SERVER_HOST, args.serve))
+        except KeyboardInterrupt:
+            print("Server stopped")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,9 +1,19 @@
 """Process analysis and security checking modules."""
 from .security_analyzer import SecurityAnalyzer
-from .process_tree import build_process_tree
+from .process_tree import build_process_tree, build_process_tree_batch
 from .behavior_analyzer import BehaviorAnalyzer
 from .ml_behavior_analyzer import MLBehaviorAnalyzer
-from .analysis_reporter import generate_comparison_report, validate_behavior_scores
+from .feature_hashing import SyscallFeatureHasher
+from .baseline_store import BaselineStore, compute_process_profiles
+from .partial_aggregates import ProcessAggregates, aggregate_log_files
+from .fleet_analyzer import analyze_fleet, fleet_rollup
+from .capture_diff import capture_fingerprints, diff_captures
+from .behavior_clusters import BehaviorClusterer, cluster_members
+from .lineage_risk import lineage_risk
+from .analysis_reporter import generate_comparison_report, write_comparison_report, validate_behavior_scores
 
-__all__ = ['SecurityAnalyzer', 'build_process_tree', 'BehaviorAnalyzer', 
-           'MLBehaviorAnalyzer', 'generate_comparison_report', 'validate_behavior_scores']
\ No newline at end of file
+__all__ = ['SecurityAnalyzer', 'build_process_tree', 'build_process_tree_batch', 'BehaviorAnalyzer', 
+           'MLBehaviorAnalyzer', 'SyscallFeatureHasher', 'BaselineStore', 'compute_process_profiles',
+           'ProcessAggregates', 'aggregate_log_files', 'analyze_fleet', 'fleet_rollup',
+           'capture_fingerprints', 'diff_captures', 'BehaviorClusterer', 'cluster_members',
+           'lineage_risk', 'generate_comparison_report', 'write_comparison_report', 'validate_behavior_scores']
\ No newline at end of file
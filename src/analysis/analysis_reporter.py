@@ -1,37 +1,173 @@
 import os
+import json
+import tempfile
 from collections import defaultdict
+import numpy as np
+from src.data.shared_table import SharedEventTable
+from src.utils.process_pool import process_pool
+from .behavior_clusters import cluster_members
 
-def generate_comparison_report(df, traditional_analyzer, ml_analyzer, process_tree):
-    """Generate HTML report comparing traditional and ML analysis."""
-    results = _collect_analysis_results(df, traditional_analyzer, ml_analyzer, process_tree)
+# Below this many processes the pool start-up costs more than it saves
+PARALLEL_MIN_PROCESSES = 200
+
+# Above this many processes the scatter plot becomes a density heatmap
+SCATTER_POINT_LIMIT = 20000
+HISTOGRAM_BINS = 50
+DENSITY_BINS = 100
+
+# Pinned fallback when the plotly package isn't installed to vendor from
+PLOTLY_CDN_FALLBACK = 'https://cdn.plot.ly/plotly-2.35.2.min.js'
+
+def generate_comparison_report(df, traditional_analyzer, ml_analyzer, process_tree,
+                               baseline_scores=None, workers=None, verbose=True, output_dir='output',
+                               score_intervals=None, clusters=None, lineage=None):
+    """Generate HTML report comparing traditional and ML analysis.
+
+    score_intervals ({pid: (low, high)}) adds confidence intervals to the
+    traditional scores of a sampled capture. With clusters ({pid: representative})
+    only representatives are scored and members repeat their representative's row.
+    lineage (from lineage_risk) adds each process's depth, inherited risk,
+    flagged ancestors and subtree alert total. Without an ml_analyzer (ML
+    training skipped) the report is written with traditional scores only.
+    """
+    if clusters is None:
+        results = _collect_analysis_results(
+            df, traditional_analyzer, ml_analyzer, process_tree, workers, verbose
+        )
+    else:
+        representatives = {pid: info for pid, info in process_tree.items() if clusters.get(pid, pid) == pid}
+        results = _expand_clusters(
+            _collect_analysis_results(df, traditional_analyzer, ml_analyzer, representatives, workers, verbose),
+            process_tree, clusters
+        )
+    write_comparison_report(results, process_tree, baseline_scores, output_dir, score_intervals, lineage)
+
+def generate_chunked_comparison_report(frames, traditional_analyzer, ml_analyzer, process_tree,
+                                       baseline_scores=None, verbose=True, output_dir='output', lineage=None):
+    """generate_comparison_report over event tables that each hold whole
+    processes (e.g. EventStore.iter_process_frames), one table in memory at a time."""
+    scored = {}
+    empty = None
+    for df in frames:
+        names = {pid: process_tree[pid]['process'] for pid in df['pid'].unique().tolist() if pid in process_tree}
+        for result in _score_processes(df, names, traditional_analyzer, ml_analyzer, verbose):
+            scored[result['pid']] = result
+        empty = df.iloc[:0]
+    # Placeholder parents have no events of their own
+    rest = {pid: info['process'] for pid, info in process_tree.items() if pid not in scored}
+    if rest and empty is not None:
+        for result in _score_processes(empty, rest, traditional_analyzer, ml_analyzer, verbose):
+            scored[result['pid']] = result
+    results = sort_results([scored[pid] for pid in process_tree if pid in scored])
+    write_comparison_report(results, process_tree, baseline_scores, output_dir, lineage=lineage)
+
+def write_comparison_report(results, process_tree, baseline_scores=None, output_dir='output',
+                            score_intervals=None, lineage=None):
+    """Write the HTML report for precomputed per-process results (rows as
+    _analyze_single_process returns them, e.g. from partial aggregates)."""
+    # Attach per-executable baseline scores where a baseline exists
+    baseline_scores = baseline_scores or {}
+    score_intervals = score_intervals or {}
+    lineage = lineage or {}
+    for result in results:
+        result['baseline_score'] = baseline_scores.get(result['pid'])
+        result['score_interval'] = score_intervals.get(result['pid'])
+        entry = lineage.get(result['pid'])
+        if entry is not None:
+            result['lineage'] = entry
     
     # Generate HTML report
-    report_path = os.path.join('output', 'analysis_comparison.html')
+    report_path = os.path.join(output_dir, 'analysis_comparison.html')
     _generate_comparison_html(results, report_path)
 
-def _collect_analysis_results(df, traditional_analyzer, ml_analyzer, process_tree):
+def _collect_analysis_results(df, traditional_analyzer, ml_analyzer, process_tree,
+                              workers=None, verbose=True):
     """Collect analysis results for all processes."""
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(process_tree) >= PARALLEL_MIN_PROCESSES:
+        results = _collect_results_parallel(
+            df, traditional_analyzer, ml_analyzer, process_tree, workers, verbose
+        )
+    else:
+        names = {pid: info['process'] for pid, info in process_tree.items()}
+        results = _score_processes(df, names, traditional_analyzer, ml_analyzer, verbose)
+    
+    return sort_results(results)
+
+def sort_results(results):
+    """Sort report rows by traditional, then ML score (highest first)."""
+    results.sort(key=lambda x: (-x['traditional_score'], -(x['ml_score'] or 0.0)))
+    return results
+
+def _expand_clusters(results, process_tree, clusters):
+    """One result per process, members copying their representative's scores."""
+    members = cluster_members({pid: clusters.get(pid, pid) for pid in process_tree})
+    return [
+        dict(result, pid=pid, process=process_tree[pid]['process'] or 'unknown',
+             cluster=result['pid'], cluster_size=len(members[result['pid']]))
+        for result in results for pid in members[result['pid']]
+    ]
+
+def _score_processes(df, names, traditional_analyzer, ml_analyzer, verbose=True):
+    """Score every PID in names ({pid: process name}) against df."""
     results = []
     frequencies, timestamps = traditional_analyzer.calculate_syscall_frequency(df)
     
-    for pid, process_info in process_tree.items():
+    for pid, process_name in names.items():
         try:
             result = _analyze_single_process(
-                pid, process_info, df, 
+                pid, {'process': process_name}, df, 
                 traditional_analyzer, ml_analyzer,
-                frequencies, timestamps
+                frequencies, timestamps, verbose
             )
             results.append(result)
         except Exception as e:
             print(f"Error processing PID {pid}: {str(e)}")
             continue
     
-    # Sort results by scores
-    results.sort(key=lambda x: (-x['traditional_score'], -x['ml_score']))
     return results
 
+def _collect_results_parallel(df, traditional_analyzer, ml_analyzer, process_tree, workers, verbose):
+    """Score PID shards in a process pool over a memory-mapped copy of the event table."""
+    pids = sorted(process_tree)
+    shards = [shard for shard in np.array_split(np.array(pids), workers * 4) if len(shard)]
+    results = []
+    
+    with tempfile.TemporaryDirectory(prefix='event_table_') as directory:
+        table = SharedEventTable.create(df, directory)
+        jobs = []
+        for shard in shards:
+            names = {int(pid): process_tree[int(pid)]['process'] for pid in shard}
+            jobs.append((table.row_range(shard), names))
+        
+        with process_pool(
+            max_workers=workers,
+            initializer=_init_shard_worker,
+            initargs=(table.handle(), traditional_analyzer, ml_analyzer, verbose)
+        ) as executor:
+            for shard_results in executor.map(_score_shard, jobs):
+                results.extend(shard_results)
+    
+    return results
+
+# Per-worker state, set once by the pool initializer
+_worker_state = {}
+
+def _init_shard_worker(handle, traditional_analyzer, ml_analyzer, verbose):
+    """Attach to the shared event table and keep the analyzers resident."""
+    _worker_state['table'] = SharedEventTable.attach(handle)
+    _worker_state['analyzers'] = (traditional_analyzer, ml_analyzer)
+    _worker_state['verbose'] = verbose
+
+def _score_shard(job):
+    """Score one PID shard using only its contiguous slice of the table."""
+    (start, end), names = job
+    shard_df = _worker_state['table'].frame(start, end)
+    traditional_analyzer, ml_analyzer = _worker_state['analyzers']
+    return _score_processes(shard_df, names, traditional_analyzer, ml_analyzer, _worker_state['verbose'])
+
 def _analyze_single_process(pid, process_info, df, traditional_analyzer, 
-                          ml_analyzer, frequencies, timestamps):
+                          ml_analyzer, frequencies, timestamps, verbose=True):
     """Analyze a single process and return its results."""
     # Get traditional analysis score
     behavior_score, category_scores = traditional_analyzer.calculate_behavior_score(
@@ -39,21 +175,22 @@ def _analyze_single_process(pid, process_info, df, traditional_analyzer,
     )
     
     # Get ML analysis score
-    ml_score = ml_analyzer.analyze_process(df, pid)
+    ml_score = ml_analyzer.analyze_process(df, pid) if ml_analyzer is not None else None
     
     # Get process data
     process_data = df[df['pid'] == pid]
     syscalls = process_data['syscall'].dropna().value_counts()
     
     # Print detailed debug info
-    _print_process_debug_info(pid, process_info, behavior_score, 
-                            syscalls, timestamps, category_scores, ml_score)
+    if verbose:
+        _print_process_debug_info(pid, process_info, behavior_score, 
+                                syscalls, timestamps, category_scores, ml_score)
     
     return {
         'pid': pid,
         'process': process_info['process'] or 'unknown',
         'traditional_score': float(behavior_score),
-        'ml_score': float(ml_score),
+        'ml_score': float(ml_score) if ml_score is not None else None,
         'category_scores': category_scores,
         'syscall_details': {
             'count': len(syscalls),
@@ -73,11 +210,15 @@ def _print_process_debug_info(pid, process_info, behavior_score, syscalls,
     print(f"  Raw syscall counts: {dict(syscalls)}")
     print(f"  Timestamps available: {len(timestamps.get(pid, []))}")
     print(f"  Categories: {category_scores}")
-    print(f"  ML score: {ml_score:.3f}")
+    print(f"  ML score: {ml_score:.3f}" if ml_score is not None else "  ML score: n/a")
+
+def validate_behavior_scores(df, analyzer, pid, frequencies=None, timestamps=None):
+    """Validate behavior score calculation for a specific PID.
 
-def validate_behavior_scores(df, analyzer, pid):
-    """Validate behavior score calculation for a specific PID."""
-    frequencies, timestamps = analyzer.calculate_syscall_frequency(df)
+    Pass precomputed frequencies/timestamps to validate several PIDs off one table.
+    """
+    if frequencies is None or timestamps is None:
+        frequencies, timestamps = analyzer.calculate_syscall_frequency(df)
     
     if pid not in frequencies or not frequencies[pid]:
         print(f"No frequency data for PID {pid}")
@@ -137,143 +278,360 @@ def _calculate_category_scores(analyzer, frequencies, pid, total_calls):
         print(f"  {category} score: {category_scores[category]:.3f}")
     return category_scores
 
-# Add this function to src/analysis/analysis_reporter.py
+# Columns of each row in the report data sidecar
+REPORT_COLUMNS = [
+    'pid', 'process', 'traditional_score', 'ml_score', 'difference', 'baseline_score',
+    'score_interval', 'category_scores', 'syscall_count', 'total_events', 'timestamp_count',
+    'syscall_types', 'frequency_keys', 'cluster', 'cluster_size', 'depth', 'inherited_risk',
+    'suspicious_path', 'subtree_alerts'
+]
 
-def _generate_comparison_html(results, output_path):
-    """Create HTML comparison report with additional debug information."""
-    html_content = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Analysis Method Comparison</title>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 20px; }
-            table { border-collapse: collapse; width: 100%; margin-top: 20px; }
-            th, td { padding: 8px; text-align: left; border: 1px solid #ddd; }
-            th { background-color: #f4f4f4; }
-            .highlight { background-color: #fff3cd; }
-            .significant-diff { background-color: #f8d7da; }
-            .chart { margin: 20px 0; height: 400px; }
-            .debug-info { font-size: 0.8em; color: #666; white-space: pre-wrap; }
-        </style>
-        <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
-    </head>
-    <body>
-        <h1>Process Analysis Comparison</h1>
-        
-        <div id="scatterPlot" class="chart"></div>
-        
-        <h2>Detailed Results</h2>
-        <table>
-            <tr>
-                <th>PID</th>
-                <th>Process</th>
-                <th>Traditional Score</th>
-                <th>ML Score</th>
-                <th>Difference</th>
-                <th>Category Scores</th>
-                <th>Debug Info</th>
-            </tr>
+def _report_row(result):
+    """Flatten one result into a compact row matching REPORT_COLUMNS."""
+    details = result['syscall_details']
+    baseline_score = result.get('baseline_score')
+    interval = result.get('score_interval')
+    lineage = result.get('lineage')
+    return [
+        int(result['pid']),
+        str(result['process']),
+        round(result['traditional_score'], 4),
+        round(result['ml_score'], 4) if result['ml_score'] is not None else None,
+        round(abs(result['traditional_score'] - result['ml_score']), 4) if result['ml_score'] is not None else None,
+        round(baseline_score, 4) if baseline_score is not None else None,
+        [round(bound, 4) for bound in interval] if interval is not None else None,
+        ', '.join(f'{k}: {v:.2f}' for k, v in result['category_scores'].items()),
+        details['count'],
+        details['total_events'],
+        details['timestamp_count'],
+        ', '.join(map(str, details['types'])),
+        ', '.join(map(str, details['frequency_keys'])),
+        result.get('cluster'),
+        result.get('cluster_size'),
+        lineage['depth'] if lineage else None,
+        round(lineage['inherited_risk'], 4) if lineage else None,
+        _format_path(lineage) if lineage else None,
+        lineage['subtree_alerts'] if lineage else None
+    ]
+
+def _format_path(lineage):
+    """Flagged ancestors joined top-down, noting any cut off above the kept ones."""
+    path = ' > '.join(lineage['path'])
+    earlier = lineage['flagged_ancestors'] - len(lineage['path'])
+    return f"({earlier} earlier) > {path}" if earlier > 0 else path
+
+def _write_report_data(results, data_path):
+    """Stream results to a JS-wrapped JSON sidecar, one row per line.
+
+    The rows are wrapped in a loadReportData(...) call so the report can load
+    them with a plain <script> tag when opened from disk (file:// blocks fetch).
     """
+    with open(data_path, 'w', encoding='utf-8') as f:
+        f.write('loadReportData(%s, [\n' % json.dumps(REPORT_COLUMNS))
+        for result in results:
+            f.write(json.dumps(_report_row(result), ensure_ascii=False, separators=(',', ':')))
+            f.write(',\n')
+        f.write(']);\n')
+
+def _chart_payload(results):
+    """Pre-bin chart data with NumPy so the page never receives raw score lists for charts."""
+    traditional = np.array([r['traditional_score'] for r in results], dtype=float)
+    # Processes without an ML score (ML training skipped) only enter the traditional histogram
+    scored = [r for r in results if r['ml_score'] is not None]
+    ml = np.array([r['ml_score'] for r in scored], dtype=float)
     
-    scatter_data = {
-        'traditional': [],
-        'ml': [],
-        'pids': [],
-        'processes': []
+    upper = max(1.0, float(traditional.max()) if len(traditional) else 0.0,
+                float(ml.max()) if len(ml) else 0.0)
+    edges = np.linspace(0.0, upper, HISTOGRAM_BINS + 1)
+    payload = {
+        'histogram': {
+            'centers': ((edges[:-1] + edges[1:]) / 2).round(4).tolist(),
+            'width': float(edges[1] - edges[0]),
+            'traditional': np.histogram(traditional, bins=edges)[0].tolist(),
+            'ml': np.histogram(ml, bins=edges)[0].tolist()
+        },
+        'density': None
     }
     
-    for result in results:
-        difference = abs(result['traditional_score'] - result['ml_score'])
-        row_class = 'significant-diff' if difference > 0.3 else 'highlight' if difference > 0.1 else ''
+    if len(scored) > SCATTER_POINT_LIMIT:
+        paired = np.array([r['traditional_score'] for r in scored], dtype=float)
+        counts, x_edges, y_edges = np.histogram2d(
+            paired, ml, bins=DENSITY_BINS,
+            range=[[0.0, max(float(paired.max()), 1.0)], [0.0, max(float(ml.max()), 1.0)]]
+        )
+        payload['density'] = {
+            'x': ((x_edges[:-1] + x_edges[1:]) / 2).round(4).tolist(),
+            'y': ((y_edges[:-1] + y_edges[1:]) / 2).round(4).tolist(),
+            # Plotly heatmaps index z as [y][x]
+            'z': counts.T.astype(int).tolist()
+        }
+    return payload
+
+def _vendor_plotly(output_dir):
+    """Copy the plotly.js bundle shipped with the pinned plotly package next to the report."""
+    try:
+        import plotly
+        from plotly.offline import get_plotlyjs
+    except ImportError:
+        print(f"plotly not installed; report will load {PLOTLY_CDN_FALLBACK}")
+        return PLOTLY_CDN_FALLBACK
+    
+    bundle_name = f"plotly-{plotly.__version__}.min.js"
+    bundle_path = os.path.join(output_dir, bundle_name)
+    if not os.path.exists(bundle_path):
+        with open(bundle_path, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+    return bundle_name
+
+def _generate_comparison_html(results, output_path):
+    """Write the comparison report: a static HTML shell plus a streamed data sidecar."""
+    output_dir = os.path.dirname(output_path)
+    os.makedirs(output_dir, exist_ok=True)
+    data_path = os.path.splitext(output_path)[0] + '_data.js'
+    _write_report_data(results, data_path)
+    
+    html_content = (COMPARISON_HTML_TEMPLATE
+                    .replace('{{PLOTLY_SRC}}', _vendor_plotly(output_dir))
+                    .replace('{{CHART_DATA}}', json.dumps(_chart_payload(results)))
+                    .replace('{{DATA_FILE}}', os.path.basename(data_path)))
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+
+COMPARISON_HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Analysis Method Comparison</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 20px; }
+        .chart { margin: 20px 0; height: 400px; }
+        .toolbar { display: flex; gap: 10px; align-items: center; margin: 10px 0; }
+        .toolbar input { padding: 6px; width: 300px; }
+        .grid { border: 1px solid #ddd; font-size: 14px; }
+        .grid-row { display: grid; grid-template-columns: 80px 2fr 170px 90px 100px 110px 110px 4fr; height: 28px; line-height: 28px; }
+        .grid-row > div { padding: 0 8px; border-right: 1px solid #ddd; overflow: hidden; white-space: nowrap; text-overflow: ellipsis; }
+        .grid-header { background-color: #f4f4f4; font-weight: bold; cursor: pointer; user-select: none; }
+        .grid-body { height: 600px; overflow-y: auto; position: relative; }
+        .grid-body .grid-row { position: absolute; left: 0; right: 0; border-bottom: 1px solid #eee; cursor: pointer; }
+        .highlight { background-color: #fff3cd; }
+        .significant-diff { background-color: #f8d7da; }
+        .debug-info { font-size: 0.8em; color: #666; white-space: pre-wrap; border: 1px solid #ddd; padding: 10px; min-height: 40px; }
+    </style>
+    <script src="{{PLOTLY_SRC}}"></script>
+</head>
+<body>
+    <h1>Process Analysis Comparison</h1>
+    
+    <div id="scatterPlot" class="chart"></div>
+    
+    <h2>Detailed Results</h2>
+    <div class="toolbar">
+        <input id="filter" type="text" placeholder="Filter by PID, process or category...">
+        <button id="prevPage">&laquo; Prev</button>
+        <span id="pageInfo"></span>
+        <button id="nextPage">Next &raquo;</button>
+        <select id="pageSize">
+            <option value="1000">1,000 rows/page</option>
+            <option value="10000" selected>10,000 rows/page</option>
+            <option value="100000">100,000 rows/page</option>
+        </select>
+    </div>
+    <div class="grid">
+        <div class="grid-row grid-header" id="gridHeader">
+            <div data-col="pid">PID</div>
+            <div data-col="process">Process</div>
+            <div data-col="traditional_score">Traditional Score</div>
+            <div data-col="ml_score">ML Score</div>
+            <div data-col="difference">Difference</div>
+            <div data-col="baseline_score">Baseline Score</div>
+            <div data-col="inherited_risk">Inherited Risk</div>
+            <div data-col="category_scores">Category Scores</div>
+        </div>
+        <div class="grid-body" id="gridBody"><div id="gridSpacer"></div></div>
+    </div>
+    <h3>Debug Info</h3>
+    <div class="debug-info" id="debugInfo">Click a row to show its debug information.</div>
+    
+    <h2>Score Distribution</h2>
+    <div id="histograms" class="chart"></div>
+    
+    <script>
+        const ROW_HEIGHT = 28;
+        let COLUMNS = [], ROWS = [], COL = {};
+        let view = [], page = 0, sortCol = null, sortDir = 1;
+        
+        function loadReportData(columns, rows) {
+            COLUMNS = columns;
+            ROWS = rows;
+            columns.forEach((name, i) => COL[name] = i);
+        }
+    </script>
+    <script src="{{DATA_FILE}}"></script>
+    <script>
+        const body = document.getElementById('gridBody');
+        const spacer = document.getElementById('gridSpacer');
+        const pageSizeSelect = document.getElementById('pageSize');
         
-        scatter_data['traditional'].append(result['traditional_score'])
-        scatter_data['ml'].append(result['ml_score'])
-        scatter_data['pids'].append(str(result['pid']))
-        scatter_data['processes'].append(str(result['process']))
+        function fmt(value) {
+            return value === null ? 'n/a' : value.toFixed(3);
+        }
         
-        # Add debug information
-        debug_info = f"""
-            Syscall count: {result['syscall_details']['count']}
-            Event count: {result['syscall_details']['total_events']}
-            Timestamp count: {result['syscall_details']['timestamp_count']}
-            Syscall types: {', '.join(result['syscall_details']['types'])}
-            Frequency keys: {', '.join(result['syscall_details']['frequency_keys'])}
-        """
+        function fmtScore(row) {
+            const interval = row[COL.score_interval];
+            const score = fmt(row[COL.traditional_score]);
+            return interval ? score + ' [' + fmt(interval[0]) + ', ' + fmt(interval[1]) + ']' : score;
+        }
         
-        html_content += f"""
-            <tr class="{row_class}">
-                <td>{result['pid']}</td>
-                <td>{result['process']}</td>
-                <td>{result['traditional_score']:.3f}</td>
-                <td>{result['ml_score']:.3f}</td>
-                <td>{difference:.3f}</td>
-                <td>{', '.join(f'{k}: {v:.2f}' for k, v in result['category_scores'].items())}</td>
-                <td class="debug-info">{debug_info}</td>
-            </tr>
-        """
-    
-    # Add visualization
-    html_content += """
-        </table>
+        function rowClass(row) {
+            const diff = row[COL.difference];
+            return diff > 0.3 ? 'significant-diff' : diff > 0.1 ? 'highlight' : '';
+        }
         
-        <h2>Score Distribution</h2>
-        <div id="histograms" class="chart"></div>
+        function pageRows() {
+            const size = parseInt(pageSizeSelect.value);
+            return view.slice(page * size, (page + 1) * size);
+        }
+        
+        // Only the rows inside the scroll viewport are in the DOM
+        function renderVisible() {
+            const rows = pageRows();
+            spacer.style.height = (rows.length * ROW_HEIGHT) + 'px';
+            const first = Math.max(0, Math.floor(body.scrollTop / ROW_HEIGHT) - 10);
+            const last = Math.min(rows.length, first + Math.ceil(body.clientHeight / ROW_HEIGHT) + 20);
+            const html = [];
+            for (let i = first; i < last; i++) {
+                const row = rows[i];
+                html.push('<div class="grid-row ' + rowClass(row) + '" data-index="' + i + '" style="top:' + (i * ROW_HEIGHT) + 'px">' +
+                    '<div>' + row[COL.pid] + '</div>' +
+                    '<div>' + escapeHtml(row[COL.process]) + '</div>' +
+                    '<div>' + fmtScore(row) + '</div>' +
+                    '<div>' + fmt(row[COL.ml_score]) + '</div>' +
+                    '<div>' + fmt(row[COL.difference]) + '</div>' +
+                    '<div>' + fmt(row[COL.baseline_score]) + '</div>' +
+                    '<div>' + fmt(row[COL.inherited_risk]) + '</div>' +
+                    '<div>' + escapeHtml(row[COL.category_scores]) + '</div></div>');
+            }
+            body.innerHTML = '';
+            body.appendChild(spacer);
+            body.insertAdjacentHTML('beforeend', html.join(''));
+        }
         
-        <script>
-            // Scatter plot
-            var scatter = {
-                x: %s,
-                y: %s,
+        function updatePageInfo() {
+            const size = parseInt(pageSizeSelect.value);
+            const pages = Math.max(1, Math.ceil(view.length / size));
+            page = Math.min(page, pages - 1);
+            document.getElementById('pageInfo').textContent =
+                'Page ' + (page + 1) + ' of ' + pages + ' (' + view.length + ' of ' + ROWS.length + ' processes)';
+        }
+        
+        function refresh() {
+            updatePageInfo();
+            body.scrollTop = 0;
+            renderVisible();
+        }
+        
+        function applyFilter() {
+            const needle = document.getElementById('filter').value.trim().toLowerCase();
+            view = !needle ? ROWS.slice() : ROWS.filter(row =>
+                String(row[COL.pid]).includes(needle) ||
+                row[COL.process].toLowerCase().includes(needle) ||
+                row[COL.category_scores].toLowerCase().includes(needle));
+            applySort();
+        }
+        
+        function applySort() {
+            if (sortCol !== null) {
+                const idx = COL[sortCol];
+                view.sort((a, b) => {
+                    const x = a[idx], y = b[idx];
+                    if (x === y) return 0;
+                    if (x === null) return 1;
+                    if (y === null) return -1;
+                    return (x < y ? -1 : 1) * sortDir;
+                });
+            }
+            page = 0;
+            refresh();
+        }
+        
+        function escapeHtml(text) {
+            return String(text).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+        }
+        
+        body.addEventListener('scroll', () => window.requestAnimationFrame(renderVisible));
+        body.addEventListener('click', e => {
+            const target = e.target.closest('.grid-row');
+            if (!target) return;
+            const row = pageRows()[parseInt(target.dataset.index)];
+            document.getElementById('debugInfo').textContent =
+                'PID ' + row[COL.pid] + ' (' + row[COL.process] + ')\\n' +
+                'Syscall count: ' + row[COL.syscall_count] + '\\n' +
+                'Event count: ' + row[COL.total_events] + '\\n' +
+                'Timestamp count: ' + row[COL.timestamp_count] + '\\n' +
+                'Syscall types: ' + row[COL.syscall_types] + '\\n' +
+                'Frequency keys: ' + row[COL.frequency_keys] +
+                (row[COL.cluster] === null ? '' : '\\nCluster: PID ' + row[COL.cluster] +
+                    ' (' + row[COL.cluster_size] + ' similar processes, scored once)') +
+                (row[COL.depth] === null ? '' : '\\nDepth: ' + row[COL.depth] +
+                    '\\nSubtree alerts: ' + row[COL.subtree_alerts] +
+                    '\\nFlagged ancestors: ' + (row[COL.suspicious_path] || 'none'));
+        });
+        document.getElementById('gridHeader').addEventListener('click', e => {
+            const col = e.target.dataset.col;
+            if (!col) return;
+            sortDir = (sortCol === col) ? -sortDir : (col === 'pid' || col === 'process' ? 1 : -1);
+            sortCol = col;
+            applySort();
+        });
+        document.getElementById('filter').addEventListener('input', applyFilter);
+        document.getElementById('prevPage').addEventListener('click', () => { page = Math.max(0, page - 1); refresh(); });
+        document.getElementById('nextPage').addEventListener('click', () => { page += 1; refresh(); });
+        pageSizeSelect.addEventListener('change', () => { page = 0; refresh(); });
+        
+        view = ROWS.slice();
+        refresh();
+        
+        // Charts (histograms and density are pre-binned in Python)
+        const CHARTS = {{CHART_DATA}};
+        const scatterLayout = {
+            title: {text: 'Traditional vs ML Scores'},
+            xaxis: {title: {text: 'Traditional Score'}},
+            yaxis: {title: {text: 'ML Score'}},
+            showlegend: false
+        };
+        
+        if (CHARTS.density) {
+            scatterLayout.title.text += ' (density, ' + ROWS.length + ' processes)';
+            Plotly.newPlot('scatterPlot', [{
+                x: CHARTS.density.x,
+                y: CHARTS.density.y,
+                z: CHARTS.density.z,
+                type: 'heatmap',
+                colorscale: 'Viridis',
+                hovertemplate: 'Traditional: %{x:.3f}<br>ML: %{y:.3f}<br>Processes: %{z}'
+            }], scatterLayout);
+        } else {
+            Plotly.newPlot('scatterPlot', [{
+                x: ROWS.map(row => row[COL.traditional_score]),
+                y: ROWS.map(row => row[COL.ml_score]),
                 mode: 'markers',
-                type: 'scatter',
-                text: %s,
-                hovertemplate: 'Process: %%{text}<br>Traditional: %%{x:.3f}<br>ML: %%{y:.3f}',
-            };
-            
-            var scatterLayout = {
-                title: 'Traditional vs ML Scores',
-                xaxis: {title: 'Traditional Score'},
-                yaxis: {title: 'ML Score'},
-                showlegend: false
-            };
-            
-            Plotly.newPlot('scatterPlot', [scatter], scatterLayout);
-            
-            // Histograms
-            var traditional_hist = {
-                x: %s,
-                type: 'histogram',
-                name: 'Traditional Scores',
-                opacity: 0.7
-            };
-            
-            var ml_hist = {
-                x: %s,
-                type: 'histogram',
-                name: 'ML Scores',
-                opacity: 0.7
-            };
-            
-            var histLayout = {
-                title: 'Score Distributions',
-                barmode: 'overlay',
-                xaxis: {title: 'Score'},
-                yaxis: {title: 'Count'}
-            };
-            
-            Plotly.newPlot('histograms', [traditional_hist, ml_hist], histLayout);
-        </script>
-    </body>
-    </html>
-    """ % (
-        str(scatter_data['traditional']),
-        str(scatter_data['ml']),
-        str(scatter_data['processes']),
-        str(scatter_data['traditional']),
-        str(scatter_data['ml'])
-    )
-    
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
\ No newline at end of file
+                type: 'scattergl',
+                text: ROWS.map(row => row[COL.process]),
+                hovertemplate: 'Process: %{text}<br>Traditional: %{x:.3f}<br>ML: %{y:.3f}'
+            }], scatterLayout);
+        }
+        
+        const hist = CHARTS.histogram;
+        Plotly.newPlot('histograms', [
+            {x: hist.centers, y: hist.traditional, width: hist.width, type: 'bar', name: 'Traditional Scores', opacity: 0.7},
+            {x: hist.centers, y: hist.ml, width: hist.width, type: 'bar', name: 'ML Scores', opacity: 0.7}
+        ], {
+            title: {text: 'Score Distributions'},
+            barmode: 'overlay',
+            xaxis: {title: {text: 'Score'}},
+            yaxis: {title: {text: 'Count'}}
+        });
+    </script>
+</body>
+</html>
+"""
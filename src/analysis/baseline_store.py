@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+def compute_process_profiles(df, syscall_categories):
+    """Compute per-PID behavior profiles (category ratios and rates) in one grouped pass.
+
+    Returns a dict mapping pid -> {'key': (executable, user), 'features': np.ndarray}.
+    Sampled captures are scaled up by their 'weight' column.
+    """
+    if df.empty:
+        return {}
+
+    grouped = df.groupby('pid', sort=False)
+    summary = grouped.agg(
+        process=('process', 'first'),
+        user=('user', 'first'),
+        total=('pid', 'size'),
+        first=('timestamp', 'min'),
+        last=('timestamp', 'max')
+    )
+    weights = df['weight'] if 'weight' in df else None
+    if weights is not None:
+        summary['total'] = weights.groupby(df['pid'], sort=False).sum().reindex(summary.index)
+
+    columns = []
+    for syscalls in syscall_categories.values():
+        in_category = df['syscall'].isin(syscalls) if weights is None else df['syscall'].isin(syscalls) * weights
+        counts = in_category.groupby(df['pid'], sort=False).sum()
+        columns.append(counts.reindex(summary.index).to_numpy())
+    counts = np.column_stack(columns) if columns else np.zeros((len(summary), 0))
+    return profiles_from_counts(summary, counts)
+
+# Fingerprints of the most recent captures folded in, to skip repeats
+MAX_CAPTURE_FINGERPRINTS = 1000
+
+def capture_fingerprint(profiles):
+    """Digest of a capture's process profiles; the same capture always gives the same digest."""
+    digest = hashlib.sha256()
+    for pid in sorted(profiles):
+        digest.update(json.dumps([int(pid), list(profiles[pid]['key'])]).encode('utf-8'))
+        digest.update(np.asarray(profiles[pid]['features'], dtype=float).tobytes())
+    return digest.hexdigest()
+
+def profiles_from_counts(summary, counts):
+    """Profiles from per-PID aggregates: summary has process, user, total, first
+    and last columns indexed by pid; counts is a (pid x category) array."""
+    duration = (summary['last'] - summary['first']).dt.total_seconds().fillna(0)
+    elapsed = np.maximum(duration.to_numpy(), 1)
+    totals = summary['total'].to_numpy()
+
+    ratios = counts / np.maximum(totals, 1)[:, None]
+    rates = counts / elapsed[:, None]
+    calls_per_second = totals / elapsed
+    features = np.column_stack([ratios, rates, calls_per_second]).astype(float)
+
+    profiles = {}
+    for row, pid in enumerate(summary.index):
+        process, user = summary['process'].iloc[row], summary['user'].iloc[row]
+        key = (
+            'unknown' if pd.isna(process) else str(process),
+            'unknown' if pd.isna(user) else str(user)
+        )
+        profiles[int(pid)] = {'key': key, 'features': features[row]}
+    return profiles
+
+class BaselineStore:
+    """Persisted per-executable/user behavioral baselines with streaming updates.
+
+    Each baseline keeps a count, running mean and sum of squared deviations (M2)
+    per feature, merged with Chan/Welford updates so captures can be folded in
+    incrementally without revisiting old data. The fingerprints of folded-in
+    captures are kept so re-running a capture doesn't count it twice.
+    """
+
+    def __init__(self, path=None, min_samples=3):
+        self.path = path
+        self.min_samples = min_samples
+        self.baselines = {}
+        self.captures = []
+
+    @staticmethod
+    def _key(key):
+        return json.dumps(list(key), ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, min_samples=3):
+        """Load a store from disk, or return an empty one if it doesn't exist."""
+        store = cls(path, min_samples)
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            store.captures = list(data.get('captures', []))
+            for key, entry in data.get('baselines', {}).items():
+                if not key.startswith('['):
+                    # Stores written before keys were JSON-encoded joined them with '|'
+                    key = cls._key(key.split('|', 1))
+                store.baselines[key] = {
+                    'count': entry['count'],
+                    'mean': np.asarray(entry['mean'], dtype=float),
+                    'm2': np.asarray(entry['m2'], dtype=float)
+                }
+        return store
+
+    def save(self, path=None):
+        """Write the store to disk as JSON."""
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {'baselines': {
+            key: {'count': entry['count'], 'mean': entry['mean'].tolist(), 'm2': entry['m2'].tolist()}
+            for key, entry in self.baselines.items()
+        }, 'captures': self.captures[-MAX_CAPTURE_FINGERPRINTS:]}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def merge(self, key, count, mean, m2):
+        """Merge batch statistics into the baseline for key (Chan et al. parallel update)."""
+        name = self._key(key)
+        if name not in self.baselines or self.baselines[name]['mean'].shape != mean.shape:
+            self.baselines[name] = {'count': count, 'mean': mean.copy(), 'm2': m2.copy()}
+            return
+
+        entry = self.baselines[name]
+        total = entry['count'] + count
+        delta = mean - entry['mean']
+        entry['mean'] = entry['mean'] + delta * count / total
+        entry['m2'] = entry['m2'] + m2 + delta ** 2 * entry['count'] * count / total
+        entry['count'] = total
+
+    def update(self, profiles):
+        """Fold one capture's process profiles into the stored baselines.
+
+        Returns False (and changes nothing) if this capture was already folded in.
+        """
+        fingerprint = capture_fingerprint(profiles)
+        if fingerprint in self.captures:
+            return False
+        self.captures.append(fingerprint)
+        batches = {}
+        for profile in profiles.values():
+            batches.setdefault(profile['key'], []).append(profile['features'])
+
+        for key, rows in batches.items():
+            rows = np.vstack(rows)
+            mean = rows.mean(axis=0)
+            m2 = ((rows - mean) ** 2).sum(axis=0)
+            self.merge(key, len(rows), mean, m2)
+        return True
+
+    def score(self, key, features):
+        """Score a feature vector against its own baseline in O(1).
+
+        Returns a 0-1 anomaly score, or None if the baseline is too small to judge.
+        """
+        entry = self.baselines.get(self._key(key))
+        if entry is None or entry['count'] < self.min_samples:
+            return None
+
+        std = np.sqrt(entry['m2'] / max(entry['count'] - 1, 1))
+        z_scores = np.abs(features - entry['mean']) / (std + 1e-3)
+        return float(np.mean(np.minimum(z_scores / 3.0, 1.0)))
+
+    def score_profiles(self, profiles):
+        """Score every profile; PIDs without a usable baseline are omitted."""
+        scores = {}
+        for pid, profile in profiles.items():
+            score = self.score(profile['key'], profile['features'])
+            if score is not None:
+                scores[pid] = score
+        return scores
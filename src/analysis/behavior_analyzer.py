@@ -3,8 +3,16 @@ import numpy as np
 from datetime import datetime, timedelta
 import pandas as pd
 
+# Expected category mixes; a process is scored by its distance to the closest one
+EXPECTED_PROFILES = {
+    'file_server': {'file': 0.8, 'network': 0.1, 'process': 0.05, 'privilege': 0.01},
+    'web_server': {'file': 0.1, 'network': 0.8, 'process': 0.05, 'privilege': 0.01},
+    'user_process': {'file': 0.4, 'network': 0.2, 'process': 0.3, 'privilege': 0.01}
+}
+
 class BehaviorAnalyzer:
-    def __init__(self):
+    def __init__(self, verbose=True):
+        self.verbose = verbose
         self.syscall_categories = {
             'file': ['open', 'write', 'read', 'unlink', 'mkdir', 'rmdir'],
             'network': ['connect', 'bind', 'accept', 'socket', 'sendto', 'recvfrom'],
@@ -14,7 +22,11 @@ class BehaviorAnalyzer:
         }
     
     def calculate_syscall_frequency(self, df):
-        """Calculate syscall frequency per process over time."""
+        """Calculate syscall frequency per process over time.
+
+        Rows of a sampled capture count for their 'weight', so the
+        frequencies estimate the full capture's counts.
+        """
         frequencies = defaultdict(lambda: defaultdict(int))
         timestamps = defaultdict(list)
         
@@ -31,11 +43,11 @@ class BehaviorAnalyzer:
                     continue
             
             if syscall and timestamp is not None:
-                frequencies[pid][syscall] += 1
+                frequencies[pid][syscall] += row.get('weight', 1)
                 timestamps[pid].append(timestamp)
         
         # Debug print to check what we're capturing
-        for pid in frequencies:
+        for pid in frequencies if self.verbose else ():
             print(f"\nPID {pid} frequency data:")
             print(f"  Syscalls: {dict(frequencies[pid])}")
             print(f"  Timestamp count: {len(timestamps[pid])}")
@@ -53,13 +65,13 @@ class BehaviorAnalyzer:
         if not timestamps[pid]:
             return 0, {}
         
-        # Calculate time-based metrics
+        # Calculate time-based metrics (weighted call count, for sampled captures)
+        total_calls = sum(frequencies[pid].values())
         time_range = max(timestamps[pid]) - min(timestamps[pid])
-        calls_per_second = len(timestamps[pid]) / max(time_range.total_seconds(), 1)
+        calls_per_second = total_calls / max(time_range.total_seconds(), 1)
             
         # Calculate category scores
         category_scores = defaultdict(float)
-        total_calls = sum(frequencies[pid].values())
         
         for category, syscalls in self.syscall_categories.items():
             category_count = sum(frequencies[pid].get(syscall, 0) for syscall in syscalls)
@@ -69,16 +81,9 @@ class BehaviorAnalyzer:
         syscall_diversity = len(frequencies[pid]) / max(total_calls, 1)
         frequency_score = min(calls_per_second / 10, 1)  # Normalize to 0-1
         
-        # Define expected profiles
-        expected_profiles = {
-            'file_server': {'file': 0.8, 'network': 0.1, 'process': 0.05, 'privilege': 0.01},
-            'web_server': {'file': 0.1, 'network': 0.8, 'process': 0.05, 'privilege': 0.01},
-            'user_process': {'file': 0.4, 'network': 0.2, 'process': 0.3, 'privilege': 0.01}
-        }
-        
         # Calculate deviation from expected profiles
         deviations = []
-        for profile in expected_profiles.values():
+        for profile in EXPECTED_PROFILES.values():
             deviation = sum(
                 abs(category_scores[cat] - profile.get(cat, 0)) 
                 for cat in self.syscall_categories
@@ -92,14 +97,15 @@ class BehaviorAnalyzer:
         privilege_anomaly = category_scores['privilege'] > 0.05  # Flag unusual privilege activity
         
         # Debug print
-        print(f"\nPID {pid} score calculation:")
-        print(f"  Time range: {time_range}")
-        print(f"  Calls per second: {calls_per_second}")
-        print(f"  Syscall diversity: {syscall_diversity}")
-        print(f"  Frequency score: {frequency_score}")
-        print(f"  Category scores: {dict(category_scores)}")
-        print(f"  Profile deviation: {profile_deviation}")
-        print(f"  Privilege anomaly: {privilege_anomaly}")
+        if self.verbose:
+            print(f"\nPID {pid} score calculation:")
+            print(f"  Time range: {time_range}")
+            print(f"  Calls per second: {calls_per_second}")
+            print(f"  Syscall diversity: {syscall_diversity}")
+            print(f"  Frequency score: {frequency_score}")
+            print(f"  Category scores: {dict(category_scores)}")
+            print(f"  Profile deviation: {profile_deviation}")
+            print(f"  Privilege anomaly: {privilege_anomaly}")
 
         # Combine scores
         behavior_score = (
@@ -109,10 +115,121 @@ class BehaviorAnalyzer:
             (1.0 if privilege_anomaly else 0.0) * 0.1
         )
         
-        print(f"  Final behavior score: {behavior_score}")
+        if self.verbose:
+            print(f"  Final behavior score: {behavior_score}")
         
         return behavior_score, category_scores
 
+    def calculate_behavior_scores(self, df):
+        """Batch counterpart of calculate_behavior_score for every PID in df.
+
+        Same formula, computed with one grouped pass per category instead of a
+        Python loop over rows. Returns {pid: (behavior_score, category_scores)}.
+        """
+        # calculate_syscall_frequency keeps rows with a truthy syscall and a timestamp
+        truthy = np.fromiter((bool(v) for v in df['syscall'].to_numpy(dtype=object)), dtype=bool, count=len(df))
+        events = df[truthy & df['timestamp'].notna().to_numpy()]
+        if events.empty:
+            return {}
+        
+        grouped = events.groupby('pid', sort=False)
+        weights = events['weight'] if 'weight' in events else None
+        total_calls = grouped.size() if weights is None else grouped['weight'].sum()
+        spans = grouped['timestamp'].agg(['min', 'max'])
+        time_range = (spans['max'] - spans['min']).dt.total_seconds()
+        distinct_syscalls = grouped['syscall'].nunique(dropna=False)
+        category_counts = pd.DataFrame({
+            category: (events['syscall'].isin(category_syscalls) if weights is None else
+                       events['syscall'].isin(category_syscalls) * weights).groupby(events['pid'], sort=False).sum()
+            for category, category_syscalls in self.syscall_categories.items()
+        }).reindex(total_calls.index)
+        return self.scores_from_counts(total_calls, time_range, distinct_syscalls, category_counts)
+
+    def scores_from_counts(self, total_calls, time_range, distinct_syscalls, category_counts):
+        """The behavior score formula over per-PID aggregates.
+
+        total_calls, time_range (seconds) and distinct_syscalls are Series and
+        category_counts a DataFrame (one column per category), all indexed by
+        pid. Returns {pid: (behavior_score, category_scores)}.
+        """
+        calls_per_second = total_calls / time_range.clip(lower=1)
+        syscall_diversity = distinct_syscalls / total_calls
+        frequency_score = (calls_per_second / 10).clip(upper=1)
+        category_scores = category_counts.div(total_calls, axis=0)
+        
+        deviations = pd.concat([
+            sum((category_scores[category] - profile.get(category, 0)).abs()
+                for category in self.syscall_categories)
+            for profile in EXPECTED_PROFILES.values()
+        ], axis=1).min(axis=1)
+        
+        privilege = category_scores.get('privilege', pd.Series(0.0, index=category_scores.index))
+        privilege_anomaly = (privilege > 0.05).astype(float)
+        
+        behavior_scores = (
+            syscall_diversity * 0.3 +
+            frequency_score * 0.3 +
+            deviations * 0.3 +
+            privilege_anomaly * 0.1
+        )
+        
+        results = {}
+        for pid, row in zip(category_scores.index, category_scores.itertuples(index=False)):
+            scores = defaultdict(float, zip(category_scores.columns, map(float, row)))
+            scores.setdefault('privilege', 0.0)  # the per-PID path always reads this key
+            results[pid] = (float(behavior_scores[pid]), scores)
+        return results
+
+    def behavior_score_intervals(self, df, confidence=0.95, resamples=200, seed=0):
+        """Bootstrap confidence intervals on the behavior scores of a sampled capture.
+
+        Each PID's kept events are resampled (multinomially over its distinct
+        (syscall, weight) cells) and rescored with the observed time range.
+        Returns {pid: (low, high)}.
+        """
+        truthy = np.fromiter((bool(v) for v in df['syscall'].to_numpy(dtype=object)), dtype=bool, count=len(df))
+        events = df[truthy & df['timestamp'].notna().to_numpy()]
+        if events.empty:
+            return {}
+        
+        weights = events['weight'] if 'weight' in events else pd.Series(1.0, index=events.index)
+        cells = pd.DataFrame({'pid': events['pid'], 'syscall': events['syscall'], 'weight': weights})
+        cells = cells.groupby(['pid', 'syscall', 'weight'], sort=False).size()
+        spans = events.groupby('pid', sort=False)['timestamp'].agg(['min', 'max'])
+        elapsed = (spans['max'] - spans['min']).dt.total_seconds().clip(lower=1)
+        
+        categories = list(self.syscall_categories)
+        profiles = np.array([[profile.get(category, 0) for category in categories]
+                             for profile in EXPECTED_PROFILES.values()])
+        privilege = categories.index('privilege') if 'privilege' in categories else None
+        tail = (1 - confidence) / 2 * 100
+        rng = np.random.default_rng(seed)
+        
+        intervals = {}
+        for pid, group in cells.groupby(level='pid', sort=False):
+            counts = group.to_numpy()
+            syscalls = group.index.get_level_values('syscall')
+            cell_weights = group.index.get_level_values('weight').to_numpy(dtype=float)
+            codes, distinct = pd.factorize(syscalls)
+            members = np.array([[syscall in self.syscall_categories[category] for category in categories]
+                                for syscall in syscalls], dtype=float).reshape(len(syscalls), len(categories))
+            
+            draws = rng.multinomial(counts.sum(), counts / counts.sum(), size=resamples)
+            weighted = draws * cell_weights
+            totals = weighted.sum(axis=1)
+            present = np.zeros((resamples, len(distinct)))
+            np.add.at(present.T, codes, draws.T)
+            diversity = (present > 0).sum(axis=1) / totals
+            frequency = np.minimum(totals / elapsed[pid] / 10, 1)
+            ratios = (weighted @ members) / totals[:, None]
+            deviation = np.abs(ratios[:, None, :] - profiles[None, :, :]).sum(axis=2).min(axis=1)
+            anomaly = (ratios[:, privilege] > 0.05) if privilege is not None else np.zeros(resamples)
+            
+            scores = diversity * 0.3 + frequency * 0.3 + deviation * 0.3 + anomaly * 0.1
+            low, high = np.percentile(scores, [tail, 100 - tail])
+            intervals[pid] = (float(low), float(high))
+        return intervals
+
     def get_process_color(self, behavior_score, category_scores):
         """Generate RGB color based on behavior score and categories."""
         if not category_scores:
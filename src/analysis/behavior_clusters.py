@@ -0,0 +1,95 @@
+import hashlib
+import numpy as np
+
+# Mersenne prime for the universal hash family (a * x + b) mod p
+MINHASH_PRIME = 2 ** 31 - 1
+
+class BehaviorClusterer:
+    """Cluster near-identical processes by a behavior fingerprint.
+
+    The fingerprint is a MinHash signature of the process's syscall set;
+    locality-sensitive hashing over signature bands proposes candidates, which
+    are only compared within the same executable, parent executable, root flag
+    and failure flag (the inputs of the name, root and failure alerts). A
+    process joins the first cluster whose representative's estimated Jaccard
+    similarity is at least threshold, otherwise it starts a new cluster.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.8, seed=0):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MINHASH_PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, MINHASH_PRIME, size=num_perm, dtype=np.int64)
+
+    def _token_hashes(self, tokens):
+        """Stable 31-bit hash per token, independent of PYTHONHASHSEED."""
+        return np.array([
+            int.from_bytes(hashlib.md5(str(token).encode('utf-8')).digest()[:4], 'little') % MINHASH_PRIME
+            for token in tokens
+        ], dtype=np.int64)
+
+    def signatures(self, df):
+        """MinHash signature of each PID's syscall set: ({pid: row}, signature matrix)."""
+        events = df[['pid', 'syscall']].dropna()
+        events = events[events['syscall'].astype(bool)].drop_duplicates()
+        if events.empty:
+            return {}, np.zeros((0, self.num_perm), dtype=np.int64)
+        events = events.sort_values('pid', kind='stable')
+        codes, vocabulary = events['syscall'].factorize()
+        hashed = (np.outer(self._token_hashes(vocabulary), self._a) + self._b) % MINHASH_PRIME
+        pids = events['pid'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, pids[1:] != pids[:-1]])
+        matrix = np.minimum.reduceat(hashed[codes], starts, axis=0)
+        return {int(pid): row for row, pid in enumerate(pids[starts])}, matrix
+
+    def _partition_keys(self, process_tree, df):
+        """Exact part of the fingerprint: (executable, parent executable, runs as root, has failures)."""
+        root_pids = set(df.loc[df['uid'].astype(str) == '0', 'pid']) if 'uid' in df else set()
+        failed_pids = set(df.loc[df['result'] == 'fail', 'pid']) if 'result' in df else set()
+        keys = {}
+        for pid, info in process_tree.items():
+            parent = process_tree.get(info['ppid'])
+            keys[pid] = (info['process'], parent['process'] if parent else None,
+                         pid in root_pids, pid in failed_pids)
+        return keys
+
+    def cluster(self, process_tree, df):
+        """Map every PID in process_tree to its cluster representative.
+
+        Representatives are the first member in tree order and map to
+        themselves; PID 1 and processes without syscalls are never grouped.
+        """
+        rows, matrix = self.signatures(df)
+        keys = self._partition_keys(process_tree, df)
+        width = self.num_perm // self.bands
+        buckets = {}
+        clusters = {}
+        for pid in process_tree:
+            row = rows.get(pid)
+            if row is None or pid == 1:
+                clusters[pid] = pid
+                continue
+            signature = matrix[row]
+            bands = [(keys[pid], band, signature[band * width:(band + 1) * width].tobytes())
+                     for band in range(self.bands)]
+            representative = pid
+            for candidate in dict.fromkeys(buckets[band] for band in bands if band in buckets):
+                if np.mean(matrix[rows[candidate]] == signature) >= self.threshold:
+                    representative = candidate
+                    break
+            clusters[pid] = representative
+            if representative == pid:
+                for band in bands:
+                    buckets.setdefault(band, pid)
+        return clusters
+
+def cluster_members(clusters):
+    """{representative: [member PIDs, representative first]} from a cluster map."""
+    members = {}
+    for pid, representative in clusters.items():
+        members.setdefault(representative, []).append(pid)
+    return members
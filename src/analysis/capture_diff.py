@@ -0,0 +1,168 @@
+import hashlib
+import os
+import re
+from collections import Counter
+
+# Ancestors beyond this depth are left out of the lineage path
+MAX_LINEAGE_DEPTH = 32
+
+def process_details(logs):
+    """First executable and argv seen for each PID (not part of the event table)."""
+    details = {}
+    for log in logs:
+        process = log.get('process')
+        if not process or process.get('pid') is None:
+            continue
+        try:
+            pid = int(float(process['pid']))
+        except (TypeError, ValueError):
+            continue
+        entry = details.setdefault(pid, {'executable': None, 'args': None})
+        if entry['executable'] is None and process.get('executable'):
+            entry['executable'] = str(process['executable'])
+        if entry['args'] is None and process.get('args'):
+            entry['args'] = [str(arg) for arg in process['args']]
+    return details
+
+def argv_shape(args):
+    """argv with the run-specific parts masked: numbers become N, temporary paths keep their directory."""
+    if not args:
+        return ''
+    shape = []
+    for arg in args[1:]:
+        if arg.startswith(('/tmp/', '/var/tmp/', '/dev/shm/', '/proc/')):
+            arg = os.path.dirname(arg) + '/*'
+        shape.append(re.sub(r'\d+', 'N', arg))
+    return ' '.join([os.path.basename(args[0])] + shape)
+
+def lineage_path(process_tree, pid):
+    """Process names from the root down to pid, e.g. 'systemd/sshd/bash'."""
+    names, seen = [], set()
+    while pid is not None and pid in process_tree and pid not in seen and len(names) < MAX_LINEAGE_DEPTH:
+        seen.add(pid)
+        info = process_tree[pid]
+        names.append('unknown' if info['process'] is None else str(info['process']))
+        pid = info['ppid']
+    return '/'.join(reversed(names))
+
+def alert_signature(alert):
+    """Alert text with counts masked and listed syscalls sorted, so '3 failed operations'
+    matches '5 failed operations' and 'read, open' matches 'open, read'."""
+    head, separator, details = re.sub(r'\b\d+\b', 'N', alert).partition(': ')
+    return head + separator + ', '.join(sorted(details.split(', '))) if separator else head
+
+def _digest(*parts):
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+def capture_fingerprints(df, process_tree, annotations, details):
+    """Group a capture's processes by identity fingerprint.
+
+    The identity is (executable, argv shape, lineage path); processes sharing
+    it (e.g. every run of the same cron job) form one group. Each group keeps
+    its instance count, syscall counts, a fingerprint of its syscall profile
+    and its alert signatures. Returns {identity fingerprint: group}.
+    """
+    syscall_counts = {}
+    if not df.empty:
+        # Sampled rows count for their weight
+        grouped = df.groupby(['pid', 'syscall'], sort=False)
+        counts = grouped['weight'].sum() if 'weight' in df else grouped.size()
+        for (pid, syscall), count in counts.items():
+            syscall_counts.setdefault(int(pid), Counter())[syscall] = int(round(count))
+
+    groups = {}
+    for pid, info in process_tree.items():
+        detail = details.get(pid, {})
+        executable = detail.get('executable') or ('unknown' if info['process'] is None else str(info['process']))
+        shape = argv_shape(detail.get('args'))
+        lineage = lineage_path(process_tree, pid)
+        key = _digest(executable, shape, lineage)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                'executable': executable, 'argv': shape, 'lineage': lineage,
+                'instances': 0, 'pids': [], 'syscalls': Counter(), 'alerts': set(), 'max_score': 0.0
+            }
+        group['instances'] += 1
+        group['pids'].append(pid)
+        group['syscalls'].update(syscall_counts.get(pid, {}))
+        annotation = annotations.get(pid, {})
+        group['alerts'].update(alert_signature(alert) for alert in annotation.get('alerts', []))
+        group['max_score'] = max(group['max_score'], float(annotation.get('behavior_score', 0.0)))
+
+    for group in groups.values():
+        group['profile'] = _digest(sorted(_shares(group['syscalls'], digits=1).items()))
+    return groups
+
+def _shares(counts, digits=4):
+    total = sum(counts.values())
+    return {syscall: round(count / total, digits) for syscall, count in counts.items()} if total else {}
+
+def mix_change(before, after, top=5):
+    """Total variation distance between two syscall mixes, with the largest share changes."""
+    before_shares, after_shares = _shares(before, digits=6), _shares(after, digits=6)
+    syscalls = set(before_shares) | set(after_shares)
+    deltas = {syscall: after_shares.get(syscall, 0.0) - before_shares.get(syscall, 0.0) for syscall in syscalls}
+    distance = sum(abs(delta) for delta in deltas.values()) / 2
+    ranked = sorted(deltas.items(), key=lambda item: -abs(item[1]))[:top]
+    return distance, [
+        {'syscall': str(syscall), 'before': round(before_shares.get(syscall, 0.0), 4),
+         'after': round(after_shares.get(syscall, 0.0), 4)}
+        for syscall, delta in ranked if delta
+    ]
+
+def _summary(group):
+    return {
+        'executable': group['executable'], 'argv': group['argv'], 'lineage': group['lineage'],
+        'instances': group['instances'], 'pids': group['pids'][:10],
+        'events': sum(group['syscalls'].values()), 'max_score': round(group['max_score'], 4)
+    }
+
+def diff_captures(baseline, current, mix_threshold=0.2, top=200):
+    """Compare two captures' fingerprint groups (from capture_fingerprints).
+
+    Groups are joined on their identity fingerprint: groups only in current
+    are new, groups only in baseline are missing. Joined groups whose syscall
+    profile fingerprint differs are reported when the total variation distance
+    of their mixes is at least mix_threshold; alert signatures not present in
+    the baseline group are reported as new alerts.
+    """
+    new = [dict(_summary(group), alerts=sorted(group['alerts']))
+           for key, group in current.items() if key not in baseline]
+    missing = [_summary(group) for key, group in baseline.items() if key not in current]
+
+    changed, new_alerts, instance_changes = [], [], []
+    for key, group in current.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if group['profile'] != before['profile']:
+            distance, syscalls = mix_change(before['syscalls'], group['syscalls'])
+            if distance >= mix_threshold:
+                changed.append(dict(_summary(group), distance=round(distance, 4), syscalls=syscalls))
+        added = group['alerts'] - before['alerts']
+        if added:
+            new_alerts.append(dict(_summary(group), alerts=sorted(added)))
+        if group['instances'] != before['instances']:
+            instance_changes.append(dict(_summary(group), baseline_instances=before['instances']))
+
+    new.sort(key=lambda group: (-len(group['alerts']), -group['max_score']))
+    missing.sort(key=lambda group: -group['events'])
+    changed.sort(key=lambda group: -group['distance'])
+    new_alerts.sort(key=lambda group: -len(group['alerts']))
+    instance_changes.sort(key=lambda group: -abs(group['instances'] - group['baseline_instances']))
+    return {
+        'summary': {
+            'baseline_groups': len(baseline), 'current_groups': len(current),
+            'baseline_processes': sum(group['instances'] for group in baseline.values()),
+            'current_processes': sum(group['instances'] for group in current.values()),
+            'new': len(new), 'missing': len(missing), 'changed_mix': len(changed),
+            'new_alerts': len(new_alerts), 'instance_changes': len(instance_changes),
+            'mix_threshold': mix_threshold
+        },
+        'new': new[:top],
+        'missing': missing[:top],
+        'changed_mix': changed[:top],
+        'new_alerts': new_alerts[:top],
+        'instance_changes': instance_changes[:top]
+    }
@@ -0,0 +1,169 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+class HashedFeatureMatrix:
+    """Row-compressed sparse matrix of hashed per-process features."""
+
+    def __init__(self, pids, indptr, indices, data, n_features):
+        self.pids = pids
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_features = n_features
+        self.row_index = {pid: i for i, pid in enumerate(pids)}
+
+    @classmethod
+    def concat(cls, matrices, n_features):
+        """Stack the rows of several matrices (e.g. one per chunk of processes) in order."""
+        matrices = list(matrices)
+        if not matrices:
+            return cls([], np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32),
+                       np.zeros(0, dtype=np.float32), n_features)
+        offsets = np.cumsum([0] + [matrix.indptr[-1] for matrix in matrices[:-1]])
+        indptr = np.concatenate([[0]] + [matrix.indptr[1:] + offset for matrix, offset in zip(matrices, offsets)])
+        return cls([pid for matrix in matrices for pid in matrix.pids], indptr.astype(np.int64),
+                   np.concatenate([matrix.indices for matrix in matrices]),
+                   np.concatenate([matrix.data for matrix in matrices]), n_features)
+
+    @property
+    def shape(self):
+        return (len(self.pids), self.n_features)
+
+    def _positions(self, rows):
+        """(output row, entry position) arrays for the entries of the given row positions."""
+        starts = self.indptr[rows]
+        counts = self.indptr[rows + 1] - starts
+        offsets = np.cumsum(counts) - counts
+        positions = np.arange(counts.sum()) + np.repeat(starts - offsets, counts)
+        return np.repeat(np.arange(len(rows)), counts), positions
+
+    def to_dense(self, rows=None):
+        """Densify the given row positions (all rows by default)."""
+        if rows is None:
+            rows = np.arange(len(self.pids))
+        rows = np.asarray(rows, dtype=np.int64)
+        dense = np.zeros((len(rows), self.n_features), dtype=np.float32)
+        out_rows, positions = self._positions(rows)
+        dense[out_rows, self.indices[positions]] = self.data[positions]
+        return dense
+
+    def select(self, pids):
+        """Matrix with one row per PID in pids, in that order (empty rows for unknown PIDs)."""
+        rows = np.array([self.row_index.get(pid, -1) for pid in pids], dtype=np.int64)
+        known = rows >= 0
+        # Unknown PIDs point at an empty range
+        starts = np.where(known, self.indptr[np.maximum(rows, 0)], 0)
+        ends = np.where(known, self.indptr[np.maximum(rows, 0) + 1], 0)
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(ends - starts, out=indptr[1:])
+        positions = np.arange(indptr[-1]) + np.repeat(starts - indptr[:-1], ends - starts)
+        return HashedFeatureMatrix(list(pids), indptr, self.indices[positions], self.data[positions],
+                                   self.n_features)
+
+    def dense_row(self, pid):
+        """Dense feature vector for a single PID (zeros if unknown)."""
+        if pid not in self.row_index:
+            return np.zeros(self.n_features, dtype=np.float32)
+        return self.to_dense([self.row_index[pid]])[0]
+
+class SyscallFeatureHasher:
+    """Hash the full syscall vocabulary, syscall bigrams and inter-arrival
+    time bins into a fixed number of columns (signed feature hashing)."""
+
+    DEFAULT_FEATURES = 2 ** 12
+
+    # Inter-arrival time bin edges in seconds (log-spaced)
+    INTERVAL_EDGES = [0.0, 0.001, 0.01, 0.1, 1.0, 10.0, 60.0]
+
+    def __init__(self, n_features=DEFAULT_FEATURES, use_bigrams=True, use_intervals=True):
+        self.n_features = n_features
+        self.use_bigrams = use_bigrams
+        self.use_intervals = use_intervals
+        self._token_cache = {}
+
+    def _hash_token(self, token):
+        """Stable (index, sign) for a token, independent of PYTHONHASHSEED."""
+        if token not in self._token_cache:
+            digest = hashlib.md5(token.encode('utf-8')).digest()
+            index = int.from_bytes(digest[:4], 'little') % self.n_features
+            sign = 1.0 if digest[4] & 1 else -1.0
+            self._token_cache[token] = (index, sign)
+        return self._token_cache[token]
+
+    def _hash_tokens(self, tokens):
+        """Vectorized lookup of (index, sign) arrays for a token list."""
+        hashed = [self._hash_token(token) for token in tokens]
+        if not hashed:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        indices, signs = zip(*hashed)
+        return np.asarray(indices, dtype=np.int64), np.asarray(signs, dtype=np.float32)
+
+    def transform(self, df, counts=False):
+        """Build the hashed feature matrix for every PID in one pass over df.
+
+        Values are signed token sums divided by the PID's token count; with
+        counts they are the raw signed sums (exact integers, as float64).
+        """
+        events = df[['pid', 'syscall', 'timestamp']].dropna(subset=['pid', 'syscall'])
+        events = events.sort_values(['pid', 'timestamp'], kind='stable')
+
+        pid_codes, pids = pd.factorize(events['pid'], sort=True)
+        syscall_codes, vocabulary = pd.factorize(events['syscall'].astype(str))
+        n_events = len(events)
+
+        # Unigrams: hash each distinct syscall once, then broadcast
+        vocab_index, vocab_sign = self._hash_tokens([f"sc:{name}" for name in vocabulary])
+        rows = [pid_codes]
+        cols = [vocab_index[syscall_codes]]
+        signs = [vocab_sign[syscall_codes]]
+
+        same_pid = pid_codes[1:] == pid_codes[:-1] if n_events > 1 else np.zeros(0, dtype=bool)
+
+        if self.use_bigrams and same_pid.any():
+            first = syscall_codes[:-1][same_pid]
+            second = syscall_codes[1:][same_pid]
+            pair_codes, pair_inverse = np.unique(
+                first.astype(np.int64) * len(vocabulary) + second, return_inverse=True
+            )
+            pair_tokens = [
+                f"bg:{vocabulary[code // len(vocabulary)]}>{vocabulary[code % len(vocabulary)]}"
+                for code in pair_codes
+            ]
+            pair_index, pair_sign = self._hash_tokens(pair_tokens)
+            rows.append(pid_codes[1:][same_pid])
+            cols.append(pair_index[pair_inverse])
+            signs.append(pair_sign[pair_inverse])
+
+        if self.use_intervals and same_pid.any():
+            seconds = events['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+            gaps = np.diff(seconds)[same_pid]
+            gap_bins = np.searchsorted(self.INTERVAL_EDGES, gaps, side='right')
+            bin_index, bin_sign = self._hash_tokens(
+                [f"iat:{b}" for b in range(len(self.INTERVAL_EDGES) + 1)]
+            )
+            rows.append(pid_codes[1:][same_pid])
+            cols.append(bin_index[gap_bins])
+            signs.append(bin_sign[gap_bins])
+
+        rows = np.concatenate(rows).astype(np.int64)
+        cols = np.concatenate(cols)
+        signs = np.concatenate(signs)
+
+        # Sum colliding (row, col) entries, then normalize by tokens per row
+        keys, inverse = np.unique(rows * self.n_features + cols, return_inverse=True)
+        values = np.bincount(inverse, weights=signs)
+        key_rows = keys // self.n_features
+        key_cols = keys % self.n_features
+        if not counts:
+            values = values.astype(np.float32)
+            tokens_per_row = np.bincount(rows, minlength=len(pids))
+            values /= np.maximum(tokens_per_row[key_rows], 1)
+
+        indptr = np.zeros(len(pids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(key_rows, minlength=len(pids)), out=indptr[1:])
+
+        return HashedFeatureMatrix(
+            [int(pid) for pid in pids], indptr, key_cols.astype(np.int32),
+            values, self.n_features
+        )
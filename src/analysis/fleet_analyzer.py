@@ -0,0 +1,140 @@
+import re
+from bisect import bisect_right
+from collections import Counter
+import numpy as np
+import pandas as pd
+from src.utils.process_pool import process_pool
+from .process_tree import build_process_tree_batch
+from .process_annotations import annotate_processes, process_risk
+
+# Later instances of a PID reused within a host are keyed pid + instance * PID_INSTANCE,
+# above any real PID, so each (pid, start) gets its own tree node
+PID_INSTANCE = 2 ** 32
+
+def split_reused_pids(df):
+    """Key every instance of a PID reused within the capture separately.
+
+    A PID starts a new instance at an execve whose process name differs from
+    its previous event. Events of later instances get the key
+    pid + instance * PID_INSTANCE, and parent PIDs point at the parent's
+    instance live at the time of the event. Returns df unchanged without reuse.
+    """
+    pids = df['pid'].astype(np.int64)
+    names = df['process'].astype(object)
+    previous = names.groupby(pids, sort=False).shift()
+    starts_instance = ((df['syscall'] == 'execve') & previous.notna() & (names != previous)).to_numpy()
+    if not starts_instance.any():
+        return df
+    instance = pd.Series(starts_instance.astype(np.int64), index=df.index).groupby(pids, sort=False).cumsum()
+    reused = {}
+    for position in np.flatnonzero(starts_instance):
+        reused.setdefault(int(pids.iat[position]), []).append(position)
+    ppids = df['ppid'].to_numpy(dtype=object).copy()
+    for position, ppid in enumerate(ppids):
+        if ppid is not None and not pd.isna(ppid) and int(ppid) in reused:
+            ppids[position] = int(ppid) + bisect_right(reused[int(ppid)], position) * PID_INSTANCE
+    df = df.copy()
+    df['pid'] = pids + instance * PID_INSTANCE
+    df['ppid'] = ppids
+    return df
+
+def process_starts(df):
+    """First event time (ISO) per process key; with the host and PID it identifies a process across a fleet."""
+    if df.empty:
+        return {}
+    starts = df.groupby('pid', sort=False)['timestamp'].min()
+    return {int(pid): None if pd.isna(start) else start.isoformat()
+            for pid, start in starts.items()}
+
+def analyze_host(host, df, security_analyzer, behavior_analyzer):
+    """Tree and annotations for one host's event table (one kernel's PID space).
+
+    Tree nodes are keyed per process instance (see split_reused_pids), so a
+    PID reused within the host is not collapsed into one node.
+    """
+    if df.empty:
+        return {'host': host, 'events': 0, 'process_tree': {}, 'annotations': {}, 'starts': {}}
+    df = split_reused_pids(df)
+    process_tree = build_process_tree_batch(df)
+    return {
+        'host': host,
+        'events': len(df),
+        'process_tree': process_tree,
+        'annotations': annotate_processes(process_tree, security_analyzer, behavior_analyzer, df),
+        'starts': process_starts(df)
+    }
+
+def _analyze_host_job(job):
+    return analyze_host(*job)
+
+def analyze_fleet(host_frames, security_analyzer, behavior_analyzer, workers=None):
+    """analyze_host for every host, in a process pool when there are several hosts.
+
+    Returns {host: result} in the order of host_frames.
+    """
+    jobs = [(host, df, security_analyzer, behavior_analyzer) for host, df in host_frames.items()]
+    if workers == 1 or len(jobs) <= 1:
+        results = map(_analyze_host_job, jobs)
+        return {result['host']: result for result in results}
+    with process_pool(max_workers=min(workers or len(jobs), len(jobs))) as pool:
+        return {result['host']: result for result in pool.map(_analyze_host_job, jobs)}
+
+def alert_kind(alert):
+    """Alert text without its details and counts, e.g. '❌ N failed operations'."""
+    return re.sub(r'\d+', 'N', alert.split(':')[0])
+
+def fleet_rollup(results, top=50):
+    """Fleet-level summary of per-host results.
+
+    Processes are identified by (host, pid, start), with the PID recovered
+    from the instance key. Returns per-host totals,
+    the riskiest processes across all hosts, executables (most often flagged
+    and most widespread first) and alert kinds counted per host.
+    """
+    hosts, processes = [], []
+    executables = {}
+    alert_counts = {}
+    for host, result in results.items():
+        annotations = result['annotations']
+        flagged = alerts = 0
+        for pid, info in result['process_tree'].items():
+            annotation = annotations[pid]
+            name = 'unknown' if info['process'] is None else str(info['process'])
+            is_flagged = annotation['style_class'] in ('suspicious', 'anomalous')
+            flagged += is_flagged
+            alerts += len(annotation['alerts'])
+            processes.append({
+                'host': host,
+                'pid': pid % PID_INSTANCE,
+                'start': result['starts'].get(pid),
+                'process': name,
+                'behavior_score': round(float(annotation['behavior_score']), 4),
+                'style_class': annotation['style_class'],
+                'alerts': annotation['alerts'],
+                'risk': process_risk(annotation)
+            })
+            executable = executables.setdefault(name, {'process': name, 'hosts': set(), 'instances': 0,
+                                                       'flagged': 0, 'max_score': 0.0})
+            executable['hosts'].add(host)
+            executable['instances'] += 1
+            executable['flagged'] += is_flagged
+            executable['max_score'] = max(executable['max_score'], round(float(annotation['behavior_score']), 4))
+            for kind, count in Counter(alert_kind(alert) for alert in annotation['alerts']).items():
+                per_host = alert_counts.setdefault(kind, {})
+                per_host[host] = per_host.get(host, 0) + count
+        hosts.append({'host': host, 'events': result['events'], 'processes': len(result['process_tree']),
+                      'flagged': flagged, 'alerts': alerts})
+
+    processes.sort(key=lambda process: -process['risk'])
+    for process in processes:
+        del process['risk']
+    ranked = sorted((dict(executable, hosts=sorted(executable['hosts'])) for executable in executables.values()),
+                    key=lambda executable: (-executable['flagged'], -len(executable['hosts']),
+                                            -executable['max_score']))
+    return {
+        'hosts': hosts,
+        'totals': {key: sum(host[key] for host in hosts) for key in ('events', 'processes', 'flagged', 'alerts')},
+        'riskiest': processes[:top],
+        'executables': ranked[:top],
+        'alert_kinds': dict(sorted(alert_counts.items(), key=lambda item: -sum(item[1].values())))
+    }
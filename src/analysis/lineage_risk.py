@@ -0,0 +1,70 @@
+FLAGGED_CLASSES = ('suspicious', 'anomalous')
+
+def node_risk(annotation):
+    """Risk a process passes to its descendants: 1.0 when flagged, else its behavior score (capped at 1)."""
+    if annotation['style_class'] in FLAGGED_CLASSES:
+        return 1.0
+    return min(float(annotation['behavior_score']), 1.0)
+
+def _preorder(process_tree):
+    """(pid, parent) pairs with every parent before its children; ppid cycles are cut at first visit."""
+    order, seen = [], set()
+    roots = [pid for pid, info in process_tree.items() if info['ppid'] not in process_tree]
+    for root in roots + list(process_tree):
+        if root in seen:
+            continue
+        seen.add(root)
+        stack = [(root, None)]
+        while stack:
+            pid, parent = stack.pop()
+            order.append((pid, parent))
+            for child in reversed(process_tree[pid]['children']):
+                if child['pid'] in process_tree and child['pid'] not in seen:
+                    seen.add(child['pid'])
+                    stack.append((child['pid'], pid))
+    return order
+
+def lineage_risk(process_tree, annotations, decay=0.8, taint_threshold=0.5, path_limit=8):
+    """Ancestry features for every process, in one top-down and one bottom-up pass.
+
+    Top-down: depth, inherited risk (the riskiest ancestor's node_risk,
+    decayed by `decay` per generation), the nearest flagged ancestor, the
+    number of flagged ancestors and the path of flagged ancestors as 'name (PID)'
+    strings from the top down (the nearest path_limit of them). Bottom-up: alerts and flagged processes in the
+    subtree (inclusive). Processes that are not flagged themselves but inherit
+    at least taint_threshold are marked tainted.
+    Returns {pid: {'depth', 'inherited_risk', 'flagged_ancestor', 'flagged_ancestors',
+    'path', 'subtree_alerts', 'subtree_flagged', 'tainted'}}.
+    """
+    order = _preorder(process_tree)
+    lineage = {}
+    for pid, parent in order:
+        annotation = annotations[pid]
+        flagged = annotation['style_class'] in FLAGGED_CLASSES
+        if parent is None:
+            entry = {'depth': 0, 'inherited_risk': 0.0, 'flagged_ancestor': None, 'flagged_ancestors': 0,
+                     'path': ()}
+        else:
+            above = lineage[parent]
+            parent_flagged = annotations[parent]['style_class'] in FLAGGED_CLASSES
+            entry = {
+                'depth': above['depth'] + 1,
+                'inherited_risk': round(decay * max(node_risk(annotations[parent]), above['inherited_risk']), 6),
+                'flagged_ancestor': parent if parent_flagged else above['flagged_ancestor'],
+                'flagged_ancestors': above['flagged_ancestors'] + parent_flagged,
+                'path': (above['path'] + (_label(process_tree, parent),))[-path_limit:] if parent_flagged
+                        else above['path']
+            }
+        entry['subtree_alerts'] = len(annotation['alerts'])
+        entry['subtree_flagged'] = int(flagged)
+        entry['tainted'] = not flagged and entry['inherited_risk'] >= taint_threshold
+        lineage[pid] = entry
+
+    for pid, parent in reversed(order):
+        if parent is not None:
+            lineage[parent]['subtree_alerts'] += lineage[pid]['subtree_alerts']
+            lineage[parent]['subtree_flagged'] += lineage[pid]['subtree_flagged']
+    return lineage
+
+def _label(process_tree, pid):
+    return f"{process_tree[pid]['process'] or 'unknown'} ({int(pid)})"
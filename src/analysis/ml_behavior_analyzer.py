@@ -3,7 +3,16 @@ from torch import nn
 import torch.nn.functional as F
 from collections import defaultdict
 import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
+from .feature_hashing import SyscallFeatureHasher, HashedFeatureMatrix
+
+# With hashed features, training densifies this many process rows at a time
+TRAIN_BATCH_ROWS = 4096
+
+def _event_count(rows):
+    """Number of events rows stand for (their weights in a sampled capture)."""
+    return float(rows['weight'].sum()) if 'weight' in rows else len(rows)
 
 class ProcessAutoencoder(nn.Module):
     def __init__(self, input_size):
@@ -31,9 +40,12 @@ class ProcessAutoencoder(nn.Module):
 class MLBehaviorAnalyzer:
     """ML-based behavior analyzer that runs in parallel with traditional analysis."""
     
-    def __init__(self, syscall_categories):
+    def __init__(self, syscall_categories, hashed_features=False, hash_size=SyscallFeatureHasher.DEFAULT_FEATURES):
         self.syscall_categories = syscall_categories
-        self.feature_size = len(syscall_categories) * 2 + 3
+        self.base_feature_size = len(syscall_categories) * 2 + 3
+        self.hasher = SyscallFeatureHasher(hash_size) if hashed_features else None
+        self.hashed_matrix = None
+        self.feature_size = self.base_feature_size + (hash_size if hashed_features else 0)
         self.model = ProcessAutoencoder(self.feature_size)
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model.to(self.device)
@@ -46,64 +58,186 @@ class MLBehaviorAnalyzer:
         if process_data.empty:
             return None
             
-        total_calls = len(process_data)
+        total_calls = _event_count(process_data)
         category_freqs = []
         category_rates = []
         
         for category, syscalls in self.syscall_categories.items():
-            category_calls = process_data[process_data['syscall'].isin(syscalls)]
-            freq = len(category_calls) / max(total_calls, 1)
+            category_calls = _event_count(process_data[process_data['syscall'].isin(syscalls)])
+            freq = category_calls / max(total_calls, 1)
             category_freqs.append(freq)
             
             if len(process_data) >= 2:
                 time_range = (process_data['timestamp'].max() - process_data['timestamp'].min()).total_seconds()
-                rate = len(category_calls) / max(time_range, 1)
+                rate = category_calls / max(time_range, 1)
                 category_rates.append(rate)
             else:
                 category_rates.append(0)
         
         if len(process_data) >= 2:
             duration = (process_data['timestamp'].max() - process_data['timestamp'].min()).total_seconds()
-            avg_interval = duration / len(process_data)
-            calls_per_second = len(process_data) / max(duration, 1)
+            avg_interval = duration / total_calls
+            calls_per_second = total_calls / max(duration, 1)
         else:
             duration = avg_interval = calls_per_second = 0
         
         features = category_freqs + category_rates + [duration, avg_interval, calls_per_second]
-        return torch.tensor(features, dtype=torch.float32)
+        features = torch.tensor(features, dtype=torch.float32)
+        
+        if self.hasher is not None:
+            hashed = self._hashed_row(df, pid, process_data)
+            features = torch.cat([features, torch.from_numpy(hashed)])
+        
+        return features
+    
+    def extract_features_batch(self, df, pids=None):
+        """Batch counterpart of extract_features: one grouped pass over df.
+
+        Returns (pids, features), one dense row per PID with events, in
+        first-appearance order unless pids is given.
+        """
+        pids, features, hashed = self.feature_blocks(df, pids)
+        if not pids:
+            return [], torch.zeros((0, self.feature_size), dtype=torch.float32)
+        if hashed is not None:
+            features = torch.cat([features, torch.from_numpy(hashed.to_dense())], dim=1)
+        return pids, features
+    
+    def feature_blocks(self, df, pids=None):
+        """The rows of extract_features_batch as (pids, dense base features,
+        hashed features): the hashed block stays a sparse HashedFeatureMatrix
+        with the same row order (None without a hasher).
+        """
+        grouped = df.groupby('pid', sort=False)
+        rows = grouped.size()
+        pids = list(rows.index) if pids is None else [pid for pid in pids if pid in rows.index]
+        if not pids:
+            return [], torch.zeros((0, self.base_feature_size), dtype=torch.float32), None
+        
+        # Sampled rows count for their weight
+        weights = df['weight'] if 'weight' in df else pd.Series(1.0, index=df.index)
+        total_calls = weights.groupby(df['pid'], sort=False).sum().reindex(pids).to_numpy(dtype=np.float64)
+        spans = grouped['timestamp'].agg(['min', 'max']).reindex(pids)
+        span_seconds = (spans['max'] - spans['min']).dt.total_seconds().to_numpy()
+        category_calls = [
+            (df['syscall'].isin(syscalls) * weights).groupby(df['pid'], sort=False).sum()
+            .reindex(pids).to_numpy(dtype=np.float64)
+            for syscalls in self.syscall_categories.values()
+        ]
+        features = self.base_features(total_calls, span_seconds, category_calls,
+                                      rows.reindex(pids).to_numpy())
+        
+        hashed = None
+        if self.hasher is not None:
+            matrix = self.hashed_matrix
+            if matrix is None or any(pid not in matrix.row_index for pid in pids):
+                matrix = self.hasher.transform(df)
+            # Empty rows for PIDs without any syscall, like _hashed_row
+            hashed = matrix.select(pids)
+        
+        return pids, features, hashed
+    
+    def base_features(self, total_calls, span_seconds, category_calls, rows=None):
+        """Dense base feature rows from per-PID event counts, first-to-last
+        event spans (seconds) and one count array per syscall category.
+
+        Counts of a sampled capture are weighted; rows then gives the number
+        of kept rows per PID, which decides whether a span exists.
+        """
+        multiple = (total_calls if rows is None else rows) >= 2
+        duration = np.where(multiple, span_seconds, 0.0)
+        
+        category_freqs, category_rates = [], []
+        for calls in category_calls:
+            category_freqs.append(calls / np.maximum(total_calls, 1))
+            category_rates.append(np.where(multiple, calls / np.maximum(duration, 1), 0.0))
+        
+        avg_interval = np.where(multiple, duration / total_calls, 0.0)
+        calls_per_second = np.where(multiple, total_calls / np.maximum(duration, 1), 0.0)
+        return torch.tensor(
+            np.column_stack(category_freqs + category_rates + [duration, avg_interval, calls_per_second]),
+            dtype=torch.float32
+        )
+    
+    def _hashed_row(self, df, pid, process_data):
+        """Hashed syscall features for a PID, reusing the trained matrix when possible."""
+        if self.hashed_matrix is not None and pid in self.hashed_matrix.row_index:
+            return self.hashed_matrix.dense_row(pid)
+        return self.hasher.transform(process_data).dense_row(pid)
     
     def train(self, df):
         """Train the autoencoder on all processes."""
         print("Training ML model...")
-        X = []
-        all_pids = df['pid'].unique()
+        if self.hasher is not None:
+            # Build the sparse hashed block for all PIDs in a single pass
+            self.hashed_matrix = self.hasher.transform(df)
         
-        for pid in all_pids:
-            features = self.extract_features(df, pid)
-            if features is not None:
-                X.append(features)
-        
-        if not X:
+        # Same rows as extract_features per PID, computed in one grouped pass
+        _, X, hashed = self.feature_blocks(df)
+        self.train_features(X, hashed)
+    
+    def train_chunks(self, frames):
+        """Train on event tables that each hold whole processes (e.g.
+        EventStore.iter_process_frames), one table in memory at a time."""
+        print("Training ML model...")
+        blocks, hashed = [], []
+        for df in frames:
+            pids, features, matrix = self.feature_blocks(df)
+            if pids:
+                blocks.append(features)
+                hashed.append(matrix)
+        X = torch.cat(blocks) if blocks else torch.zeros((0, self.base_feature_size), dtype=torch.float32)
+        self.train_features(X, HashedFeatureMatrix.concat(hashed, self.hasher.n_features)
+                            if self.hasher is not None else None)
+    
+    def train_features(self, X, hashed=None):
+        """Train the autoencoder on a precomputed feature matrix (one row per process).
+
+        With hashed (a HashedFeatureMatrix row-aligned with X), X holds only the
+        base features and the hashed block is densified TRAIN_BATCH_ROWS rows
+        at a time, so memory doesn't grow with processes times hash columns.
+        """
+        if len(X) == 0:
             print("No valid training data found")
             return
             
-        X = torch.stack(X).to(self.device)
+        X = X.to(self.device)
         X_mean = X.mean(dim=0)
         X_std = X.std(dim=0)
-        X_normalized = (X - X_mean) / (X_std + 1e-7)
+        
+        if hashed is not None:
+            X_mean = torch.cat([X_mean, torch.zeros(hashed.n_features, device=self.device)])
+            X_std = torch.cat([X_std, torch.ones(hashed.n_features, device=self.device)])
+        elif self.hasher is not None:
+            # Hashed columns are already per-process frequencies; only
+            # standardize the dense base features
+            X_mean[self.base_feature_size:] = 0.0
+            X_std[self.base_feature_size:] = 1.0
+        
+        X_normalized = (X - X_mean[:X.shape[1]]) / (X_std[:X.shape[1]] + 1e-7)
         
         self.X_mean = X_mean
         self.X_std = X_std
         
+        def batches():
+            if hashed is None:
+                yield X_normalized
+                return
+            for start in range(0, len(X_normalized), TRAIN_BATCH_ROWS):
+                rows = np.arange(start, min(start + TRAIN_BATCH_ROWS, len(X_normalized)))
+                block = torch.from_numpy(hashed.to_dense(rows)).to(self.device)
+                yield torch.cat([X_normalized[start:start + len(rows)], block / (1 + 1e-7)], dim=1)
+        
         optimizer = torch.optim.Adam(self.model.parameters())
         
         self.model.train()
         for epoch in range(100):  # 100 epochs
-            optimizer.zero_grad()
-            reconstructed = self.model(X_normalized)
-            loss = F.mse_loss(reconstructed, X_normalized)
-            loss.backward()
-            optimizer.step()
+            for batch in batches():
+                optimizer.zero_grad()
+                reconstructed = self.model(batch)
+                loss = F.mse_loss(reconstructed, batch)
+                loss.backward()
+                optimizer.step()
             
             if (epoch + 1) % 10 == 0:
                 print(f'Epoch [{epoch+1}/100], Loss: {loss.item():.4f}')
@@ -111,13 +245,33 @@ class MLBehaviorAnalyzer:
         # Calculate threshold
         self.model.eval()
         with torch.no_grad():
-            reconstructed = self.model(X_normalized)
-            errors = F.mse_loss(reconstructed, X_normalized, reduction='none').mean(dim=1)
-            self.reconstruction_errors = errors.cpu().numpy()
+            errors = [F.mse_loss(self.model(batch), batch, reduction='none').mean(dim=1) for batch in batches()]
+            self.reconstruction_errors = torch.cat(errors).cpu().numpy()
             self.error_threshold = np.mean(self.reconstruction_errors) + 2 * np.std(self.reconstruction_errors)
         
         print("ML model training completed")
     
+    def score_features(self, X, hashed=None):
+        """analyze_process scores for precomputed feature rows (as accepted by train_features)."""
+        if not hasattr(self, 'X_mean') or len(X) == 0:
+            return np.zeros(len(X))
+        self.model.eval()
+        X = X.to(self.device)
+        X_normalized = (X - self.X_mean[:X.shape[1]]) / (self.X_std[:X.shape[1]] + 1e-7)
+        errors = []
+        with torch.no_grad():
+            for start in range(0, len(X_normalized), TRAIN_BATCH_ROWS):
+                batch = X_normalized[start:start + TRAIN_BATCH_ROWS]
+                if hashed is not None:
+                    rows = np.arange(start, start + len(batch))
+                    block = torch.from_numpy(hashed.to_dense(rows)).to(self.device)
+                    batch = torch.cat([batch, block / (1 + 1e-7)], dim=1)
+                errors.append(F.mse_loss(self.model(batch), batch, reduction='none').mean(dim=1))
+        errors = torch.cat(errors).cpu().numpy()
+        if not self.error_threshold:
+            return np.zeros(len(errors))
+        return np.minimum(errors / self.error_threshold, 1.0)
+    
     def analyze_process(self, df, pid):
         """Analyze a process using the trained autoencoder."""
         if not hasattr(self, 'X_mean'):
@@ -0,0 +1,501 @@
+import functools
+import json
+import os
+from collections import deque
+import numpy as np
+import pandas as pd
+import torch
+from src.utils.process_pool import process_pool
+from src.data.data_processor import create_dataframe
+from src.data.record_correlation import correlate_records, line_sequence
+from src.utils.pid_utils import normalize_pid
+from .baseline_store import profiles_from_counts
+from .feature_hashing import HashedFeatureMatrix
+from .process_tree import build_process_tree_batch
+
+# Row keys are chunk * CHUNK_STRIDE + row position, so they order rows across chunks
+CHUNK_STRIDE = 2 ** 40
+
+# Event columns whose distinct values feed SecurityAnalyzer.resource_alerts
+RESOURCE_COLUMNS = ('exe', 'path', 'address')
+
+class ProcessStats:
+    """Mergeable statistics of one process's events (see ProcessAggregates)."""
+
+    __slots__ = ('first', 'rows', 'weighted_rows', 'start', 'end', 'process', 'user',
+                 'timed_first', 'timed_start', 'timed_end', 'timed', 'syscalls',
+                 'fails', 'root', 'windows', 'resources', 'tokens', 'token_sums', 'head', 'tail')
+
+    def __init__(self):
+        self.first = None            # key of the first row
+        self.rows = 0
+        self.weighted_rows = 0.0
+        self.start = self.end = None  # first/last timestamp over all rows
+        self.process = self.user = None  # (key, value) of the first non-null value
+        # Rows with a truthy syscall and a timestamp, as the behavior score counts them
+        self.timed_first = None
+        self.timed_start = self.timed_end = None
+        self.timed = {}              # syscall -> weighted count
+        self.syscalls = {}           # syscall -> [count, weighted count, first key] (non-null syscalls)
+        self.fails = 0
+        self.root = False
+        self.windows = {}            # 60s window -> [first key, hits per suspicious behavior...]
+        # Distinct executables, file paths and socket addresses -> first key
+        self.resources = {column: {} for column in RESOURCE_COLUMNS}
+        # Hashed ML features: token count, {column: signed sum} and the first and
+        # last (nanoseconds, syscall) of the time-sorted event sequence
+        self.tokens = 0
+        self.token_sums = {}
+        self.head = self.tail = None
+
+    def merge(self, later, hasher=None):
+        """Fold in the statistics of a later chunk of the same process."""
+        self.first = _min(self.first, later.first)
+        self.rows += later.rows
+        self.weighted_rows += later.weighted_rows
+        self.start, self.end = _min(self.start, later.start), _max(self.end, later.end)
+        self.process = _min(self.process, later.process)
+        self.user = _min(self.user, later.user)
+        self.timed_first = _min(self.timed_first, later.timed_first)
+        self.timed_start, self.timed_end = _min(self.timed_start, later.timed_start), _max(self.timed_end, later.timed_end)
+        for syscall, count in later.timed.items():
+            self.timed[syscall] = self.timed.get(syscall, 0) + count
+        for syscall, (count, weighted, first) in later.syscalls.items():
+            if syscall in self.syscalls:
+                entry = self.syscalls[syscall]
+                entry[0] += count
+                entry[1] += weighted
+                entry[2] = min(entry[2], first)
+            else:
+                self.syscalls[syscall] = [count, weighted, first]
+        self.fails += later.fails
+        self.root = self.root or later.root
+        for window, (first, *hits) in later.windows.items():
+            if window in self.windows:
+                entry = self.windows[window]
+                entry[0] = min(entry[0], first)
+                for index, count in enumerate(hits, start=1):
+                    entry[index] += count
+            else:
+                self.windows[window] = [first, *hits]
+        for column, values in later.resources.items():
+            known = self.resources[column]
+            for value, first in values.items():
+                known[value] = min(known.get(value, first), first)
+
+        if hasher is not None:
+            if self.tail is not None and later.head is not None:
+                # The two sequences join with one more bigram and inter-arrival token
+                for token in _bridge_tokens(hasher, self.tail, later.head):
+                    column, sign = hasher._hash_token(token)
+                    self.token_sums[column] = self.token_sums.get(column, 0.0) + sign
+                    self.tokens += 1
+            for column, value in later.token_sums.items():
+                self.token_sums[column] = self.token_sums.get(column, 0.0) + value
+            self.tokens += later.tokens
+            self.head = self.head if self.head is not None else later.head
+            self.tail = later.tail if later.tail is not None else self.tail
+        return self
+
+def _min(a, b):
+    return b if a is None else a if b is None else min(a, b)
+
+def _max(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+def _bridge_tokens(hasher, tail, head):
+    """Tokens SyscallFeatureHasher.transform adds between two consecutive events."""
+    tokens = []
+    if hasher.use_bigrams:
+        tokens.append(f"bg:{tail[1]}>{head[1]}")
+    if hasher.use_intervals:
+        gap = head[0] / 1e9 - tail[0] / 1e9
+        tokens.append(f"iat:{int(np.searchsorted(hasher.INTERVAL_EDGES, gap, side='right'))}")
+    return tokens
+
+def _tree_rows(rows):
+    """The rows build_process_tree_batch needs (first per pid, first named, first
+    with a parent, first naming each parent), given rows sorted by key."""
+    ppids = np.array([normalize_pid(ppid) or 0 for ppid in rows['ppid'].to_numpy(dtype=object)], dtype=np.int64)
+    named = rows['process'].notna().to_numpy()
+    keep = ~rows['pid'].duplicated().to_numpy()
+    for mask, column in ((named, rows['pid']), (ppids != 0, rows['pid']), (ppids != 0, pd.Series(ppids))):
+        positions = np.flatnonzero(mask)
+        keep[positions[~column.iloc[positions].duplicated().to_numpy()]] = True
+    return rows[keep].reset_index(drop=True)
+
+class ProcessAggregates:
+    """Mergeable per-PID partial aggregates of an event table.
+
+    from_frame reduces one chunk of events (a file, a byte range of a file or
+    a slice of rows); merging the chunks in order gives the same process tree,
+    behavior scores, alerts, ML features and baseline profiles as running the
+    batch analyzers on all events at once. Merging is associative, so chunks
+    can be reduced in parallel and combined pairwise. Hashed ML features are
+    exact as long as a process's events in a later chunk are not earlier in
+    time than those in an earlier chunk (true for time-ordered captures).
+    """
+
+    def __init__(self, behaviors=(), hasher=None):
+        self.behaviors = list(behaviors)
+        self.hasher = hasher
+        self.stats = {}
+        self.weighted = False
+        self.tree = pd.DataFrame(columns=['key', 'pid', 'ppid', 'process'])
+
+    @classmethod
+    def from_frame(cls, df, chunk=0, behaviors=None, hasher=None):
+        """Reduce one chunk of events; behaviors is SecurityAnalyzer.suspicious_behaviors."""
+        behaviors = behaviors or {}
+        aggregates = cls(behaviors, hasher)
+        if df.empty:
+            return aggregates
+        aggregates.weighted = 'weight' in df
+
+        n = len(df)
+        keys = chunk * CHUNK_STRIDE + np.arange(n, dtype=np.int64)
+        syscall_values = df['syscall'].to_numpy(dtype=object)
+        has_time = df['timestamp'].notna().to_numpy()
+        # Same row selection as calculate_behavior_scores / analyze_processes
+        counted = np.fromiter((bool(v) for v in syscall_values), dtype=bool, count=n) & has_time
+        seconds = np.round(df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9, 6)
+        frame = pd.DataFrame({
+            'pid': df['pid'].to_numpy(dtype=np.float64).astype(np.int64),
+            'key': keys,
+            'timestamp': df['timestamp'].to_numpy(),
+            'syscall': [value if isinstance(value, str) else None for value in syscall_values],
+            'weight': df['weight'].to_numpy(dtype=np.float64) if 'weight' in df else np.ones(n),
+            'fail': (df['result'] == 'fail').to_numpy(),
+            'root': (df['uid'].astype(str) == '0').to_numpy(),
+            'window': np.where(counted, seconds / 60, 0).astype(np.int64)
+        })
+        for behavior, config in behaviors.items():
+            frame[behavior] = (df['syscall'].isin(config['syscalls']).to_numpy() & counted) * frame['weight']
+
+        grouped = frame.groupby('pid', sort=False)
+        summary = grouped.agg(first=('key', 'min'), rows=('key', 'size'), weighted_rows=('weight', 'sum'),
+                              start=('timestamp', 'min'), end=('timestamp', 'max'),
+                              fails=('fail', 'sum'), root=('root', 'any'))
+        stats = aggregates.stats
+        for pid, row in zip(summary.index.tolist(), summary.itertuples(index=False)):
+            entry = stats[pid] = ProcessStats()
+            entry.first, entry.rows, entry.weighted_rows = row.first, row.rows, row.weighted_rows
+            entry.start = None if pd.isna(row.start) else row.start
+            entry.end = None if pd.isna(row.end) else row.end
+            entry.fails, entry.root = int(row.fails), bool(row.root)
+
+        for column in ('process', 'user'):
+            present = df[column].notna().to_numpy()
+            firsts = frame[present].assign(value=df[column].to_numpy()[present]).drop_duplicates('pid')
+            for pid, key, value in zip(firsts['pid'].tolist(), firsts['key'].tolist(), firsts['value']):
+                setattr(stats[pid], column, (key, value))
+        for column in RESOURCE_COLUMNS:
+            if column not in df:
+                continue
+            present = df[column].notna().to_numpy()
+            values = np.asarray(df[column].to_numpy(dtype=object)[present])
+            firsts = frame[present].assign(value=values).drop_duplicates(['pid', 'value'])
+            for pid, key, value in zip(firsts['pid'].tolist(), firsts['key'].tolist(), firsts['value']):
+                stats[pid].resources[column][value] = key
+
+        timed = frame[counted]
+        timed_summary = timed.groupby('pid', sort=False).agg(
+            first=('key', 'min'), start=('timestamp', 'min'), end=('timestamp', 'max'))
+        for pid, row in zip(timed_summary.index.tolist(), timed_summary.itertuples(index=False)):
+            stats[pid].timed_first, stats[pid].timed_start, stats[pid].timed_end = row.first, row.start, row.end
+        counts = timed.groupby(['pid', 'syscall'], sort=False, dropna=False)['weight'].sum()
+        for (pid, syscall), count in counts.items():
+            stats[pid].timed[None if pd.isna(syscall) else syscall] = count
+
+        named = frame[frame['syscall'].notna().to_numpy()]
+        syscalls = named.groupby(['pid', 'syscall'], sort=False).agg(
+            count=('key', 'size'), weighted=('weight', 'sum'), first=('key', 'min'))
+        for (pid, syscall), row in zip(syscalls.index, syscalls.itertuples(index=False)):
+            stats[pid].syscalls[syscall] = [row.count, row.weighted, row.first]
+
+        if behaviors:
+            windows = timed.groupby(['pid', 'window'], sort=False).agg(
+                first=('key', 'min'), **{behavior: (behavior, 'sum') for behavior in behaviors})
+            for (pid, window), row in zip(windows.index, windows.itertuples(index=False)):
+                stats[pid].windows[window] = [row[0], *row[1:]]
+
+        if hasher is not None:
+            aggregates._add_token_sums(df)
+
+        tree = pd.DataFrame({'key': keys, 'pid': df['pid'].to_numpy(), 'ppid': df['ppid'].to_numpy(dtype=object),
+                             'process': df['process'].to_numpy(dtype=object)})
+        aggregates.tree = _tree_rows(tree)
+        return aggregates
+
+    def _add_token_sums(self, df):
+        """Signed token sums per process, from the chunk's raw hashed counts."""
+        matrix = self.hasher.transform(df, counts=True)
+        events = df[['pid', 'syscall', 'timestamp']].dropna(subset=['pid', 'syscall'])
+        events = events.sort_values(['pid', 'timestamp'], kind='stable')
+        pids = events['pid'].to_numpy(dtype=np.float64).astype(np.int64)
+        nanoseconds = events['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        syscalls = events['syscall'].astype(str).to_numpy()
+        starts = np.flatnonzero(np.r_[True, pids[1:] != pids[:-1]]) if len(pids) else np.zeros(0, dtype=np.int64)
+        ends = np.r_[starts[1:], len(pids)]
+        pairs = len(pids) > 1 and bool((pids[1:] == pids[:-1]).any())
+        per_pair = (self.hasher.use_bigrams + self.hasher.use_intervals) if pairs else 0
+
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            pid = int(pids[start])
+            entry = self.stats[pid]
+            entry.tokens = (end - start) + (end - start - 1) * per_pair
+            entry.head = (int(nanoseconds[start]), syscalls[start])
+            entry.tail = (int(nanoseconds[end - 1]), syscalls[end - 1])
+            row = matrix.row_index[pid]
+            low, high = matrix.indptr[row], matrix.indptr[row + 1]
+            entry.token_sums = dict(zip(matrix.indices[low:high].tolist(), matrix.data[low:high].tolist()))
+
+    def merge(self, later):
+        """Fold in the aggregates of a later chunk; returns self."""
+        for pid, stats in later.stats.items():
+            if pid in self.stats:
+                self.stats[pid].merge(stats, self.hasher)
+            else:
+                self.stats[pid] = stats
+        self.weighted = self.weighted or later.weighted
+        if not self.behaviors:
+            self.behaviors = later.behaviors
+        if len(later.tree):
+            tree = pd.concat([self.tree, later.tree], ignore_index=True) if len(self.tree) else later.tree
+            self.tree = _tree_rows(tree.sort_values('key', kind='stable').reset_index(drop=True))
+        return self
+
+    def _ordered(self, key):
+        """PIDs with a value for key, in order of that first-row key."""
+        return sorted((pid for pid, stats in self.stats.items() if getattr(stats, key) is not None),
+                      key=lambda pid: getattr(self.stats[pid], key))
+
+    def process_tree(self):
+        """Same result as build_process_tree_batch on all events."""
+        return build_process_tree_batch(self.tree[['pid', 'ppid', 'process']])
+
+    def behavior_scores(self, behavior_analyzer):
+        """Same result as BehaviorAnalyzer.calculate_behavior_scores on all events."""
+        pids = self._ordered('timed_first')
+        if not pids:
+            return {}
+        stats = [self.stats[pid] for pid in pids]
+        total_calls = pd.Series([sum(entry.timed.values()) for entry in stats], index=pids)
+        time_range = (pd.Series([entry.timed_end for entry in stats], index=pids) -
+                      pd.Series([entry.timed_start for entry in stats], index=pids)).dt.total_seconds()
+        distinct = pd.Series([len(entry.timed) for entry in stats], index=pids)
+        category_counts = pd.DataFrame({
+            category: [sum(entry.timed.get(syscall, 0) for syscall in set(syscalls)) for entry in stats]
+            for category, syscalls in behavior_analyzer.syscall_categories.items()
+        }, index=pids)
+        return behavior_analyzer.scores_from_counts(total_calls, time_range, distinct, category_counts)
+
+    def alerts(self, process_tree, security_analyzer):
+        """Same result as SecurityAnalyzer.analyze_processes on all events."""
+        name_alerts = {}
+        results = {}
+        for pid, process_info in process_tree.items():
+            alerts = []
+            process_name = process_info['process']
+            if process_name:
+                if process_name not in name_alerts:
+                    name_alerts[process_name] = security_analyzer.check_process_name(process_name)
+                alerts.extend(name_alerts[process_name])
+
+            stats = self.stats.get(pid)
+            if stats is None:
+                results[pid] = alerts + security_analyzer.count_alerts([], False, 0)
+                continue
+            # value_counts order: by count, ties in order of first appearance (stable sort)
+            names = sorted(stats.syscalls, key=lambda syscall: stats.syscalls[syscall][2])
+            counts = pd.Series([stats.syscalls[name][0] for name in names], index=names, dtype=np.int64)
+            resources = [sorted(values, key=values.get) for values in stats.resources.values()]
+            alerts.extend(security_analyzer.count_alerts(counts.sort_values(ascending=False, kind='stable').index,
+                                                         stats.root, stats.fails, *resources))
+            windows = sorted(stats.windows.values())
+            alerts.extend(security_analyzer.window_alerts({
+                behavior: [window[index] for window in windows]
+                for index, behavior in enumerate(self.behaviors, start=1)
+            }))
+            results[pid] = alerts
+        return results
+
+    def feature_blocks(self, ml_analyzer):
+        """Same result as MLBehaviorAnalyzer.feature_blocks on all events."""
+        pids = self._ordered('first')
+        if not pids:
+            return [], torch.zeros((0, ml_analyzer.base_feature_size), dtype=torch.float32), None
+        stats = [self.stats[pid] for pid in pids]
+        # Sampled rows count for their weight
+        value = 1 if self.weighted else 0
+        rows = np.array([entry.rows for entry in stats], dtype=np.float64)
+        total_calls = np.array([entry.weighted_rows for entry in stats], dtype=np.float64) if self.weighted else rows
+        span_seconds = (pd.Series([entry.end for entry in stats]) -
+                        pd.Series([entry.start for entry in stats])).dt.total_seconds().to_numpy()
+        category_calls = [
+            np.array([sum(entry.syscalls[syscall][value] for syscall in set(syscalls) if syscall in entry.syscalls)
+                      for entry in stats], dtype=np.float64)
+            for syscalls in ml_analyzer.syscall_categories.values()
+        ]
+        features = ml_analyzer.base_features(total_calls, span_seconds, category_calls, rows)
+
+        hashed = None
+        if ml_analyzer.hasher is not None:
+            if self.hasher is None:
+                raise ValueError("aggregates were reduced without a feature hasher")
+            indptr = np.zeros(len(pids) + 1, dtype=np.int64)
+            np.cumsum([len(entry.token_sums) for entry in stats], out=indptr[1:])
+            indices = np.zeros(indptr[-1], dtype=np.int32)
+            data = np.zeros(indptr[-1], dtype=np.float32)
+            for row, entry in enumerate(stats):
+                if entry.token_sums:
+                    columns = sorted(entry.token_sums)
+                    values = np.array([entry.token_sums[column] for column in columns], dtype=np.float32)
+                    values /= max(entry.tokens, 1)
+                    indices[indptr[row]:indptr[row + 1]] = columns
+                    data[indptr[row]:indptr[row + 1]] = values
+            hashed = HashedFeatureMatrix([int(pid) for pid in pids], indptr, indices, data, self.hasher.n_features)
+        return pids, features, hashed
+
+    def features(self, ml_analyzer):
+        """Same result as MLBehaviorAnalyzer.extract_features_batch on all events."""
+        pids, features, hashed = self.feature_blocks(ml_analyzer)
+        if not pids:
+            return [], torch.zeros((0, ml_analyzer.feature_size), dtype=torch.float32)
+        if hashed is not None:
+            features = torch.cat([features, torch.from_numpy(hashed.to_dense())], dim=1)
+        return pids, features
+
+    def report_results(self, process_tree, behavior_analyzer, ml_analyzer=None):
+        """Per-process rows of the comparison report (see analysis_reporter), one per tree node.
+
+        ML scores come from the aggregated features; without an ml_analyzer
+        they are None.
+        """
+        scores = self.behavior_scores(behavior_analyzer)
+        ml_scores = {}
+        if ml_analyzer is not None:
+            pids, features, hashed = self.feature_blocks(ml_analyzer)
+            ml_scores = dict(zip(pids, ml_analyzer.score_features(features, hashed).tolist()))
+        results = []
+        for pid, info in process_tree.items():
+            stats = self.stats.get(pid)
+            behavior_score, category_scores = scores.get(pid, (0, {}))
+            names = sorted(stats.syscalls, key=lambda syscall: stats.syscalls[syscall][2]) if stats else []
+            counts = pd.Series([stats.syscalls[name][0] for name in names], index=names, dtype=np.int64)
+            results.append({
+                'pid': pid,
+                'process': info['process'] or 'unknown',
+                'traditional_score': float(behavior_score),
+                'ml_score': ml_scores.get(pid, 0.0) if ml_analyzer is not None else None,
+                'category_scores': category_scores,
+                'syscall_details': {
+                    'count': len(names),
+                    'types': list(counts.sort_values(ascending=False, kind='stable').index),
+                    'total_events': stats.rows if stats else 0,
+                    'timestamp_count': int(round(sum(stats.timed.values()))) if stats else 0,
+                    'frequency_keys': list(stats.timed) if stats else []
+                }
+            })
+        return results
+
+    def profiles(self, syscall_categories):
+        """Same result as compute_process_profiles on all events."""
+        pids = self._ordered('first')
+        stats = [self.stats[pid] for pid in pids]
+        value = 1 if self.weighted else 0
+        summary = pd.DataFrame({
+            'process': [entry.process[1] if entry.process else None for entry in stats],
+            'user': [entry.user[1] if entry.user else None for entry in stats],
+            'total': [entry.weighted_rows if self.weighted else entry.rows for entry in stats],
+            'first': pd.to_datetime([entry.start for entry in stats]),
+            'last': pd.to_datetime([entry.end for entry in stats])
+        }, index=pids)
+        counts = np.array([
+            [sum(entry.syscalls[syscall][value] for syscall in set(syscalls) if syscall in entry.syscalls)
+             for syscalls in syscall_categories.values()]
+            for entry in stats
+        ], dtype=np.float64).reshape(len(stats), len(syscall_categories))
+        return profiles_from_counts(summary, counts)
+
+    def bounds_frame(self):
+        """Each process's first and last timestamp with its first user: enough for per-PID spans."""
+        rows = [
+            {'pid': pid, 'timestamp': timestamp, 'user': stats.user[1] if stats.user else None}
+            for pid, stats in self.stats.items()
+            for timestamp in (stats.start, stats.end)
+        ]
+        df = pd.DataFrame(rows, columns=['pid', 'timestamp', 'user'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+
+def split_log_files(log_files, chunk_bytes):
+    """(path, start, end) byte ranges of about chunk_bytes, cut at line boundaries.
+
+    A cut never separates records of one auditd event (same sequence number),
+    so each range can correlate its own records.
+    """
+    ranges = []
+    for log_file in log_files:
+        size = os.path.getsize(log_file)
+        cuts = [0]
+        with open(log_file, 'rb') as file:
+            for offset in range(chunk_bytes, size, chunk_bytes):
+                if offset <= cuts[-1]:
+                    continue
+                file.seek(offset)
+                file.readline()
+                cut = file.tell()
+                sequence = line_sequence(file.readline())
+                while sequence is not None:
+                    cut = file.tell()
+                    line = file.readline()
+                    if not line or line_sequence(line) != sequence:
+                        break
+                file.seek(cut)
+                if file.tell() < size:
+                    cuts.append(file.tell())
+        cuts.append(size)
+        ranges.extend((log_file, start, end) for start, end in zip(cuts, cuts[1:]) if end > start)
+    return ranges
+
+def _reduce_range(job):
+    """Parse one byte range of a log file and reduce it (runs in a worker)."""
+    (log_file, start, end), chunk, behaviors, hasher = job
+    logs = []
+    with open(log_file, 'rb') as file:
+        file.seek(start)
+        while file.tell() < end:
+            line = file.readline()
+            if not line:
+                break
+            try:
+                logs.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+    return ProcessAggregates.from_frame(create_dataframe(list(correlate_records(logs))), chunk, behaviors, hasher)
+
+def aggregate_log_files(log_files, behaviors=None, hasher=None, chunk_bytes=64 * 2 ** 20, workers=None):
+    """Reduce log_files chunk by chunk in a process pool and merge the results in order.
+
+    Ranges are submitted in a window of two per worker and merged as they
+    complete in order, so at most that many partial results are held
+    alongside the running total: memory depends on the chunk size and the
+    number of processes, not on the size of the capture.
+    """
+    jobs = [(byte_range, chunk, behaviors, hasher)
+            for chunk, byte_range in enumerate(split_log_files(log_files, chunk_bytes))]
+    workers = workers or os.cpu_count() or 1
+    total = ProcessAggregates(behaviors or {}, hasher)
+    if workers == 1 or len(jobs) <= 1:
+        return functools.reduce(ProcessAggregates.merge, map(_reduce_range, jobs), total)
+    workers = min(workers, len(jobs))
+    with process_pool(max_workers=workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(_reduce_range, job))
+            if len(pending) >= 2 * workers:
+                total.merge(pending.popleft().result())
+        while pending:
+            total.merge(pending.popleft().result())
+    return total
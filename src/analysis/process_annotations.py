@@ -0,0 +1,68 @@
+from collections import Counter
+
+def classify_process(pid, alerts, behavior_score):
+    """Pick the display class for a process from its alerts and behavior score."""
+    style_class = 'normal'
+    if any('Running as root' in alert for alert in alerts):
+        style_class = 'privileged'
+    if any(('⚠️' in alert or '❌' in alert) for alert in alerts):
+        style_class = 'suspicious'
+    if behavior_score > 0.7:  # High behavior score threshold
+        style_class = 'anomalous'
+    if pid == 1:
+        style_class = 'root'
+    return style_class
+
+def process_risk(annotation):
+    """Single sortable risk value for a process annotation."""
+    flagged = annotation['style_class'] in ('suspicious', 'anomalous')
+    return annotation['behavior_score'] + (1.0 if flagged else 0.0) + 0.01 * len(annotation['alerts'])
+
+def annotate_processes(process_tree, security_analyzer, behavior_analyzer, df,
+                       frequencies=None, timestamps=None, clusters=None):
+    """Run both analyzers once per process.
+
+    Uses the batch analyzers (one grouped pass over df); passing precomputed
+    frequency tables scores with the per-PID calculate_behavior_score instead.
+    With clusters ({pid: representative}) only representatives are scored and
+    every member of a cluster takes its representative's behavior score; the
+    security checks still run per process, since members may differ in the
+    syscalls, failures, windows and resources the alerts look at.
+    Returns a dict mapping pid -> {'alerts', 'behavior_score', 'category_scores', 'style_class'},
+    plus 'cluster' and 'cluster_size' when clustered.
+    """
+    analyzed, rows = process_tree, df
+    if clusters is not None:
+        analyzed = {pid: info for pid, info in process_tree.items() if clusters.get(pid, pid) == pid}
+        rows = df[df['pid'].isin(list(analyzed))]
+    all_alerts = security_analyzer.analyze_processes(process_tree, df)
+    if frequencies is None or timestamps is None:
+        scores = behavior_analyzer.calculate_behavior_scores(rows)
+    else:
+        scores = {pid: behavior_analyzer.calculate_behavior_score(frequencies, timestamps, pid)
+                  for pid in analyzed}
+    if clusters is None:
+        return annotations_from_results(process_tree, all_alerts, scores)
+    
+    representatives = {pid: clusters.get(pid, pid) for pid in process_tree}
+    scores = {pid: scores[rep] for pid, rep in representatives.items() if rep in scores}
+    annotations = annotations_from_results(process_tree, all_alerts, scores)
+    sizes = Counter(representatives.values())
+    for pid, rep in representatives.items():
+        annotations[pid]['cluster'] = rep
+        annotations[pid]['cluster_size'] = sizes[rep]
+    return annotations
+
+def annotations_from_results(process_tree, all_alerts, scores):
+    """Annotations from {pid: alerts} and {pid: (behavior_score, category_scores)}."""
+    annotations = {}
+    for pid in process_tree:
+        alerts = all_alerts[pid]
+        behavior_score, category_scores = scores.get(pid, (0, {}))
+        annotations[pid] = {
+            'alerts': alerts,
+            'behavior_score': behavior_score,
+            'category_scores': category_scores,
+            'style_class': classify_process(pid, alerts, behavior_score)
+        }
+    return annotations
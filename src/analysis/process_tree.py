@@ -1,3 +1,5 @@
+import numpy as np
+import pandas as pd
 from src.utils.pid_utils import normalize_pid
 
 def build_process_tree(df):
@@ -11,12 +13,16 @@ def build_process_tree(df):
         process = row['process']
         
         if pid not in process_tree:
-            process_tree[pid] = {'process': process, 'children': [], 'ppid': ppid}
-        elif process_tree[pid]['process'] is None:
-            process_tree[pid]['process'] = process
+            process_tree[pid] = {'pid': pid, 'process': process, 'children': [], 'ppid': ppid}
+        else:
+            if process_tree[pid]['process'] is None:
+                process_tree[pid]['process'] = process
+            # Placeholder parents learn their own parent once they log an event
+            if process_tree[pid]['ppid'] is None and ppid:
+                process_tree[pid]['ppid'] = ppid
             
         if ppid and ppid not in process_tree:
-            process_tree[ppid] = {'process': None, 'children': [], 'ppid': None}
+            process_tree[ppid] = {'pid': ppid, 'process': None, 'children': [], 'ppid': None}
     
     # Second pass: Build parent-child relationships
     for pid, info in process_tree.items():
@@ -25,4 +31,50 @@ def build_process_tree(df):
             if process_tree[pid] not in process_tree[ppid]['children']:
                 process_tree[ppid]['children'].append(process_tree[pid])
 
-    return process_tree
\ No newline at end of file
+    return process_tree
+
+def _first_positions(keys, mask):
+    """{key: first row position} over the rows where mask is set."""
+    unique, positions = np.unique(keys[mask], return_index=True)
+    return dict(zip(unique.tolist(), np.flatnonzero(mask)[positions].tolist()))
+
+def build_process_tree_batch(df):
+    """Batch counterpart of build_process_tree: the same tree, including key and
+    child order, resolved from column arrays instead of row by row."""
+    if df.empty:
+        return {}
+    pids = df['pid'].to_numpy(dtype=np.float64).astype(np.int64)
+    ppids = [normalize_pid(ppid) for ppid in df['ppid'].to_numpy(dtype=object)]
+    has_ppid = np.fromiter((ppid is not None for ppid in ppids), dtype=bool, count=len(ppids))
+    ppid_values = np.array([ppid or 0 for ppid in ppids], dtype=np.int64)
+    truthy_ppid = has_ppid & (ppid_values != 0)
+    processes = df['process'].to_numpy(dtype=object)
+    has_process = np.fromiter((process is not None for process in processes), dtype=bool, count=len(processes))
+    everything = np.ones(len(pids), dtype=bool)
+
+    # Keys appear as each row's pid, then its (truthy) ppid as a placeholder
+    sequence = np.column_stack([pids, np.where(truthy_ppid, ppid_values, -1)]).ravel()
+    order = pd.unique(sequence[sequence != -1]).tolist()
+
+    first_row = _first_positions(pids, everything)
+    first_as_parent = _first_positions(ppid_values, truthy_ppid)
+    first_named = _first_positions(pids, has_process)
+    first_truthy_ppid = _first_positions(pids, truthy_ppid)
+
+    process_tree = {}
+    for pid in order:
+        row = first_row.get(pid)
+        process = processes[first_named[pid]] if pid in first_named else None
+        if row is not None and row <= first_as_parent.get(pid, len(pids)) and has_ppid[row]:
+            # Own event came first and set the ppid directly
+            ppid = ppids[row]
+        else:
+            # Placeholder (or ppid-less first event): the first truthy ppid fills it in
+            ppid = ppids[first_truthy_ppid[pid]] if pid in first_truthy_ppid else None
+        process_tree[pid] = {'pid': pid, 'process': process, 'children': [], 'ppid': ppid}
+
+    for pid, info in process_tree.items():
+        ppid = info['ppid']
+        if ppid and ppid in process_tree:
+            process_tree[ppid]['children'].append(info)
+    return process_tree
@@ -1,5 +1,7 @@
 import re
 from collections import defaultdict
+import numpy as np
+import pandas as pd
 
 class SecurityAnalyzer:
     def __init__(self):
@@ -89,6 +91,21 @@ class SecurityAnalyzer:
                 'window': 60
             }
         }
+        
+        # Resources named by correlated auditd records (executable, PATH and SOCKADDR)
+        self.suspicious_resources = {
+            # Executables started from world-writable or memory-backed directories
+            'staging_dirs': ['/tmp/', '/var/tmp/', '/dev/shm/'],
+            # Files touched by credential theft, persistence and audit tampering
+            'sensitive_files': {
+                'credentials': ['/etc/shadow', '/etc/gshadow', '/etc/sudoers', '/.ssh/'],
+                'persistence': ['/etc/cron', '/var/spool/cron/', '/etc/systemd/system/', '/etc/ld.so.preload',
+                                '/etc/rc.local', '/etc/init.d/'],
+                'audit_tampering': ['/var/log/audit/', '/etc/audit/']
+            },
+            # Remote ports favoured by reverse shells, IRC botnets and mining pools
+            'suspicious_ports': ['4444', '1337', '31337', '6667', '3333', '5555']
+        }
 
     def check_encoded_name(self, process_name):
         """Check for encoded or obfuscated process names."""
@@ -132,17 +149,101 @@ class SecurityAnalyzer:
             
             if syscall and timestamp:
                 window_key = int(timestamp.timestamp() / 60)  # 60-second windows
-                time_windows[window_key][syscall] += 1
+                # Sampled rows count for their weight, so thresholds still apply
+                time_windows[window_key][syscall] += row.get('weight', 1)
         
         # Check each behavior pattern
         for behavior, config in self.suspicious_behaviors.items():
             for window, syscalls in time_windows.items():
                 count = sum(syscalls.get(syscall, 0) for syscall in config['syscalls'])
                 if count >= config['threshold']:
-                    alerts.append(f"⚠️ Suspicious {behavior}: {count} relevant syscalls in 60s")
+                    alerts.append(f"⚠️ Suspicious {behavior}: {round(count)} relevant syscalls in 60s")
+        
+        return alerts
+
+    def check_process_name(self, process_name):
+        """Name-based alerts: encoding, known suspicious names, attack keywords, obfuscation."""
+        alerts = []
+        
+        # Check for encoded/obfuscated names
+        alerts.extend(self.check_encoded_name(process_name))
+        
+        # Check for suspicious known names
+        for pattern in self.suspicious_patterns['suspicious_names']:
+            if pattern.lower() in str(process_name).lower():
+                alerts.append(f"⚠️ Contains suspicious pattern: {pattern}")
+        
+        # Check for attack indicators
+        for indicator in self.suspicious_patterns['attack_indicators']:
+            if indicator.lower() in str(process_name).lower():
+                alerts.append(f"⚠️ Contains attack indicator: {indicator}")
+        
+        # Check for obfuscation patterns
+        for pattern in self.suspicious_patterns['obfuscation']:
+            if re.search(pattern, str(process_name)):
+                alerts.append(f"⚠️ Possible obfuscation detected: {pattern}")
+        
+        return alerts
+
+    def _event_alerts(self, process_logs):
+        """Alerts from one process's events: syscall types, root, failures and the
+        executables, files and socket addresses of its events."""
+        syscalls = process_logs['syscall'].dropna().value_counts()
+        runs_as_root = '0' in process_logs['uid'].astype(str).values
+        failed = int((process_logs['result'] == 'fail').sum())
+        resources = [list(process_logs[column].dropna().unique()) if column in process_logs else []
+                     for column in ('exe', 'path', 'address')]
+        return self.count_alerts(syscalls.index, runs_as_root, failed, *resources)
+
+    def count_alerts(self, syscalls, runs_as_root, failed, executables=(), paths=(), addresses=()):
+        """Event alerts from a process's syscall names (most frequent first),
+        whether any event ran as uid 0, its number of failed events and its
+        distinct executables, file paths and socket addresses (in order of
+        first appearance)."""
+        alerts = []
+        for syscall_type, syscall_list in self.suspicious_syscalls.items():
+            matching_syscalls = [s for s in syscalls if s in syscall_list]
+            if matching_syscalls:
+                alerts.append(f"🔍 {syscall_type.replace('_', ' ').title()}: {', '.join(matching_syscalls)}")
+        
+        # Check for privilege escalation
+        if runs_as_root:
+            alerts.append("⚡ Running as root")
+        
+        # Check for failed operations
+        if failed:
+            alerts.append(f"❌ {failed} failed operations")
         
+        alerts.extend(self.resource_alerts(executables, paths, addresses))
         return alerts
 
+    def resource_alerts(self, executables, paths, addresses):
+        """Alerts on the executables, files and socket addresses a process used."""
+        rules = self.suspicious_resources
+        alerts = []
+        staged = [exe for exe in executables if str(exe).startswith(tuple(rules['staging_dirs']))]
+        if staged:
+            alerts.append(f"⚠️ Executable in writable directory: {', '.join(map(str, staged))}")
+        for category, patterns in rules['sensitive_files'].items():
+            matching_paths = [path for path in paths if any(pattern in str(path) for pattern in patterns)]
+            if matching_paths:
+                alerts.append(f"🔍 Sensitive files ({category.replace('_', ' ')}): {', '.join(map(str, matching_paths))}")
+        ports = set(rules['suspicious_ports'])
+        flagged = [address for address in addresses if str(address).rpartition(':')[2] in ports]
+        if flagged:
+            alerts.append(f"⚠️ Connection to suspicious port: {', '.join(map(str, flagged))}")
+        return alerts
+
+    def window_alerts(self, window_counts):
+        """Behavior alerts from {behavior: relevant syscall counts per 60s window}
+        (weighted counts for sampled captures)."""
+        return [
+            f"⚠️ Suspicious {behavior}: {round(count)} relevant syscalls in 60s"
+            for behavior, config in self.suspicious_behaviors.items()
+            for count in window_counts.get(behavior, ())
+            if count >= config['threshold']
+        ]
+
     def analyze_process(self, pid, process_info, df):
         """Analyze a process for suspicious behavior."""
         alerts = []
@@ -151,41 +252,11 @@ class SecurityAnalyzer:
             
             # Check process name patterns
             if process_name:
-                # Check for encoded/obfuscated names
-                alerts.extend(self.check_encoded_name(process_name))
-                
-                # Check for suspicious known names
-                for pattern in self.suspicious_patterns['suspicious_names']:
-                    if pattern.lower() in str(process_name).lower():
-                        alerts.append(f"⚠️ Contains suspicious pattern: {pattern}")
-                
-                # Check for attack indicators
-                for indicator in self.suspicious_patterns['attack_indicators']:
-                    if indicator.lower() in str(process_name).lower():
-                        alerts.append(f"⚠️ Contains attack indicator: {indicator}")
-                
-                # Check for obfuscation patterns
-                for pattern in self.suspicious_patterns['obfuscation']:
-                    if re.search(pattern, str(process_name)):
-                        alerts.append(f"⚠️ Possible obfuscation detected: {pattern}")
+                alerts.extend(self.check_process_name(process_name))
             
             # Analyze syscall patterns
             process_logs = df[df['pid'] == pid]
-            syscalls = process_logs['syscall'].dropna().value_counts()
-            
-            for syscall_type, syscall_list in self.suspicious_syscalls.items():
-                matching_syscalls = [s for s in syscalls.index if s in syscall_list]
-                if matching_syscalls:
-                    alerts.append(f"🔍 {syscall_type.replace('_', ' ').title()}: {', '.join(matching_syscalls)}")
-            
-            # Check for privilege escalation
-            if '0' in process_logs['uid'].astype(str).values:
-                alerts.append("⚡ Running as root")
-            
-            # Check for failed operations
-            failed_ops = process_logs[process_logs['result'] == 'fail']
-            if not failed_ops.empty:
-                alerts.append(f"❌ {len(failed_ops)} failed operations")
+            alerts.extend(self._event_alerts(process_logs))
             
             # Analyze syscall patterns over time
             alerts.extend(self.analyze_syscall_patterns(df, pid))
@@ -193,4 +264,54 @@ class SecurityAnalyzer:
         except Exception as e:
             print(f"Error analyzing process {pid}: {str(e)}")
             
-        return alerts
\ No newline at end of file
+        return alerts
+
+    def analyze_processes(self, process_tree, df):
+        """Batch counterpart of analyze_process for every process in the tree.
+
+        The table is grouped by PID once instead of filtered once per process,
+        the behavior windows are computed for all rows up front and name
+        checks are shared between processes with the same name.
+        Returns {pid: alerts}.
+        """
+        positions = df.groupby('pid', sort=False).indices
+        
+        # analyze_syscall_patterns only counts rows with a truthy syscall and timestamp
+        syscall_values = df['syscall'].to_numpy(dtype=object)
+        counted = np.fromiter((bool(v) for v in syscall_values), dtype=bool, count=len(df))
+        counted &= df['timestamp'].notna().to_numpy()
+        # Same 60s windows as int(timestamp.timestamp() / 60)
+        seconds = np.round(df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9, 6)
+        windows = np.where(counted, seconds / 60, 0).astype(np.int64)
+        # Sampled rows count for their weight, so thresholds still apply
+        weights = df['weight'].to_numpy(dtype=np.float64) if 'weight' in df else np.ones(len(df))
+        behavior_hits = {
+            behavior: (df['syscall'].isin(config['syscalls']).to_numpy() & counted) * weights
+            for behavior, config in self.suspicious_behaviors.items()
+        }
+        
+        name_alerts = {}
+        results = {}
+        for pid, process_info in process_tree.items():
+            alerts = []
+            try:
+                process_name = process_info['process']
+                if process_name:
+                    if process_name not in name_alerts:
+                        name_alerts[process_name] = self.check_process_name(process_name)
+                    alerts.extend(name_alerts[process_name])
+                
+                rows = positions.get(pid, np.zeros(0, dtype=np.int64))
+                alerts.extend(self._event_alerts(df.iloc[rows]))
+                
+                # Windows in order of first appearance, as the per-PID dict builds them
+                rows = rows[counted[rows]]
+                window_codes, _ = pd.factorize(windows[rows])
+                alerts.extend(self.window_alerts({
+                    behavior: np.bincount(window_codes, weights=behavior_hits[behavior][rows])
+                    for behavior in self.suspicious_behaviors
+                }))
+            except Exception as e:
+                print(f"Error analyzing process {pid}: {str(e)}")
+            results[pid] = alerts
+        return results
@@ -1,5 +1,12 @@
 """Data loading and processing modules."""
 from .log_loader import load_audit_log
 from .data_processor import create_dataframe
+from .synthetic_generator import generate_audit_log
+from .event_filter import EventFilter
+from .sampling import EventSampler
+from .event_store import EventStore
+from .fleet_loader import event_host, merge_log_streams, load_host_frames
+from .record_correlation import correlate_records
 
-__all__ = ['load_audit_log', 'create_dataframe']
\ No newline at end of file
+__all__ = ['load_audit_log', 'create_dataframe', 'generate_audit_log', 'EventFilter', 'EventSampler', 'EventStore',
+           'event_host', 'merge_log_streams', 'load_host_frames', 'correlate_records']
\ No newline at end of file
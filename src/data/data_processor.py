@@ -1,9 +1,17 @@
 import pandas as pd
 from ..utils.pid_utils import normalize_pid
+from .record_correlation import record_executable, record_path, record_address
 
-def create_dataframe(logs):
-    """Create DataFrame from parsed logs with normalized PIDs."""
-    df = pd.DataFrame([{
+# Columns of the event table, in order (sampled captures add 'weight')
+EVENT_COLUMNS = ['timestamp', 'user', 'uid', 'process', 'pid', 'ppid', 'syscall', 'event_type', 'result',
+                 'exe', 'path', 'address']
+
+# Enrichment columns from correlated auditd records, dictionary-encoded (few distinct values)
+ENRICHMENT_COLUMNS = ['exe', 'path', 'address']
+
+def event_record(log):
+    """One parsed log as a dict of EVENT_COLUMNS values with normalized PIDs."""
+    return {
         'timestamp': log.get('@timestamp'),  # Get timestamp from root level
         'user': log.get('user', {}).get('name'),
         'uid': log.get('user', {}).get('id'),
@@ -12,11 +20,31 @@ def create_dataframe(logs):
         'ppid': normalize_pid(log.get('process', {}).get('parent', {}).get('pid')),
         'syscall': log.get('auditd', {}).get('data', {}).get('syscall'),
         'event_type': log.get('auditd', {}).get('message_type'),
-        'result': log.get('auditd', {}).get('result')
-    } for log in logs if 'process' in log])
-    
+        'result': log.get('auditd', {}).get('result'),
+        'exe': record_executable(log),
+        'path': record_path(log),
+        'address': record_address(log)
+    }
+
+def finish_dataframe(df):
+    """Parse timestamps, dictionary-encode enrichment columns and drop PID-less rows of a raw event table."""
     # Convert timestamp to datetime
     if 'timestamp' in df.columns:
         df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
-    return df.dropna(subset=['pid'])
\ No newline at end of file
+    for column in ENRICHMENT_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+
+    return df.dropna(subset=['pid'])
+
+def create_dataframe(logs):
+    """Create DataFrame from parsed logs with normalized PIDs.
+
+    Sampled logs add a 'weight' column: the number of events each row stands for.
+    """
+    sampled = any('sample_weight' in log for log in logs)
+    df = pd.DataFrame([{
+        **event_record(log),
+        **({'weight': log.get('sample_weight', 1.0)} if sampled else {})
+    } for log in logs if 'process' in log])
+    return finish_dataframe(df)
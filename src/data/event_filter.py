@@ -0,0 +1,209 @@
+import json
+import os
+import re
+from datetime import datetime, timezone
+from .record_correlation import correlate_records, sequence_runs
+
+_TIMESTAMP = re.compile(rb'"@timestamp":\s*"([^"]+)"')
+_PID = re.compile(rb'"pid":\s*(\d+)')
+
+def _byte_tokens(values):
+    """Unquoted byte forms a value can take inside an NDJSON line: raw UTF-8,
+    JSON-escaped (with and without \\u escapes) and with escaped slashes."""
+    tokens = set()
+    for value in values:
+        for form in (value, json.dumps(value)[1:-1], json.dumps(value, ensure_ascii=False)[1:-1]):
+            tokens.update((form.encode('utf-8'), form.replace('/', '\\/').encode('utf-8')))
+    return [token for token in tokens if token]
+
+def _parse_time(value):
+    """Timezone-aware datetime from a datetime or ISO string (naive means UTC)."""
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('ascii', 'replace')
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip())
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+class EventFilter:
+    """Event selection pushed down into load_audit_log.
+
+    Filter kinds are combined with AND, values within a kind with OR. start is
+    inclusive and end exclusive. subtree_pids keeps the given processes and all
+    their descendants. With include_ancestors, the first event of every
+    ancestor of a kept process is kept too, so the tree stays connected.
+    """
+
+    def __init__(self, start=None, end=None, users=(), uids=(), executables=(), subtree_pids=(),
+                 include_ancestors=True):
+        self.start = _parse_time(start)
+        self.end = _parse_time(end)
+        self.users = {str(user) for user in users}
+        self.uids = {str(uid) for uid in uids}
+        self.executables = {str(executable) for executable in executables}
+        self.subtree_pids = {int(pid) for pid in subtree_pids}
+        self.include_ancestors = include_ancestors
+
+        # Byte substrings at least one of which must occur in a matching line;
+        # unquoted, so numeric uids and executables matched by basename still pass
+        self._user_tokens = _byte_tokens(self.users | self.uids)
+        self._executable_tokens = _byte_tokens(
+            self.executables | {os.path.basename(executable) for executable in self.executables})
+
+    @property
+    def active(self):
+        return bool(self.start or self.end or self.users or self.uids or self.executables or self.subtree_pids)
+
+    def __repr__(self):
+        return (f"EventFilter(start={self.start}, end={self.end}, users={sorted(self.users)}, "
+                f"uids={sorted(self.uids)}, executables={sorted(self.executables)}, "
+                f"subtree_pids={sorted(self.subtree_pids)}, include_ancestors={self.include_ancestors})")
+
+    def _in_time_range(self, timestamp):
+        return ((self.start is None or timestamp >= self.start) and
+                (self.end is None or timestamp < self.end))
+
+    def prefilter(self, line):
+        """Cheap byte-level check; False only if the line cannot match (false positives are fine)."""
+        if self.start or self.end:
+            match = _TIMESTAMP.search(line)
+            if match is None:
+                return False
+            try:
+                if not self._in_time_range(_parse_time(match.group(1))):
+                    return False
+            except ValueError:
+                pass  # Unusual format: leave it to the exact check
+        if self._user_tokens and not any(token in line for token in self._user_tokens):
+            return False
+        if self._executable_tokens and not any(token in line for token in self._executable_tokens):
+            return False
+        return True
+
+    def matches(self, log):
+        """Exact check on a parsed event (subtree membership is checked separately)."""
+        if self.start or self.end:
+            try:
+                if not self._in_time_range(_parse_time(log.get('@timestamp'))):
+                    return False
+            except (TypeError, ValueError):
+                return False
+        if self.users or self.uids:
+            user = log.get('user', {})
+            if str(user.get('name')) not in self.users and str(user.get('id')) not in self.uids:
+                return False
+        if self.executables:
+            process = log.get('process', {})
+            executable = process.get('executable') or ''
+            if not ({process.get('name'), executable, os.path.basename(executable)} & self.executables):
+                return False
+        return True
+
+def _line_process(line, known):
+    """(pid, ppid) of a line, json-parsing only lines whose set of mentioned PIDs is new."""
+    key = frozenset(_PID.findall(line))
+    if key not in known:
+        try:
+            process = json.loads(line).get('process') or {}
+        except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+            process = {}
+        pid, ppid = process.get('pid'), (process.get('parent') or {}).get('pid')
+        known[key] = (int(pid) if pid is not None else None, int(ppid) if ppid is not None else None)
+    return known[key]
+
+def _merged_runs(log_file, runs, weights=None):
+    """{first line number: merged event} for runs (tuples of line numbers) of log_file.
+
+    Only the lines of the current run are held while it is parsed.
+    """
+    wanted = {number for numbers in runs for number in numbers}
+    ends = {numbers[-1]: numbers for numbers in runs}
+    merged, pending = {}, []
+    last = max(wanted, default=-1)
+    with open(log_file, 'rb') as file:
+        for number, line in enumerate(file):
+            if number > last:
+                break
+            if number not in wanted:
+                continue
+            try:
+                log = json.loads(line)
+                if weights is not None:
+                    log['sample_weight'] = weights.get(number, 1.0)
+                pending.append(log)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                pass
+            if number in ends:
+                for event in correlate_records(pending):
+                    merged[ends[number][0]] = event
+                pending = []
+    return merged
+
+def filter_audit_log(log_file, event_filter, sampler=None):
+    """Parse only the events of log_file that pass event_filter (plus their ancestor chain).
+
+    The first streaming pass rejects most lines with byte-level checks and
+    records each process's parent and first event, json-parsing only the first
+    line of each new set of mentioned PIDs. Records of one auditd event (same
+    sequence number) are selected, sampled and matched together, so companion
+    records without a user or process (PATH, SOCKADDR) stay with their
+    SYSCALL record. The second pass parses just the selected lines, so memory
+    holds line numbers rather than raw events. With an EventSampler the
+    candidates are sampled before they are parsed. Returns merged events.
+    """
+    known, parents, first_runs = {}, {}, {}
+    candidates = []
+    with open(log_file, 'rb') as file:
+        for run in sequence_runs(enumerate(file)):
+            numbers = tuple(number for number, _ in run)
+            run_pid = None
+            for number, line in run:
+                pid, ppid = _line_process(line, known)
+                if pid is None:
+                    continue
+                run_pid = pid if run_pid is None else run_pid
+                if parents.get(pid) is None:
+                    parents[pid] = ppid
+                first_runs.setdefault(pid, numbers)
+            if any(event_filter.prefilter(line) for _, line in run):
+                candidates.append((numbers, run_pid))
+
+    if event_filter.subtree_pids:
+        children = {}
+        for pid, ppid in parents.items():
+            children.setdefault(ppid, []).append(pid)
+        members, stack = set(event_filter.subtree_pids), list(event_filter.subtree_pids)
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                if child not in members:
+                    members.add(child)
+                    stack.append(child)
+        candidates = [(numbers, pid) for numbers, pid in candidates if pid in members]
+
+    weights = None
+    if sampler is not None:
+        wanted = {number for numbers, _ in candidates for number in numbers}
+        with open(log_file, 'rb') as file:
+            weights = sampler.select((number, line) for number, line in enumerate(file) if number in wanted)
+        candidates = [(numbers, pid) for numbers, pid in candidates if numbers[0] in weights]
+    kept = {
+        number: event
+        for number, event in _merged_runs(log_file, [numbers for numbers, _ in candidates], weights).items()
+        if event_filter.matches(event)
+    }
+
+    if event_filter.include_ancestors:
+        kept_pids = {pid for numbers, pid in candidates if numbers[0] in kept and pid is not None}
+        ancestor_runs, visited = [], set(kept_pids)
+        for pid in kept_pids:
+            ancestor = parents.get(pid)
+            # Stop at the first ancestor already handled (this also ends ppid cycles)
+            while ancestor is not None and ancestor not in visited:
+                visited.add(ancestor)
+                if ancestor in first_runs and first_runs[ancestor][0] not in kept:
+                    ancestor_runs.append(first_runs[ancestor])
+                ancestor = parents.get(ancestor)
+        kept.update(_merged_runs(log_file, ancestor_runs, {} if weights is not None else None))
+
+    return [kept[number] for number in sorted(kept)]
@@ -0,0 +1,231 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from .data_processor import EVENT_COLUMNS, event_record, finish_dataframe
+from .log_loader import load_audit_log
+from .record_correlation import correlate_records
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE events (
+    timestamp TEXT, ts INTEGER, user TEXT, uid TEXT, process TEXT, pid INTEGER NOT NULL,
+    ppid INTEGER, syscall TEXT, event_type TEXT, result TEXT, exe TEXT, path TEXT, address TEXT, weight REAL
+);
+"""
+
+# Bump when the events table or its indexes change so stores written by older versions are reloaded
+SCHEMA_VERSION = '3'
+
+# Built after the bulk load, which is much faster than maintaining them per insert.
+# Every query reads by PID (and time); tree_frame also groups by parent. No query
+# filters on syscall, so an index on it would only slow the load down.
+INDEXES = [
+    "CREATE INDEX events_pid_ts ON events (pid, ts)",
+    "CREATE INDEX events_ppid ON events (ppid)"
+]
+
+_INSERT = (f"INSERT INTO events ({', '.join(EVENT_COLUMNS)}, ts, weight) "
+           f"VALUES ({', '.join('?' * (len(EVENT_COLUMNS) + 2))})")
+
+def _timestamp_ns(value):
+    """Epoch nanoseconds of an ISO timestamp, or None."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed - _EPOCH) // timedelta(microseconds=1) * 1000
+
+def _parse_stream(log_file):
+    with open(log_file, 'r') as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def _stream_logs(log_file):
+    """Parsed events of log_file, one at a time, with each auditd event's records merged."""
+    return correlate_records(_parse_stream(log_file))
+
+class EventStore:
+    """Parsed events in an SQLite file, for captures larger than memory.
+
+    Events are bulk-loaded in batches and indexed on (pid, ts) and ppid afterwards. Analyses read bounded chunks of whole processes through one
+    cursor (iter_process_frames) or the few rows they need (tree_frame,
+    process_bounds, process_frame), so memory depends on the chunk size and
+    the number of processes, not on the number of events. Each call opens its
+    own connection, so a store can be shared between stage threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        return f"EventStore({self.path!r})"
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def _meta(self, key):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with self._connect() as connection:
+                row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.DatabaseError:
+            return None
+        return row[0] if row else None
+
+    @property
+    def sampled(self):
+        return self._meta('sampled') == '1'
+
+    def ingest(self, log_files, source, event_filter=None, sampler=None, batch_size=50000):
+        """Load log_files into a fresh store unless it already holds the same source.
+
+        source identifies the inputs and load options; returns the number of
+        events loaded (0 when the existing store was reused).
+        """
+        if self._meta('source') == source and self._meta('schema') == SCHEMA_VERSION:
+            return 0
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        connection = self._connect()
+        try:
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.executescript(SCHEMA)
+            loaded, batch = 0, []
+            for log_file in log_files:
+                # Filtered and sampled loads are already reduced; full loads are streamed
+                if (event_filter is not None and event_filter.active) or sampler is not None:
+                    logs = load_audit_log(log_file, event_filter, sampler)
+                else:
+                    logs = _stream_logs(log_file)
+                for log in logs:
+                    if 'process' not in log:
+                        continue
+                    record = event_record(log)
+                    if record['pid'] is None:
+                        continue
+                    batch.append(tuple(record.values()) + (_timestamp_ns(record['timestamp']),
+                                                           log.get('sample_weight')))
+                    if len(batch) >= batch_size:
+                        connection.executemany(_INSERT, batch)
+                        loaded += len(batch)
+                        batch = []
+            connection.executemany(_INSERT, batch)
+            loaded += len(batch)
+
+            for statement in INDEXES:
+                connection.execute(statement)
+            connection.execute("ANALYZE")
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('sampled', '1' if sampler is not None else '0'),
+                ('schema', SCHEMA_VERSION),
+                ('source', source)  # written last: a store without it is incomplete
+            ])
+            connection.commit()
+        finally:
+            connection.close()
+        return loaded
+
+    def _frame(self, rows, columns):
+        """DataFrame shaped like create_dataframe's output from query rows."""
+        df = pd.DataFrame(rows, columns=columns)
+        if 'weight' in df and not self.sampled:
+            df = df.drop(columns=['weight'])
+        return finish_dataframe(df)
+
+    def _columns(self):
+        return EVENT_COLUMNS + ['weight']
+
+    def empty_frame(self):
+        return self._frame([], self._columns())
+
+    def iter_process_frames(self, chunk_rows=500000):
+        """Yield event tables of about chunk_rows rows, each holding whole processes.
+
+        Rows come from one cursor ordered by (pid, ts) through the
+        events_pid_ts index, so no chunk needs more than its own rows.
+        """
+        columns = self._columns()
+        connection = self._connect()
+        try:
+            cursor = connection.execute(f"SELECT {', '.join(columns)} FROM events ORDER BY pid, ts, rowid")
+            pid_column = columns.index('pid')
+            pending = []
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                pending.extend(rows)
+                # Hold back the last (possibly incomplete) process
+                last_pid = pending[-1][pid_column]
+                cut = len(pending)
+                while cut > 0 and pending[cut - 1][pid_column] == last_pid:
+                    cut -= 1
+                if cut:
+                    yield self._frame(pending[:cut], columns)
+                    pending = pending[cut:]
+            if pending:
+                yield self._frame(pending, columns)
+        finally:
+            connection.close()
+
+    def process_frame(self, pids, start=None, end=None):
+        """Events of the given PIDs, optionally within [start, end) epoch nanoseconds."""
+        columns = self._columns()
+        pids = [int(pid) for pid in pids]
+        query = f"SELECT {', '.join(columns)} FROM events WHERE pid IN ({', '.join('?' * len(pids))})"
+        params = list(pids)
+        if start is not None:
+            query += " AND ts >= ?"
+            params.append(int(start))
+        if end is not None:
+            query += " AND ts < ?"
+            params.append(int(end))
+        with self._connect() as connection:
+            rows = connection.execute(query + " ORDER BY pid, ts, rowid", params).fetchall()
+        return self._frame(rows, columns)
+
+    def tree_frame(self):
+        """The few rows build_process_tree_batch needs, in load order.
+
+        Per PID: its first row, first named row and first row with a parent;
+        per parent: the first row naming it. These decide every key, name,
+        parent and the key order, so the tree equals the one built from all rows.
+        """
+        columns = self._columns()
+        query = f"""
+            SELECT {', '.join(columns)} FROM events WHERE rowid IN (
+                SELECT MIN(rowid) FROM events GROUP BY pid
+                UNION SELECT MIN(rowid) FROM events WHERE process IS NOT NULL GROUP BY pid
+                UNION SELECT MIN(rowid) FROM events WHERE ppid IS NOT NULL AND ppid != 0 GROUP BY pid
+                UNION SELECT MIN(rowid) FROM events WHERE ppid IS NOT NULL AND ppid != 0 GROUP BY ppid
+            ) ORDER BY rowid
+        """
+        with self._connect() as connection:
+            rows = connection.execute(query).fetchall()
+        return self._frame(rows, columns)
+
+    def process_bounds(self):
+        """Each process's first and last event (by time): enough for per-PID spans."""
+        columns = self._columns()
+        selected = ', '.join(columns)
+        query = f"""
+            SELECT {selected} FROM (SELECT {selected}, MIN(ts) FROM events GROUP BY pid)
+            UNION ALL
+            SELECT {selected} FROM (SELECT {selected}, MAX(ts) FROM events GROUP BY pid)
+        """
+        with self._connect() as connection:
+            rows = connection.execute(query).fetchall()
+        return self._frame(rows, columns)
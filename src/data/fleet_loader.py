@@ -0,0 +1,68 @@
+import heapq
+import pandas as pd
+from .event_filter import _parse_time
+from .log_loader import iter_audit_log
+from .data_processor import EVENT_COLUMNS, event_record, finish_dataframe
+
+# Auditbeat fields naming the host an event came from, most specific first
+HOST_FIELDS = [('host', 'name'), ('host', 'hostname'), ('agent', 'hostname'), ('host', 'id')]
+
+UNKNOWN_HOST = 'unknown-host'
+
+def event_host(log):
+    """Host name of an auditbeat event, or UNKNOWN_HOST if it has none."""
+    for section, field in HOST_FIELDS:
+        value = (log.get(section) or {}).get(field)
+        if value:
+            return str(value)
+    return UNKNOWN_HOST
+
+def _host_tagged(logs):
+    """(host, log) pairs; events without host fields (e.g. auditd PATH records) take the host
+    of the event before them in the same file."""
+    host = UNKNOWN_HOST
+    for log in logs:
+        found = event_host(log)
+        if found != UNKNOWN_HOST:
+            host = found
+        yield host, log
+
+def _timed(records):
+    """(sort key, position, host, log); events without a parseable time keep the previous one."""
+    last = float('-inf')
+    for position, (host, log) in enumerate(records):
+        try:
+            last = _parse_time(log['@timestamp']).timestamp()
+        except (KeyError, TypeError, ValueError, AttributeError):
+            pass
+        yield last, position, host, log
+
+def merge_log_streams(streams):
+    """K-way merge of time-ordered event streams into one time-ordered stream of (host, log).
+
+    Each stream is read lazily and only one pending event per stream is held;
+    ties keep the order of the streams.
+    """
+    timed = (_timed(_host_tagged(stream)) for stream in streams)
+    for _, _, host, log in heapq.merge(*timed, key=lambda item: item[0]):
+        yield host, log
+
+def load_host_frames(log_files, event_filter=None, sampler=None):
+    """Stream every file (auditbeat writes each in time order) through the merge and split by host.
+
+    Files are read lazily, so only the compact event rows of each host are
+    kept, never the raw events. Returns {host: event table} in order of each
+    host's first event; sampled captures add a 'weight' column.
+    """
+    hosts = {}
+    columns = EVENT_COLUMNS + (['weight'] if sampler is not None else [])
+    streams = [iter_audit_log(log_file, event_filter, sampler) for log_file in log_files]
+    for host, log in merge_log_streams(streams):
+        rows = hosts.setdefault(host, [])
+        if 'process' in log:
+            row = event_record(log)
+            if sampler is not None:
+                row['weight'] = log.get('sample_weight', 1.0)
+            rows.append(row)
+    return {host: finish_dataframe(pd.DataFrame(rows, columns=columns))
+            for host, rows in hosts.items()}
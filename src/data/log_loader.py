@@ -1,13 +1,39 @@
 import json
 from ..utils.pid_utils import normalize_pid
+from .event_filter import filter_audit_log
+from .sampling import sample_audit_log
+from .record_correlation import correlate_records
 
-def load_audit_log(log_file):
-    """Load and parse audit logs from file."""
-    logs = []
+def _parse_lines(log_file):
     with open(log_file, 'r') as file:
         for line in file:
             try:
-                logs.append(json.loads(line))
+                yield json.loads(line)
             except json.JSONDecodeError:
                 continue
-    return logs
\ No newline at end of file
+
+def load_audit_log(log_file, event_filter=None, sampler=None):
+    """Load and parse audit logs from file.
+
+    Records of one auditd event (same sequence number) are merged into a
+    single event; filters and samplers keep or drop those records together.
+    With an active EventFilter only matching events (and the first event of
+    each of their ancestors) are parsed and returned. With an EventSampler
+    only a weighted sample is parsed; each event carries its 'sample_weight'.
+    """
+    if event_filter is not None and event_filter.active:
+        return filter_audit_log(log_file, event_filter, sampler)
+    if sampler is not None:
+        return list(correlate_records(sample_audit_log(log_file, sampler)))
+    return list(correlate_records(_parse_lines(log_file)))
+
+def iter_audit_log(log_file, event_filter=None, sampler=None):
+    """Like load_audit_log, but reads the file lazily when no filter or sampler is active.
+
+    Filters (ancestor lookups) and samplers (reservoirs) need the whole file,
+    so with either one the selected events are loaded first.
+    """
+    if (event_filter is not None and event_filter.active) or sampler is not None:
+        yield from load_audit_log(log_file, event_filter, sampler)
+    else:
+        yield from correlate_records(_parse_lines(log_file))
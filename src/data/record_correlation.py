@@ -0,0 +1,105 @@
+import re
+
+_SEQUENCE = re.compile(rb'"sequence":\s*(\d+)')
+
+def record_sequence(log):
+    """auditd sequence number of a parsed record, or None."""
+    return (log.get('auditd') or {}).get('sequence')
+
+def line_sequence(line):
+    """auditd sequence number of a raw NDJSON line (bytes) without parsing it, or None."""
+    match = _SEQUENCE.search(line)
+    return int(match.group(1)) if match else None
+
+def sequence_runs(lines):
+    """Lists of consecutive (number, line bytes) pairs sharing an auditd sequence number.
+
+    Lines without a sequence number form runs of their own, so filters and
+    samplers can keep or drop the records of one event together.
+    """
+    run, sequence = [], None
+    for number, line in lines:
+        current = line_sequence(line)
+        if run and (current is None or current != sequence):
+            yield run
+            run = []
+        run.append((number, line))
+        sequence = current
+        if current is None:
+            yield run
+            run = []
+    if run:
+        yield run
+
+def record_executable(log):
+    return (log.get('process') or {}).get('executable')
+
+def record_path(log):
+    """File path of a record: file.path, else the last non-PARENT auditd.paths entry."""
+    path = (log.get('file') or {}).get('path')
+    if path:
+        return path
+    names = [item.get('name') for item in (log.get('auditd') or {}).get('paths') or ()
+             if item.get('name') and item.get('nametype') != 'PARENT']
+    return names[-1] if names else None
+
+def record_address(log):
+    """Socket address of a record as 'ip:port' (destination.*, else auditd.data.socket)."""
+    destination = log.get('destination') or {}
+    if destination.get('address'):
+        return str(destination['address'])
+    socket = ((log.get('auditd') or {}).get('data') or {}).get('socket') or {}
+    ip = destination.get('ip') or socket.get('addr') or socket.get('path')
+    port = destination.get('port') or socket.get('port')
+    if not ip:
+        return None
+    return f"{ip}:{port}" if port is not None else str(ip)
+
+def _is_syscall(log):
+    return bool(((log.get('auditd') or {}).get('data') or {}).get('syscall'))
+
+def _merge(records):
+    """One event from the records of one sequence number.
+
+    The SYSCALL record (else the first record with a process) is kept and
+    takes the executable, file path and socket address of the other records
+    (PATH, EXECVE, CWD, SOCKADDR) where it has none of its own.
+    """
+    primary = next((log for log in records if _is_syscall(log)), None) \
+        or next((log for log in records if 'process' in log), records[0])
+    for log in records:
+        if log is primary:
+            continue
+        executable = record_executable(log)
+        if executable and 'process' in primary and not record_executable(primary):
+            primary['process']['executable'] = executable
+        path = record_path(log)
+        if path and not record_path(primary):
+            primary.setdefault('file', {})['path'] = path
+        address = record_address(log)
+        if address and not record_address(primary):
+            primary.setdefault('destination', {})['address'] = address
+    return primary
+
+def correlate_records(logs):
+    """Merge consecutive auditd records sharing a sequence number into one event.
+
+    auditd writes every record of an event (SYSCALL, EXECVE, PATH, CWD,
+    SOCKADDR) back to back under the same sequence number; only the merged
+    event is yielded, so companion records no longer become rows of their
+    own. Records without a sequence number pass through unchanged. Streams:
+    only the records of the current sequence number are held.
+    """
+    group, sequence = [], None
+    for log in logs:
+        current = record_sequence(log)
+        if group and (current is None or current != sequence):
+            yield _merge(group) if len(group) > 1 else group[0]
+            group = []
+        if current is None:
+            yield log
+        else:
+            group.append(log)
+            sequence = current
+    if group:
+        yield _merge(group) if len(group) > 1 else group[0]
@@ -0,0 +1,115 @@
+import json
+import random
+import re
+import zlib
+from .event_filter import _line_process
+from .record_correlation import sequence_runs
+
+_SYSCALL = re.compile(rb'"syscall":\s*"([^"]+)"')
+_FAILED = re.compile(rb'"result":\s*"fail')
+
+SAMPLING_METHODS = ('hash', 'reservoir')
+
+class EventSampler:
+    """Approximate ingest for captures too large to analyze in full.
+
+    'hash' keeps each event whose line hash falls below rate, so the same
+    capture always yields the same sample. 'reservoir' keeps a uniform sample
+    of at most reservoir_size events per PID. Some events are always kept with
+    weight 1: the first event of every process (so the tree stays complete),
+    failed events, syscalls in keep_syscalls and the first rare_count events
+    of every syscall (so rare syscalls are never sampled away). Sampled events
+    carry the inverse of their inclusion probability as weight, so weighted
+    counts estimate the counts of the full capture. The records of one auditd
+    event (same sequence number) are kept or dropped together, with one weight.
+    """
+
+    def __init__(self, method='hash', rate=0.1, reservoir_size=1000, rare_count=50, keep_syscalls=(), seed=0):
+        if method not in SAMPLING_METHODS:
+            raise ValueError(f"unknown sampling method {method!r}")
+        if method == 'hash' and not 0 < rate <= 1:
+            raise ValueError("sampling rate must be in (0, 1]")
+        if method == 'reservoir' and reservoir_size < 1:
+            raise ValueError("reservoir size must be at least 1")
+        self.method = method
+        self.rate = rate
+        self.reservoir_size = reservoir_size
+        self.rare_count = rare_count
+        self.keep_syscalls = {str(syscall).encode('utf-8') for syscall in keep_syscalls}
+        self.seed = seed
+
+    def __repr__(self):
+        size = f"rate={self.rate}" if self.method == 'hash' else f"reservoir_size={self.reservoir_size}"
+        return (f"EventSampler(method={self.method!r}, {size}, rare_count={self.rare_count}, "
+                f"keep_syscalls={sorted(syscall.decode() for syscall in self.keep_syscalls)}, seed={self.seed})")
+
+    def select(self, lines):
+        """{line number: weight} for the events kept out of (number, line bytes) pairs.
+
+        Every line of a kept event's sequence run gets the event's weight.
+
+        Only line numbers and the lines of the current event are held, so callers
+        stream the file once to select and once more to parse the sample.
+        """
+        selected = {}
+        known, seen_pids, syscall_counts = {}, set(), {}
+        reservoirs, offered = {}, {}
+        rng = random.Random(self.seed)
+        threshold = self.rate * 2 ** 32 if self.method == 'hash' else None
+
+        for run in sequence_runs(lines):
+            numbers = [number for number, _ in run]
+            pid = next((pid for pid, _ in (_line_process(line, known) for _, line in run) if pid is not None), None)
+            line = run[0][1] if len(run) == 1 else b''.join(line for _, line in run)
+            match = _SYSCALL.search(line)
+            syscall = match.group(1) if match else None
+            count = syscall_counts.get(syscall, 0)
+            syscall_counts[syscall] = count + 1
+
+            if pid not in seen_pids or count < self.rare_count or syscall in self.keep_syscalls \
+                    or _FAILED.search(line):
+                seen_pids.add(pid)
+                selected.update(dict.fromkeys(numbers, 1.0))
+            elif self.method == 'hash':
+                if zlib.crc32(line, self.seed) < threshold:
+                    selected.update(dict.fromkeys(numbers, 1 / self.rate))
+            else:
+                # Algorithm R over the events of each PID that are not always kept
+                seen = offered[pid] = offered.get(pid, 0) + 1
+                reservoir = reservoirs.setdefault(pid, [])
+                if len(reservoir) < self.reservoir_size:
+                    reservoir.append(numbers)
+                else:
+                    slot = rng.randrange(seen)
+                    if slot < self.reservoir_size:
+                        reservoir[slot] = numbers
+
+        for pid, reservoir in reservoirs.items():
+            weight = offered[pid] / len(reservoir)
+            for numbers in reservoir:
+                selected.update(dict.fromkeys(numbers, weight))
+        return selected
+
+def parse_selected(log_file, selected):
+    """Parse the selected lines of log_file, tagging each event with its sample weight."""
+    logs = []
+    last = max(selected, default=-1)
+    with open(log_file, 'rb') as file:
+        for number, line in enumerate(file):
+            if number > last:
+                break
+            if number not in selected:
+                continue
+            try:
+                log = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            log['sample_weight'] = selected[number]
+            logs.append(log)
+    return logs
+
+def sample_audit_log(log_file, sampler):
+    """Load a weighted sample of log_file's events."""
+    with open(log_file, 'rb') as file:
+        selected = sampler.select(enumerate(file))
+    return parse_selected(log_file, selected)
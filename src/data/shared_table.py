@@ -0,0 +1,77 @@
+import os
+import numpy as np
+import pandas as pd
+
+class SharedEventTable:
+    """Read-only, column-wise memory-mapped copy of the event table.
+
+    Rows are sorted by PID so any set of PIDs maps to contiguous row ranges.
+    Numeric and datetime columns are stored as-is, string columns as integer
+    codes plus a category list. Worker processes attach with the (small,
+    picklable) handle and map the columns without copying the table.
+    """
+
+    def __init__(self, directory, spec, length):
+        self.directory = directory
+        self.spec = spec
+        self.length = length
+        self.columns = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+            for name in spec
+        }
+        self.pids = self.columns['pid']
+
+    @classmethod
+    def create(cls, df, directory):
+        """Write df's columns into directory as memory-mappable arrays."""
+        df = df.sort_values('pid', kind='stable')
+        spec = {}
+        for name in df.columns:
+            series = df[name]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                tz = str(series.dt.tz) if series.dt.tz is not None else None
+                values = series.dt.tz_convert(None) if tz else series
+                values = values.to_numpy(dtype='datetime64[ns]')
+                spec[name] = {'kind': 'datetime', 'tz': tz}
+            elif pd.api.types.is_numeric_dtype(series):
+                values = series.to_numpy()
+                spec[name] = {'kind': 'numeric'}
+            else:
+                codes, categories = pd.factorize(series)
+                values = codes.astype(np.int32)
+                spec[name] = {'kind': 'category', 'categories': list(categories)}
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+        return cls(directory, spec, len(df))
+
+    def handle(self):
+        """Picklable descriptor used by workers to attach."""
+        return {'directory': self.directory, 'spec': self.spec, 'length': self.length}
+
+    @classmethod
+    def attach(cls, handle):
+        return cls(handle['directory'], handle['spec'], handle['length'])
+
+    def row_range(self, pids):
+        """Contiguous (start, end) row range covering the given sorted PIDs."""
+        if len(pids) == 0:
+            return 0, 0
+        start = int(np.searchsorted(self.pids, min(pids), side='left'))
+        end = int(np.searchsorted(self.pids, max(pids), side='right'))
+        return start, end
+
+    def frame(self, start, end):
+        """Materialize rows [start, end) as a regular DataFrame."""
+        data = {}
+        for name, column_spec in self.spec.items():
+            values = np.asarray(self.columns[name][start:end])
+            if column_spec['kind'] == 'datetime':
+                series = pd.Series(values)
+                if column_spec['tz']:
+                    series = series.dt.tz_localize('UTC').dt.tz_convert(column_spec['tz'])
+                data[name] = series
+            elif column_spec['kind'] == 'category':
+                lookup = np.array(column_spec['categories'] + [None], dtype=object)
+                data[name] = pd.Series(lookup[values])
+            else:
+                data[name] = pd.Series(values)
+        return pd.DataFrame(data)
@@ -0,0 +1,211 @@
+import argparse
+import json
+import random
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+# Syscall weights per kind of executable
+SYSCALL_PROFILES = {
+    'shell': {'read': 20, 'write': 12, 'open': 10, 'close': 10, 'execve': 6, 'clone': 6, 'wait4': 5,
+              'brk': 4, 'mmap': 4, 'rt_sigaction': 8, 'stat': 8, 'pipe': 2, 'dup2': 2},
+    'server': {'accept': 6, 'recvfrom': 18, 'sendto': 18, 'read': 10, 'write': 10, 'epoll_wait': 20,
+               'socket': 2, 'bind': 1, 'connect': 3, 'close': 8, 'open': 4},
+    'worker': {'read': 30, 'write': 15, 'open': 15, 'close': 15, 'stat': 10, 'lseek': 5, 'mmap': 4,
+               'brk': 3, 'getdents64': 3},
+    'interpreter': {'read': 15, 'write': 8, 'open': 12, 'close': 12, 'mmap': 12, 'mprotect': 6, 'brk': 6,
+                    'stat': 10, 'futex': 10, 'clone': 2, 'socket': 2, 'connect': 2}
+}
+
+# (name, executable, profile, uid) by tree level; the last entry applies to all deeper levels
+EXECUTABLES = [
+    [('sshd', '/usr/sbin/sshd', 'server', '0'), ('cron', '/usr/sbin/cron', 'server', '0'),
+     ('nginx', '/usr/sbin/nginx', 'server', '33'), ('dockerd', '/usr/bin/dockerd', 'server', '0')],
+    [('bash', '/usr/bin/bash', 'shell', '1000'), ('sh', '/bin/sh', 'shell', '1000'),
+     ('python3', '/usr/bin/python3', 'interpreter', '1000'), ('nginx', '/usr/sbin/nginx', 'server', '33')],
+    [('grep', '/usr/bin/grep', 'worker', '1000'), ('cat', '/usr/bin/cat', 'worker', '1000'),
+     ('tar', '/usr/bin/tar', 'worker', '1000'), ('sort', '/usr/bin/sort', 'worker', '1000'),
+     ('python3', '/usr/bin/python3', 'interpreter', '1000'), ('sh', '/bin/sh', 'shell', '1000')]
+]
+USERS = {'0': 'root', '33': 'www-data', '1000': 'alice'}
+
+# Injected attack processes: name, executable, uid and the syscall burst they emit
+ATTACK_PATTERNS = {
+    'reverse_shell': ('nc', '/usr/bin/nc', '1000',
+                      ['socket', 'connect', 'dup2', 'dup2', 'dup2', 'execve'] + ['connect', 'sendto'] * 12),
+    'privilege_escalation': ('exploit', '/tmp/exploit', '0',
+                             ['open', 'mmap', 'setuid', 'setgid', 'setuid', 'capset', 'setuid',
+                              'chmod', 'chown', 'open', 'write']),
+    'process_injection': ('inject', '/tmp/.inject', '1000',
+                          ['ptrace', 'process_vm_readv', 'process_vm_writev', 'memfd_create',
+                           'mprotect', 'ptrace', 'execve']),
+    'crypto_miner': ('kworkerds', '/tmp/.X11/kworkerds', '1000',
+                     ['clone'] * 12 + ['mmap', 'mprotect'] * 10 + ['connect', 'sendto'] * 4),
+    'file_tampering': ('cleanup.sh', '/tmp/cleanup.sh', '0',
+                       ['open', 'unlink', 'unlink', 'rename', 'unlink', 'rmdir', 'unlink', 'rename', 'unlink'])
+}
+
+# Remote endpoints of attacks that connect out (others reach an internal HTTPS service)
+ATTACK_REMOTES = {'reverse_shell': ('203.0.113.7', 4444), 'crypto_miner': ('198.51.100.23', 3333)}
+
+FILE_SYSCALLS = {'open', 'stat', 'unlink', 'rename', 'chmod', 'chown', 'rmdir'}
+FILE_PATHS = ['/etc/passwd', '/etc/hosts', '/usr/lib/x86_64-linux-gnu/libc.so.6', '/var/log/syslog',
+              '/home/alice/notes.txt', '/tmp/build.log', '/etc/shadow', '/proc/self/status']
+
+def _cumulative(weights):
+    total, result = 0, []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+class _Process:
+    """One simulated process with its JSON fragments serialized once."""
+
+    def __init__(self, pid, ppid, name, executable, profile, uid, level, host):
+        self.pid, self.ppid, self.level = pid, ppid, level
+        self.name, self.profile = name, profile
+        process = {'name': name, 'pid': pid, 'executable': executable, 'args': [executable]}
+        if ppid is not None:
+            process['parent'] = {'pid': ppid}
+        self.process_json = json.dumps(process)
+        self.user_json = json.dumps({'name': USERS.get(uid, 'user'), 'id': uid})
+        self.host_json = json.dumps({'name': host})
+        self.remote_json = json.dumps({'ip': f'10.0.{pid // 256 % 256}.{pid % 256}', 'port': 443})
+
+def _build_tree(rng, processes, depth, fanout, host):
+    """Breadth-first process tree under PID 1, up to `processes` nodes."""
+    tree = [_Process(1, None, 'systemd', '/usr/lib/systemd/systemd', 'server', '0', 0, host)]
+    next_pid, queue = 100, deque([tree[0]])
+    while queue and len(tree) < processes:
+        parent = queue.popleft()
+        if parent.level >= depth:
+            continue
+        choices = EXECUTABLES[min(parent.level, len(EXECUTABLES) - 1)]
+        for _ in range(rng.randint(1, fanout)):
+            if len(tree) >= processes:
+                break
+            next_pid += rng.randint(1, 7)
+            child = _Process(next_pid, parent.pid, *rng.choice(choices), parent.level + 1, host)
+            tree.append(child)
+            queue.append(child)
+    return tree, next_pid
+
+def generate_audit_log(path, events=10000, processes=None, depth=6, fanout=4, syscall_mix=None,
+                       pid_reuse=0.0005, attacks=('reverse_shell', 'privilege_escalation', 'process_injection'),
+                       fail_rate=0.02, path_records=0.1, duration_seconds=3600, host='synthetic-host',
+                       start=None, seed=0):
+    """Stream `events` auditbeat-style syscall records to path.
+
+    Processes form a tree of the given depth and fan-out; each event picks a
+    process with a skewed (Zipf-like) weight and a syscall from the process's
+    profile, or from syscall_mix ({syscall: weight}) when given. Like auditd,
+    some events add records under the same sequence number: PATH records for
+    file syscalls, an EXECVE record for every execve and a SOCKADDR record
+    for every connect. pid_reuse is
+    the per-event chance that a PID is recycled by a new executable. Each entry
+    of attacks injects one attack process at a random point in the capture.
+    Memory use depends only on the process count, so 100M events stream fine.
+    Returns a summary including the PIDs of the injected attacks.
+    """
+    rng = random.Random(seed)
+    processes = processes or max(10, min(events // 200, 100000))
+    tree, next_pid = _build_tree(rng, processes, depth, fanout, host)
+
+    ranks = list(range(len(tree)))
+    rng.shuffle(ranks)
+    process_weights = _cumulative(1.0 / (rank + 1) ** 0.8 for rank in ranks)
+    profiles = {
+        name: (list(weights), _cumulative(weights.values()))
+        for name, weights in (SYSCALL_PROFILES.items() if syscall_mix is None
+                              else [(name, syscall_mix) for name in SYSCALL_PROFILES])
+    }
+
+    start = start or datetime(2024, 11, 29, 10, 0, 0, tzinfo=timezone.utc)
+    step = duration_seconds / max(events, 1)
+    attack_at = {}
+    for attack in attacks:
+        attack_at.setdefault(rng.randrange(max(events, 1)), []).append(attack)
+
+    summary = {'events': 0, 'processes': len(tree), 'reused_pids': 0, 'attacks': {}}
+    sequence = 0
+    batch = 10000
+
+    def record(out, timestamp, process, syscall, result=None):
+        nonlocal sequence
+        sequence += 1
+        result = result or ('fail' if rng.random() < fail_rate else 'success')
+        out.write(
+            f'{{"@timestamp": "{timestamp}", "user": {process.user_json}, "process": {process.process_json}, '
+            f'"auditd": {{"data": {{"syscall": "{syscall}"}}, "message_type": "syscall", '
+            f'"result": "{result}", "sequence": {sequence}}}, "host": {process.host_json}}}\n'
+        )
+        if syscall in FILE_SYSCALLS and rng.random() < path_records:
+            out.write(f'{{"@timestamp": "{timestamp}", "auditd": {{"message_type": "path", '
+                      f'"sequence": {sequence}}}, "file": {{"path": "{rng.choice(FILE_PATHS)}"}}}}\n')
+        if syscall == 'execve':
+            out.write(f'{{"@timestamp": "{timestamp}", "process": {process.process_json}, '
+                      f'"auditd": {{"message_type": "execve", "sequence": {sequence}}}, "host": {process.host_json}}}\n')
+        if syscall == 'connect':
+            out.write(f'{{"@timestamp": "{timestamp}", "auditd": {{"message_type": "sockaddr", '
+                      f'"sequence": {sequence}}}, "destination": {process.remote_json}}}\n')
+        summary['events'] += 1
+
+    with open(path, 'w', encoding='utf-8') as out:
+        for offset in range(0, events, batch):
+            picks = rng.choices(range(len(tree)), cum_weights=process_weights, k=min(batch, events - offset))
+            for i, index in enumerate(picks, offset):
+                timestamp = (start + timedelta(seconds=i * step)).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+                for attack in attack_at.get(i, ()):
+                    name, executable, uid, burst = ATTACK_PATTERNS[attack]
+                    parent = rng.choice(tree)
+                    next_pid += rng.randint(1, 7)
+                    attacker = _Process(next_pid, parent.pid, name, executable, 'shell', uid,
+                                        parent.level + 1, host)
+                    if attack in ATTACK_REMOTES:
+                        ip, port = ATTACK_REMOTES[attack]
+                        attacker.remote_json = json.dumps({'ip': ip, 'port': port})
+                    summary['attacks'][next_pid] = attack
+                    for syscall in burst:
+                        record(out, timestamp, attacker, syscall, 'success')
+
+                process = tree[index]
+                if process.pid != 1 and rng.random() < pid_reuse:
+                    # PID recycled: same slot and parent, new executable starting with execve
+                    choices = EXECUTABLES[min(process.level - 1, len(EXECUTABLES) - 1)]
+                    process = tree[index] = _Process(process.pid, process.ppid, *rng.choice(choices),
+                                                     process.level, host)
+                    summary['reused_pids'] += 1
+                    record(out, timestamp, process, 'execve', 'success')
+                    continue
+
+                syscalls, weights = profiles[process.profile]
+                record(out, timestamp, process, rng.choices(syscalls, cum_weights=weights)[0])
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic auditbeat NDJSON capture.")
+    parser.add_argument('output', help="NDJSON file to write")
+    parser.add_argument('-n', '--events', type=int, default=10000)
+    parser.add_argument('--processes', type=int, help="process count (default: events / 200)")
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--fanout', type=int, default=4)
+    parser.add_argument('--syscall-mix', type=json.loads, help='JSON {syscall: weight} used for every process')
+    parser.add_argument('--pid-reuse', type=float, default=0.0005)
+    parser.add_argument('--attacks', default='reverse_shell,privilege_escalation,process_injection',
+                        help=f"comma-separated, from: {', '.join(ATTACK_PATTERNS)}")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    attacks = [name for name in args.attacks.split(',') if name]
+    unknown = set(attacks) - set(ATTACK_PATTERNS)
+    if unknown:
+        parser.error(f"unknown attack pattern(s): {', '.join(sorted(unknown))}")
+    summary = generate_audit_log(
+        args.output, events=args.events, processes=args.processes, depth=args.depth, fanout=args.fanout,
+        syscall_mix=args.syscall_mix, pid_reuse=args.pid_reuse, attacks=attacks, seed=args.seed
+    )
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Stage-graph pipeline execution."""
+from .stage_graph import Stage, StageGraph, BACKENDS
+
+__all__ = ['Stage', 'StageGraph', 'BACKENDS']
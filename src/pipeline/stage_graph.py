@@ -0,0 +1,233 @@
+import hashlib
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+class Stage:
+    """A named pipeline step with declared inputs and outputs.
+
+    func is called with the input values in declaration order and returns a
+    single value (one output), a tuple (several outputs) or None (no outputs).
+    Optional inputs are passed as None when their producing stage is skipped.
+    executor is 'thread' for I/O-bound steps or 'process' for CPU-bound ones
+    (func and its inputs must then be picklable). Cacheable stages have their
+    outputs pickled under a key derived from their inputs' fingerprints.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), executor='thread', cacheable=False, version=1,
+                 optional=()):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.optional = set(optional)
+        self.outputs = list(outputs)
+        self.executor = executor
+        self.cacheable = cacheable
+        self.version = version
+
+def _call_stage(func, args):
+    """Top-level trampoline so process-pool stages pickle cleanly."""
+    return func(*args)
+
+BACKENDS = ('process', 'thread', 'serial')
+
+class StageGraph:
+    """Runs a DAG of stages concurrently, skipping stages with valid cached outputs.
+
+    backend 'process' honours each stage's executor, 'thread' runs every stage
+    in the thread pool and 'serial' runs them one by one in topological order.
+    """
+
+    def __init__(self, stages, cache_dir=None, max_workers=None, backend='process', verbose=True):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.backend = backend
+        self.verbose = verbose
+        self.producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Output '{output}' produced by both "
+                                     f"'{self.producers[output]}' and '{stage.name}'")
+                self.producers[output] = stage.name
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        order, state = [], {}
+        for name in self.stages:
+            stack = [(name, False)]
+            while stack:
+                current, expanded = stack.pop()
+                if expanded:
+                    state[current] = 'done'
+                    order.append(current)
+                    continue
+                if state.get(current) == 'done':
+                    continue
+                if state.get(current) == 'visiting':
+                    raise ValueError(f"Stage graph has a cycle through '{current}'")
+                state[current] = 'visiting'
+                stack.append((current, True))
+                for item in self.stages[current].inputs:
+                    producer = self.producers.get(item)
+                    if producer and state.get(producer) != 'done':
+                        stack.append((producer, False))
+        return order
+
+    def _upstream(self, name):
+        return [self.producers[item] for item in self.stages[name].inputs if item in self.producers]
+
+    def plan(self, initial, targets=None, skip=()):
+        """Resolve which stages can run: targets (default: every sink stage) plus
+        their upstream, minus skipped stages."""
+        consumed = {item for stage in self.stages.values() for item in stage.inputs}
+        wanted = set(targets) if targets else {
+            name for name, stage in self.stages.items() if not consumed & set(stage.outputs)
+        }
+        unknown = (wanted | set(skip)) - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+        selected, stack = set(), list(wanted)
+        while stack:
+            name = stack.pop()
+            if name in selected or name in skip:
+                continue
+            selected.add(name)
+            stack.extend(self._upstream(name))
+
+        runnable = []
+        for name in self.order:
+            if name not in selected:
+                continue
+            stage = self.stages[name]
+            missing = [item for item in stage.inputs
+                       if item not in stage.optional and item not in initial
+                       and self.producers.get(item) not in runnable]
+            if missing:
+                if self.verbose:
+                    print(f"Skipping stage '{name}' (missing inputs: {', '.join(missing)})")
+                continue
+            runnable.append(name)
+        return runnable, [name for name in runnable if name in wanted]
+
+    def _keys(self, runnable, fingerprints):
+        """Cache key per stage, chained from its inputs' fingerprints."""
+        keys = {}
+        for name in runnable:
+            stage = self.stages[name]
+            parts = [name, str(stage.version)]
+            for item in stage.inputs:
+                producer = self.producers.get(item)
+                if producer in keys:
+                    parts.append(f"{keys[producer]}:{item}")
+                elif producer is not None:
+                    parts.append(f"skipped:{item}")
+                else:
+                    parts.append(fingerprints.get(item, item))
+            keys[name] = hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:32]
+        return keys
+
+    def _cache_path(self, name, key):
+        return os.path.join(self.cache_dir, f"{name}-{key}.pkl")
+
+    def _cached(self, name, key):
+        return (self.cache_dir is not None and self.stages[name].cacheable
+                and os.path.exists(self._cache_path(name, key)))
+
+    def run(self, initial=None, fingerprints=None, targets=None, skip=()):
+        """Execute the selected stages; returns the dict of all produced values."""
+        context = dict(initial or {})
+        runnable, wanted = self.plan(context, targets, skip)
+        keys = self._keys(runnable, fingerprints or {})
+
+        # Walk back from the wanted stages; a cached stage needs nothing upstream
+        needed, stack = set(), list(wanted)
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            if not self._cached(name, keys[name]):
+                stack.extend(producer for producer in self._upstream(name) if producer in runnable)
+
+        pending = [name for name in runnable if name in needed]
+        if self.backend == 'serial':
+            for name in pending:
+                if not self._load_cached(name, keys[name], context):
+                    started = time.perf_counter()
+                    result = self.stages[name].func(*[context.get(item) for item in self.stages[name].inputs])
+                    self._store(name, keys[name], result, context, started)
+            return context
+
+        done, running = set(), {}
+        processes = None
+        process_stages = [name for name in pending if self.stages[name].executor == 'process'
+                          and self.backend == 'process' and not self._cached(name, keys[name])]
+        if process_stages:
+            processes = ProcessPoolExecutor(max_workers=min(len(process_stages), self.max_workers or os.cpu_count() or 1))
+            # Fork the workers before any stage thread exists so they can't inherit held locks
+            processes.submit(int).result()
+        threads = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while pending or running:
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if not all(producer in done for producer in self._upstream(name) if producer in needed):
+                        continue
+                    pending.remove(name)
+                    if self._load_cached(name, keys[name], context):
+                        done.add(name)
+                        continue
+
+                    args = [context.get(item) for item in stage.inputs]
+                    if name in process_stages:
+                        future = processes.submit(_call_stage, stage.func, args)
+                    else:
+                        future = threads.submit(stage.func, *args)
+                    running[future] = (name, time.perf_counter())
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, started = running.pop(future)
+                    self._store(name, keys[name], future.result(), context, started)
+                    done.add(name)
+        finally:
+            threads.shutdown(wait=True, cancel_futures=True)
+            if processes:
+                processes.shutdown(wait=True, cancel_futures=True)
+        return context
+
+    def _load_cached(self, name, key, context):
+        if not self._cached(name, key):
+            return False
+        with open(self._cache_path(name, key), 'rb') as f:
+            context.update(pickle.load(f))
+        if self.verbose:
+            print(f"[{name}] cached outputs reused")
+        return True
+
+    def _store(self, name, key, result, context, started):
+        stage = self.stages[name]
+        if len(stage.outputs) == 1:
+            values = {stage.outputs[0]: result}
+        elif stage.outputs:
+            values = dict(zip(stage.outputs, result))
+        else:
+            values = {}
+        context.update(values)
+
+        if self.cache_dir is not None and stage.cacheable:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = self._cache_path(name, key) + '.tmp'
+            with open(temp_path, 'wb') as f:
+                pickle.dump(values, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._cache_path(name, key))
+        if self.verbose:
+            print(f"[{name}] done in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,4 @@
+"""Long-running local query service over one analyzed capture."""
+from .analysis_server import AnalysisIndex, QueryError, handle_request, serve
+
+__all__ = ['AnalysisIndex', 'QueryError', 'handle_request', 'serve']
\ No newline at end of file
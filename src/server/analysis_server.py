@@ -0,0 +1,313 @@
+import asyncio
+import functools
+import json
+import re
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import pandas as pd
+from src.analysis.process_annotations import process_risk
+from src.data.event_filter import _parse_time
+from src.visualization.mermaid_generator import generate_mermaid_diagram
+
+class QueryError(Exception):
+    """A request the index cannot answer; status is the HTTP status to reply with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+class AnalysisIndex:
+    """Event table, process tree and annotations held in memory for interactive queries.
+
+    Rows are sorted by (pid, timestamp) once, so a process's events are one
+    contiguous slice and a time range within it is two binary searches.
+    Rendered diagram fragments are kept in an LRU cache.
+    """
+
+    def __init__(self, df, process_tree, annotations, diagram_cache_size=256):
+        self.process_tree = process_tree
+        self.annotations = annotations
+
+        timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]').view('int64')
+        pids = df['pid'].to_numpy(dtype=np.float64).astype(np.int64)
+        order = np.lexsort((timestamps, pids))
+        # pid and ppid are in the process summary; events keep the per-row columns
+        self.events = df.iloc[order].drop(columns=['pid', 'ppid']).reset_index(drop=True)
+        self.timestamps = timestamps[order]
+        self.syscalls = self.events['syscall'].to_numpy(dtype=object)
+
+        sorted_pids = pids[order]
+        unique, starts = np.unique(sorted_pids, return_index=True)
+        ends = np.append(starts[1:], len(sorted_pids))
+        self.slices = {pid: (start, end) for pid, start, end in zip(unique.tolist(), starts.tolist(), ends.tolist())}
+
+        self._cached_diagram = functools.lru_cache(maxsize=diagram_cache_size)(self._render_diagram)
+
+    def _info(self, pid):
+        if pid not in self.process_tree:
+            raise QueryError(f"unknown PID {pid}", status=404)
+        return self.process_tree[pid]
+
+    def _summary(self, pid):
+        info, annotation = self.process_tree[pid], self.annotations[pid]
+        start, end = self.slices.get(pid, (0, 0))
+        return {
+            'pid': pid,
+            'process': None if info['process'] is None else str(info['process']),
+            'ppid': info['ppid'],
+            'events': end - start,
+            'behavior_score': round(float(annotation['behavior_score']), 4),
+            'style_class': annotation['style_class'],
+            'alert_count': len(annotation['alerts'])
+        }
+
+    def _syscall_counts(self, pids, top=None):
+        parts = [self.syscalls[slice(*self.slices[pid])] for pid in pids if pid in self.slices]
+        if not parts:
+            return {}
+        counts = pd.Series(np.concatenate(parts)).value_counts(dropna=True)
+        return {str(syscall): int(count) for syscall, count in counts.head(top).items()}
+
+    def _members(self, root, depth=None):
+        """PIDs under root (inclusive), breadth first, at most depth levels down."""
+        members, frontier, level = [root], [root], 0
+        seen = {root}
+        while frontier and (depth is None or level < depth):
+            frontier = [child['pid'] for pid in frontier for child in self.process_tree[pid]['children']
+                        if child['pid'] not in seen]
+            seen.update(frontier)
+            members.extend(frontier)
+            level += 1
+        return members
+
+    def processes(self, name=None, sort='risk', limit=100):
+        """Process summaries, optionally filtered by name, highest risk first."""
+        pids = [pid for pid, info in self.process_tree.items()
+                if name is None or str(info['process']) == name]
+        keys = {
+            'risk': lambda pid: -process_risk(self.annotations[pid]),
+            'score': lambda pid: -self.annotations[pid]['behavior_score'],
+            'pid': lambda pid: pid
+        }
+        if sort not in keys:
+            raise QueryError(f"sort must be one of {', '.join(keys)}")
+        pids.sort(key=keys[sort])
+        return {'total': len(pids), 'processes': [self._summary(pid) for pid in pids[:limit]]}
+
+    def process(self, pid):
+        """One process: summary, category scores, alerts, children and syscall counts."""
+        info = self._info(pid)
+        annotation = self.annotations[pid]
+        summary = self._summary(pid)
+        start, end = self.slices.get(pid, (0, 0))
+        summary.update({
+            'first_seen': _isoformat(self.timestamps[start]) if end > start else None,
+            'last_seen': _isoformat(self.timestamps[end - 1]) if end > start else None,
+            'category_scores': {k: round(float(v), 4) for k, v in annotation['category_scores'].items()},
+            'alerts': annotation['alerts'],
+            'children': [child['pid'] for child in info['children']],
+            'syscalls': self._syscall_counts([pid])
+        })
+        return summary
+
+    def timeline(self, pid, since=None, until=None, limit=1000):
+        """Events of one process in [since, until), in time order."""
+        self._info(pid)
+        start, end = self.slices.get(pid, (0, 0))
+        times = self.timestamps[start:end]
+        if since is not None:
+            start += int(np.searchsorted(times, _to_ns(since), side='left'))
+        if until is not None:
+            end = start + int(np.searchsorted(self.timestamps[start:end], _to_ns(until), side='left'))
+        rows = self.events.iloc[start:min(end, start + limit)]
+        events = [{column: _json_value(value) for column, value in zip(rows.columns, row)}
+                  for row in rows.itertuples(index=False)]
+        return {'pid': pid, 'total': max(end - start, 0), 'events': events}
+
+    def subtree(self, pid, depth=None, top=10):
+        """Aggregate view of a process and its descendants."""
+        self._info(pid)
+        members = self._members(pid, depth)
+        ranked = sorted(members, key=lambda member: -process_risk(self.annotations[member]))
+        spans = [self.slices[member] for member in members if member in self.slices]
+        first = min((self.timestamps[start] for start, _ in spans), default=None)
+        last = max((self.timestamps[end - 1] for _, end in spans), default=None)
+        return {
+            'root': pid,
+            'processes': len(members),
+            'events': sum(end - start for start, end in spans),
+            'first_seen': _isoformat(first) if first is not None else None,
+            'last_seen': _isoformat(last) if last is not None else None,
+            'max_behavior_score': round(max(float(self.annotations[m]['behavior_score']) for m in members), 4),
+            'flagged': sum(self.annotations[m]['style_class'] in ('suspicious', 'anomalous') for m in members),
+            'alerts': sum(len(self.annotations[m]['alerts']) for m in members),
+            'syscalls': self._syscall_counts(members, top),
+            'riskiest': [self._summary(member) for member in ranked[:top]]
+        }
+
+    def alerts(self, pid=None, contains=None, limit=500):
+        """Alerts of every process (or of pid's subtree) whose text contains contains."""
+        if pid is not None:
+            self._info(pid)
+        pids = list(self.process_tree) if pid is None else self._members(pid)
+        needle = contains.lower() if contains else None
+        matches = [
+            {'pid': member, 'process': self._summary(member)['process'], 'alert': alert}
+            for member in pids for alert in self.annotations[member]['alerts']
+            if needle is None or needle in alert.lower()
+        ]
+        return {'total': len(matches), 'alerts': matches[:limit]}
+
+    def diagram(self, pid, depth=2):
+        """Mermaid flowchart of pid's subtree, depth levels deep (None for all)."""
+        self._info(pid)
+        return {'pid': pid, 'depth': depth, 'mermaid': self._cached_diagram(pid, depth)}
+
+    def _render_diagram(self, pid, depth):
+        members = self._members(pid, depth)
+        included = set(members)
+        subtree = {
+            member: {
+                'pid': member,
+                'process': self.process_tree[member]['process'],
+                'ppid': self.process_tree[member]['ppid'] if member != pid else None,
+                'children': []
+            }
+            for member in members
+        }
+        for member in members:
+            subtree[member]['children'] = [subtree[child['pid']] for child in self.process_tree[member]['children']
+                                           if child['pid'] in included]
+        return generate_mermaid_diagram(subtree, None, None, None, self.annotations)
+
+def _to_ns(value):
+    try:
+        return pd.Timestamp(_parse_time(value)).value
+    except ValueError as e:
+        raise QueryError(f"invalid time {value!r}: {e}")
+
+def _isoformat(nanoseconds):
+    return pd.Timestamp(int(nanoseconds), tz='UTC').isoformat()
+
+def _json_value(value):
+    if value is None or value is pd.NaT or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _int(params, name, default=None):
+    value = params.get(name, [None])[0]
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+
+def _text(params, name):
+    return params.get(name, [None])[0]
+
+# (path pattern, handler(index, match, params)) pairs tried in order
+ROUTES = [
+    (re.compile(r'/health'), lambda index, match, params: {'status': 'ok', 'processes': len(index.process_tree)}),
+    (re.compile(r'/processes'), lambda index, match, params: index.processes(
+        name=_text(params, 'name'), sort=_text(params, 'sort') or 'risk', limit=_int(params, 'limit', 100))),
+    (re.compile(r'/processes/(\d+)'), lambda index, match, params: index.process(int(match.group(1)))),
+    (re.compile(r'/processes/(\d+)/timeline'), lambda index, match, params: index.timeline(
+        int(match.group(1)), since=_text(params, 'since'), until=_text(params, 'until'),
+        limit=_int(params, 'limit', 1000))),
+    (re.compile(r'/processes/(\d+)/subtree'), lambda index, match, params: index.subtree(
+        int(match.group(1)), depth=_int(params, 'depth'), top=_int(params, 'top', 10))),
+    (re.compile(r'/processes/(\d+)/diagram'), lambda index, match, params: index.diagram(
+        int(match.group(1)), depth=_int(params, 'depth', 2))),
+    (re.compile(r'/alerts'), lambda index, match, params: index.alerts(
+        pid=_int(params, 'pid'), contains=_text(params, 'contains'), limit=_int(params, 'limit', 500)))
+]
+
+def handle_request(index, target):
+    """(status, payload) for a GET of target (path plus query string)."""
+    url = urlsplit(target)
+    params = parse_qs(url.query)
+    for pattern, handler in ROUTES:
+        match = pattern.fullmatch(url.path.rstrip('/') or '/')
+        if match:
+            try:
+                return 200, handler(index, match, params)
+            except QueryError as e:
+                return e.status, {'error': str(e)}
+            except Exception as e:
+                # A bug in one query shouldn't drop the client's connection
+                print(f"Error answering {target}: {e!r}")
+                return 500, {'error': f"internal error: {type(e).__name__}"}
+    return 404, {'error': f"no route for {url.path}"}
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error'}
+
+def _content_length(headers):
+    """Declared request body size, or None if the header is not a non-negative integer."""
+    value = headers.get('content-length', '0') or '0'
+    return int(value) if value.isascii() and value.isdigit() else None
+
+async def _serve_connection(index, reader, writer):
+    """HTTP/1.1 with keep-alive; only GET is supported and request bodies are ignored."""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = _content_length(headers)
+            if length:
+                await reader.readexactly(length)
+
+            parts = request_line.decode('latin-1').split()
+            if length is None:
+                # The body can't be skipped, so the connection is closed after replying
+                status, payload = 400, {'error': 'invalid Content-Length'}
+            elif len(parts) != 3:
+                status, payload = 400, {'error': 'malformed request line'}
+            elif parts[0] != 'GET':
+                status, payload = 405, {'error': 'only GET is supported'}
+            else:
+                # Queries are short, but one big subtree shouldn't stall other clients
+                status, payload = await loop.run_in_executor(None, handle_request, index, parts[1])
+
+            try:
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            except (TypeError, ValueError) as e:
+                print(f"Error encoding the reply to {parts[1] if len(parts) > 1 else request_line!r}: {e!r}")
+                status, body = 500, b'{"error": "internal error: unencodable reply"}'
+            keep_alive = headers.get('connection', '').lower() != 'close' and len(parts) == 3 \
+                and parts[2] == 'HTTP/1.1' and length is not None
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(index, host='127.0.0.1', port=8765):
+    """Answer queries against index until cancelled."""
+    server = await asyncio.start_server(functools.partial(_serve_connection, index), host, port)
+    addresses = ', '.join(f"http://{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+    print(f"Serving analysis queries on {addresses} (Ctrl+C to stop)")
+    async with server:
+        await server.serve_forever()
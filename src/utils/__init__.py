@@ -1,4 +1,5 @@
 """Utility functions and helpers."""
 from .pid_utils import normalize_pid
+from .process_pool import process_pool
 
-__all__ = ['normalize_pid']
\ No newline at end of file
+__all__ = ['normalize_pid', 'process_pool']
\ No newline at end of file
@@ -0,0 +1,13 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+def process_pool(max_workers=None, **kwargs):
+    """ProcessPoolExecutor whose workers are not forked from the calling process.
+
+    Pools are opened from stage threads while other stages are running, and a
+    child forked from a threaded process can inherit locks held by another
+    thread; workers start from a forkserver (spawn where there is none), so
+    jobs and initializer arguments must be picklable.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method), **kwargs)
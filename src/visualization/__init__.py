@@ -1,5 +1,13 @@
 """Visualization generation modules."""
-from .mermaid_generator import generate_mermaid_diagram, generate_gantt_diagram
+from .mermaid_generator import generate_mermaid_diagram, generate_aggregated_mermaid_diagram, generate_gantt_diagram
 from .html_generator import create_html_output
+from .graph_export import export_tree_json, export_tree_dot
+from .tree_viewer import create_tree_viewer_html
+from .heatmap_generator import compute_syscall_heatmap, create_heatmap_html
+from .fleet_report import create_fleet_report_html
+from .diff_report import create_diff_report_html
 
-__all__ = ['generate_mermaid_diagram', 'generate_gantt_diagram', 'create_html_output']
\ No newline at end of file
+__all__ = ['generate_mermaid_diagram', 'generate_aggregated_mermaid_diagram',
+           'generate_gantt_diagram', 'create_html_output', 'export_tree_json',
+           'export_tree_dot', 'create_tree_viewer_html', 'compute_syscall_heatmap',
+           'create_heatmap_html', 'create_fleet_report_html', 'create_diff_report_html']
\ No newline at end of file
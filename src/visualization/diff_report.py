@@ -0,0 +1,84 @@
+import json
+
+def create_diff_report_html(diff, baseline_label, current_label):
+    """Create the capture comparison page from a diff_captures result."""
+    payload = dict(diff, baseline_label=baseline_label, current_label=current_label)
+    return DIFF_HTML_TEMPLATE.replace('{{PAYLOAD}}', json.dumps(payload, ensure_ascii=False).replace('</', '<\\/'))
+
+DIFF_HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Capture Comparison</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5; }
+        section { background: white; border: 1px solid #ddd; border-radius: 8px; padding: 12px 16px; margin-bottom: 16px; }
+        table { border-collapse: collapse; width: 100%; font-size: 13px; }
+        th, td { text-align: left; padding: 4px 8px; border-bottom: 1px solid #eee; vertical-align: top; }
+        th { background: #fafafa; }
+        .lineage { font-size: 12px; color: #555; }
+        .list { font-size: 12px; }
+        .up { color: #c62828; }
+        .down { color: #2e7d32; }
+    </style>
+</head>
+<body>
+    <h2>Capture Comparison</h2>
+    <div id="summary"></div>
+    <section><h3>New processes</h3><table id="new"></table></section>
+    <section><h3>New alerts</h3><table id="new_alerts"></table></section>
+    <section><h3>Changed syscall mix</h3><table id="changed_mix"></table></section>
+    <section><h3>Missing processes</h3><table id="missing"></table></section>
+    <section><h3>Instance count changes</h3><table id="instance_changes"></table></section>
+    <script>
+        const DATA = {{PAYLOAD}};
+        const escape = value => String(value == null ? '' : value)
+            .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+
+        function table(id, columns, rows) {
+            if (!rows.length) {
+                document.getElementById(id).innerHTML = '<tr><td>None</td></tr>';
+                return;
+            }
+            const head = '<tr>' + columns.map(column => '<th>' + escape(column[0]) + '</th>').join('') + '</tr>';
+            const body = rows.map(row => '<tr>' + columns.map(column => '<td>' + column[1](row) + '</td>').join('') + '</tr>');
+            document.getElementById(id).innerHTML = head + body.join('');
+        }
+
+        const identity = [
+            ['Executable', row => escape(row.executable) + '<div class="lineage">' + escape(row.lineage) + '</div>'],
+            ['Arguments', row => escape(row.argv)]
+        ];
+        const list = items => '<div class="list">' + items.map(escape).join('<br>') + '</div>';
+        const share = value => (100 * value).toFixed(1) + '%';
+
+        const s = DATA.summary;
+        document.getElementById('summary').textContent = DATA.baseline_label + ' (' + s.baseline_processes +
+            ' processes) vs ' + DATA.current_label + ' (' + s.current_processes + ' processes): ' +
+            s.new + ' new, ' + s.missing + ' missing, ' + s.changed_mix + ' changed mixes, ' +
+            s.new_alerts + ' with new alerts';
+
+        table('new', identity.concat([
+            ['Instances', row => row.instances], ['Events', row => row.events],
+            ['Max score', row => row.max_score.toFixed(3)], ['Alerts', row => list(row.alerts)]
+        ]), DATA.new);
+        table('new_alerts', identity.concat([
+            ['Instances', row => row.instances], ['New alerts', row => list(row.alerts)]
+        ]), DATA.new_alerts);
+        table('changed_mix', identity.concat([
+            ['Distance', row => row.distance.toFixed(3)],
+            ['Largest changes', row => row.syscalls.map(change =>
+                '<span class="' + (change.after > change.before ? 'up' : 'down') + '">' + escape(change.syscall) +
+                ' ' + share(change.before) + ' &rarr; ' + share(change.after) + '</span>').join('<br>')]
+        ]), DATA.changed_mix);
+        table('missing', identity.concat([
+            ['Instances', row => row.instances], ['Events', row => row.events]
+        ]), DATA.missing);
+        table('instance_changes', identity.concat([
+            ['Baseline', row => row.baseline_instances], ['Current', row => row.instances]
+        ]), DATA.instance_changes);
+    </script>
+</body>
+</html>
+"""
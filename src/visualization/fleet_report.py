@@ -0,0 +1,71 @@
+import json
+
+def create_fleet_report_html(rollup, host_pages=None):
+    """Create the fleet roll-up page; host_pages maps host -> relative link to its tree viewer."""
+    payload = dict(rollup, host_pages=host_pages or {})
+    return FLEET_HTML_TEMPLATE.replace('{{PAYLOAD}}', json.dumps(payload, ensure_ascii=False).replace('</', '<\\/'))
+
+FLEET_HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Fleet Process Analysis</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5; }
+        section { background: white; border: 1px solid #ddd; border-radius: 8px; padding: 12px 16px; margin-bottom: 16px; }
+        table { border-collapse: collapse; width: 100%; font-size: 13px; }
+        th, td { text-align: left; padding: 4px 8px; border-bottom: 1px solid #eee; vertical-align: top; }
+        th { background: #fafafa; }
+        .suspicious { color: #c62828; font-weight: bold; }
+        .anomalous { color: #ef6c00; font-weight: bold; }
+        .alerts { font-size: 12px; color: #555; }
+    </style>
+</head>
+<body>
+    <h2>Fleet Process Analysis</h2>
+    <div id="totals"></div>
+    <section><h3>Hosts</h3><table id="hosts"></table></section>
+    <section><h3>Riskiest processes (host, PID, start)</h3><table id="riskiest"></table></section>
+    <section><h3>Executables</h3><table id="executables"></table></section>
+    <section><h3>Alert kinds per host</h3><table id="alerts"></table></section>
+    <script>
+        const DATA = {{PAYLOAD}};
+        const escape = value => String(value == null ? '' : value)
+            .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+
+        function table(id, columns, rows) {
+            const head = '<tr>' + columns.map(column => '<th>' + escape(column[0]) + '</th>').join('') + '</tr>';
+            const body = rows.map(row => '<tr>' + columns.map(column => '<td>' + column[1](row) + '</td>').join('') + '</tr>');
+            document.getElementById(id).innerHTML = head + body.join('');
+        }
+
+        const totals = DATA.totals;
+        document.getElementById('totals').textContent = DATA.hosts.length + ' hosts, ' + totals.events + ' events, ' +
+            totals.processes + ' processes, ' + totals.flagged + ' flagged, ' + totals.alerts + ' alerts';
+
+        const hostLink = host => DATA.host_pages[host]
+            ? '<a href="' + escape(DATA.host_pages[host]) + '">' + escape(host) + '</a>' : escape(host);
+        table('hosts', [
+            ['Host', row => hostLink(row.host)], ['Events', row => row.events], ['Processes', row => row.processes],
+            ['Flagged', row => row.flagged], ['Alerts', row => row.alerts]
+        ], DATA.hosts);
+        table('riskiest', [
+            ['Host', row => hostLink(row.host)], ['PID', row => row.pid], ['Start', row => escape(row.start)],
+            ['Process', row => '<span class="' + row.style_class + '">' + escape(row.process) + '</span>'],
+            ['Score', row => row.behavior_score.toFixed(3)],
+            ['Alerts', row => '<div class="alerts">' + row.alerts.map(escape).join('<br>') + '</div>']
+        ], DATA.riskiest);
+        table('executables', [
+            ['Executable', row => escape(row.process)], ['Hosts', row => row.hosts.map(escape).join(', ')],
+            ['Instances', row => row.instances], ['Flagged', row => row.flagged],
+            ['Max score', row => row.max_score.toFixed(3)]
+        ], DATA.executables);
+        const hosts = DATA.hosts.map(host => host.host);
+        table('alerts', [['Alert', row => escape(row[0])]].concat(
+            hosts.map(host => [host, row => row[1][host] || 0])
+        ), Object.entries(DATA.alert_kinds));
+    </script>
+</body>
+</html>
+"""
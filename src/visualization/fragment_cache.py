@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import time
+from .mermaid_generator import (
+    _flowchart_header, _process_node_lines, folded_leaves, generate_aggregated_mermaid_diagram
+)
+
+# Bump when the rendering code changes so stale fragments are not reused
+RENDERER_VERSION = 5
+
+def rule_set_version(security_analyzer, behavior_analyzer):
+    """Hash of every rule table that influences alerts, scores and rendering."""
+    rules = {
+        'renderer': RENDERER_VERSION,
+        'suspicious_patterns': security_analyzer.suspicious_patterns,
+        'suspicious_syscalls': security_analyzer.suspicious_syscalls,
+        'suspicious_behaviors': security_analyzer.suspicious_behaviors,
+        'suspicious_resources': security_analyzer.suspicious_resources,
+        'syscall_categories': behavior_analyzer.syscall_categories
+    }
+    encoded = json.dumps(rules, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+def subtree_hashes(process_tree, annotations, rule_version, lineage=None):
+    """Merkle-style hash per subtree over member PIDs, names, scores, alerts, lineage taint and rules.
+
+    Computed bottom-up in one iterative post-order pass. A child that is already
+    being expanded (a ppid cycle) is hashed as a leaf.
+    """
+    hashes = {}
+    expanded = set()
+    folded, _ = folded_leaves(process_tree, annotations)
+    lineage = lineage or {}
+    for root in process_tree:
+        if root in expanded:
+            continue
+        stack = [(root, False)]
+        while stack:
+            pid, children_done = stack.pop()
+            if pid in hashes:
+                continue
+            info = process_tree[pid]
+            if not children_done:
+                if pid in expanded:
+                    continue
+                expanded.add(pid)
+                stack.append((pid, True))
+                stack.extend((child['pid'], False) for child in info['children']
+                             if child['pid'] in process_tree and child['pid'] not in expanded)
+                continue
+
+            annotation = annotations[pid]
+            node = json.dumps([
+                rule_version, int(pid), info['process'], info['ppid'],
+                round(float(annotation['behavior_score']), 6),
+                {k: round(float(v), 6) for k, v in annotation['category_scores'].items()},
+                annotation['alerts'],
+                folded.get(pid, 1),
+                _taint(lineage.get(pid)),
+                [hashes.get(child['pid'], '') for child in info['children']]
+            ], default=str).encode('utf-8')
+            hashes[pid] = hashlib.sha256(node).hexdigest()
+    return hashes
+
+def _taint(entry):
+    """Inherited risk of a tainted process (what its node shows), else None."""
+    return round(entry['inherited_risk'], 2) if entry is not None and entry['tainted'] else None
+
+class FragmentCache:
+    """On-disk cache of rendered fragments keyed by content hash.
+
+    Reads refresh a fragment's modification time, so evict() drops the least
+    recently used fragments first.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        path = self._path(key)
+        if os.path.exists(path):
+            self.hits += 1
+            os.utime(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        self.misses += 1
+        return None
+
+    def put(self, key, fragment):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(fragment)
+        os.replace(temp_path, path)
+
+    def evict(self, max_bytes=None, max_age_seconds=None):
+        """Remove fragments unused for max_age_seconds, then the least recently
+        used ones until the cache holds at most max_bytes; returns the number removed."""
+        entries = []
+        for directory in os.listdir(self.cache_dir):
+            directory = os.path.join(self.cache_dir, directory)
+            if not os.path.isdir(directory):
+                continue  # manifests
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - max_age_seconds if max_age_seconds is not None else float('-inf')
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime >= cutoff and (max_bytes is None or total <= max_bytes):
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def load_manifest(self, name):
+        """Mapping of output file -> hash recorded by the previous run."""
+        path = os.path.join(self.cache_dir, f"{name}.manifest.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_manifest(self, name, manifest):
+        """Record the hashes of outputs that have been written (call after writing them)."""
+        path = os.path.join(self.cache_dir, f"{name}.manifest.json")
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(path + '.tmp', path)
+
+def generate_cached_aggregated_diagram(process_tree, annotations, cache, hashes, top_k=50, lineage=None):
+    """generate_aggregated_mermaid_diagram for large trees, reused whole while
+    no subtree hash and no rendering option changed."""
+    key = hashlib.sha256(json.dumps(
+        ['aggregated', RENDERER_VERSION, top_k, [hashes[pid] for pid in process_tree]]
+    ).encode('utf-8')).hexdigest()
+    diagram = cache.get(key)
+    if diagram is None:
+        diagram = generate_aggregated_mermaid_diagram(process_tree, None, None, None, top_k=top_k,
+                                                      annotations=annotations, lineage=lineage)
+        cache.put(key, diagram)
+    return diagram
+
+def generate_incremental_mermaid_diagram(process_tree, annotations, cache, rule_version='',
+                                         hashes=None, cache_depth=2, lineage=None):
+    """Flowchart equivalent to generate_mermaid_diagram(annotations=...), reusing
+    cached fragments for every subtree whose hash is unchanged.
+
+    Only subtrees rooted within cache_depth levels of a root are cached, which
+    bounds the cache to roughly (cache_depth + 1) copies of the diagram.
+    """
+    if hashes is None:
+        hashes = subtree_hashes(process_tree, annotations, rule_version, lineage)
+    lineage = lineage or {}
+
+    output = _flowchart_header()
+    folded, processed = folded_leaves(process_tree, annotations)
+
+    roots = [1] if 1 in process_tree else []
+    roots += [pid for pid, info in process_tree.items()
+              if pid != 1 and (info['ppid'] is None or info['ppid'] not in process_tree)]
+    # Anything left (ppid cycles) is rendered as its own root afterwards
+    roots += list(process_tree)
+
+    for root in roots:
+        if root in processed:
+            continue
+        stack = [('enter', root, 0)]
+        while stack:
+            action, pid, value = stack.pop()
+            if action == 'exit':
+                cache.put(hashes[pid], '\n'.join(output[value:]))
+                continue
+            if pid in processed:
+                continue
+
+            depth = value
+            cacheable = depth <= cache_depth
+            fragment = cache.get(hashes[pid]) if cacheable else None
+            if fragment is not None:
+                output.append(fragment)
+                processed.update(_subtree_members(process_tree, pid))
+                continue
+
+            processed.add(pid)
+            info = process_tree[pid]
+            annotation = annotations[pid]
+            node_lines, _ = _process_node_lines(
+                pid, info, annotation['alerts'], annotation['behavior_score'], annotation['category_scores'],
+                folded.get(pid, 1), lineage.get(pid)
+            )
+            if cacheable:
+                stack.append(('exit', pid, len(output)))
+            output.extend(node_lines)
+            stack.extend(('enter', child['pid'], depth + 1) for child in reversed(info['children']))
+
+    return '\n'.join(output)
+
+def _subtree_members(process_tree, root):
+    """PIDs under root (inclusive)."""
+    members, stack = {root}, [root]
+    while stack:
+        for child in process_tree[stack.pop()]['children']:
+            if child['pid'] not in members:
+                members.add(child['pid'])
+                stack.append(child['pid'])
+    return members
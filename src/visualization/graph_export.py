@@ -0,0 +1,92 @@
+import json
+from collections import deque
+
+# Fill colors matching the flowchart classDefs
+CLASS_COLORS = {
+    'normal': '#b3e0ff',
+    'suspicious': '#ffcccc',
+    'anomalous': '#ff99ff',
+    'root': '#99ff99',
+    'privileged': '#ffb366'
+}
+
+def _tree_order(process_tree):
+    """PIDs in breadth-first order from the roots, so parents precede children."""
+    roots = sorted(pid for pid, info in process_tree.items()
+                   if info['ppid'] is None or info['ppid'] not in process_tree)
+    order, seen = [], set(roots)
+    queue = deque(roots)
+    while queue:
+        pid = queue.popleft()
+        order.append(pid)
+        for child in process_tree[pid]['children']:
+            if child['pid'] not in seen:
+                seen.add(child['pid'])
+                queue.append(child['pid'])
+
+    # Processes caught in ppid cycles are unreachable from any root; append them as roots
+    order.extend(sorted(pid for pid in process_tree if pid not in seen))
+    return order
+
+def build_tree_payload(process_tree, annotations):
+    """Compact, dictionary-encoded node table for the tree viewer.
+
+    Nodes are rows of [pid, parent_index, process, score, class_index, alert_indices]
+    with parents always listed before their children (parent_index -1 for roots).
+    """
+    classes = list(CLASS_COLORS)
+    alert_index = {}
+    nodes = []
+    position = {}
+
+    for pid in _tree_order(process_tree):
+        info = process_tree[pid]
+        annotation = annotations.get(pid, {})
+        alerts = [alert_index.setdefault(alert, len(alert_index)) for alert in annotation.get('alerts', [])]
+        parent = position.get(info['ppid'], -1)
+        position[pid] = len(nodes)
+        nodes.append([
+            int(pid),
+            parent,
+            info['process'] or 'unknown',
+            round(float(annotation.get('behavior_score', 0.0)), 3),
+            classes.index(annotation.get('style_class', 'normal')),
+            alerts
+        ])
+
+    return {
+        'version': 1,
+        'columns': ['pid', 'parent', 'process', 'score', 'class', 'alerts'],
+        'classes': classes,
+        'colors': [CLASS_COLORS[name] for name in classes],
+        'alerts': list(alert_index),
+        'nodes': nodes
+    }
+
+def export_tree_json(process_tree, annotations, output_path):
+    """Write the process tree, scores and alerts as compact JSON."""
+    payload = build_tree_payload(process_tree, annotations)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+    return payload
+
+def _dot_escape(text):
+    return str(text).replace('\\', '\\\\').replace('"', '\\"')
+
+def export_tree_dot(process_tree, annotations, output_path):
+    """Write the process tree as a Graphviz DOT digraph, streamed node by node."""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('digraph process_tree {\n')
+        f.write('    rankdir=TB;\n')
+        f.write('    node [shape=box, style=filled, fontname="Arial"];\n')
+        for pid in _tree_order(process_tree):
+            info = process_tree[pid]
+            annotation = annotations.get(pid, {})
+            label = (f"{_dot_escape(info['process'] or 'unknown')} ({int(pid)})\\n"
+                     f"score {annotation.get('behavior_score', 0.0):.2f}, "
+                     f"{len(annotation.get('alerts', []))} alerts")
+            color = CLASS_COLORS.get(annotation.get('style_class', 'normal'), CLASS_COLORS['normal'])
+            f.write(f'    pid{int(pid)} [label="{label}", fillcolor="{color}"];\n')
+            if info['ppid'] is not None and info['ppid'] in process_tree:
+                f.write(f'    pid{int(info["ppid"])} -> pid{int(pid)};\n')
+        f.write('}\n')
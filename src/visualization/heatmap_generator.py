@@ -0,0 +1,186 @@
+import base64
+import json
+import numpy as np
+import pandas as pd
+
+def compute_syscall_heatmap(df, syscall_categories=None, time_bins=240, max_processes=500):
+    """Bin events into a (process x time-bin [x category]) count grid with NumPy.
+
+    The busiest max_processes PIDs get their own rows; the rest are summed into
+    a final "other processes" row, so the payload size depends only on the bin
+    counts, never on the number of events.
+    """
+    events = df.dropna(subset=['pid', 'timestamp'])
+    if events.empty:
+        return None
+
+    # Integer-code the table: PID row, time offset and category per event
+    pid_codes, pids = pd.factorize(events['pid'], sort=True)
+    seconds = events['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+    start, end = float(seconds.min()), float(seconds.max())
+    span = max(end - start, 1e-6)
+
+    counts_per_pid = np.bincount(pid_codes, minlength=len(pids))
+    top = np.argsort(-counts_per_pid, kind='stable')[:max_processes]
+    row_of_pid = np.full(len(pids), len(top), dtype=np.int64)
+    row_of_pid[top] = np.arange(len(top))
+    rows = row_of_pid[pid_codes]
+    n_rows = len(top) + (1 if len(pids) > len(top) else 0)
+
+    names = events['process'].groupby(pid_codes).first()
+    labels = [f"{_process_name(names.get(code))} ({int(pids[code])})" for code in top]
+    if n_rows > len(top):
+        labels.append(f"other processes ({len(pids) - len(top)})")
+
+    categories = ['all']
+    bins = [np.arange(n_rows + 1) - 0.5, np.linspace(start, start + span, time_bins + 1)]
+    sample = [rows, seconds]
+    if syscall_categories:
+        lookup = {}
+        for index, syscalls in enumerate(syscall_categories.values()):
+            for syscall in syscalls:
+                lookup.setdefault(syscall, index)
+        other = len(syscall_categories)
+        category_codes = events['syscall'].map(lookup).fillna(other).to_numpy(dtype=np.int64)
+        categories = list(syscall_categories) + ['other']
+        bins.append(np.arange(len(categories) + 1) - 0.5)
+        sample.append(category_codes)
+
+    counts, _ = np.histogramdd(np.column_stack(sample), bins=bins)
+    if counts.ndim == 2:
+        counts = counts[:, :, None]
+    # Layout: [category][row][time bin]
+    counts = np.ascontiguousarray(counts.transpose(2, 0, 1)).astype('<u4')
+
+    return {
+        'rows': labels,
+        'categories': categories,
+        'time_bins': time_bins,
+        'start': pd.Timestamp(start, unit='s', tz='UTC').isoformat(),
+        'bin_seconds': span / time_bins,
+        'max': int(counts.max()) if counts.size else 0,
+        'counts': base64.b64encode(counts.tobytes()).decode('ascii')
+    }
+
+def _process_name(name):
+    """Row label name; PIDs without a (non-null) name show as 'unknown'."""
+    return 'unknown' if name is None or pd.isna(name) or not str(name) else str(name)
+
+def create_heatmap_html(payload):
+    """Create an HTML page drawing the heatmap payload on a canvas.
+
+    <, > and & are escaped so process names can't close the script block.
+    """
+    payload = json.dumps(payload).replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
+    return HEATMAP_HTML_TEMPLATE.replace('{{PAYLOAD}}', payload)
+
+HEATMAP_HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Syscall Activity Heatmap</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5; }
+        .controls { display: flex; gap: 10px; align-items: center; margin-bottom: 10px; }
+        .wrapper { background: white; border: 1px solid #ddd; border-radius: 8px; overflow: auto; max-height: calc(100vh - 110px); }
+        #tooltip { position: fixed; background: rgba(0,0,0,0.8); color: white; padding: 6px 10px; border-radius: 4px; font-size: 12px; pointer-events: none; display: none; }
+    </style>
+</head>
+<body>
+    <h2>Syscall Activity Heatmap</h2>
+    <div class="controls">
+        <label>Category <select id="category"></select></label>
+        <span id="info"></span>
+    </div>
+    <div class="wrapper"><canvas id="canvas"></canvas></div>
+    <div id="tooltip"></div>
+    <script>
+        const DATA = {{PAYLOAD}};
+        const LABEL_WIDTH = 220, CELL_H = 14, AXIS_H = 30;
+        const canvas = document.getElementById('canvas');
+        const ctx = canvas.getContext('2d');
+        const tooltip = document.getElementById('tooltip');
+        const select = document.getElementById('category');
+        const nRows = DATA ? DATA.rows.length : 0, nBins = DATA ? DATA.time_bins : 0;
+        let grid = null, cellW = 4;
+
+        function decode() {
+            const raw = atob(DATA.counts);
+            const bytes = new Uint8Array(raw.length);
+            for (let i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+            return new Uint32Array(bytes.buffer);
+        }
+        const counts = DATA ? decode() : null;
+
+        // Category 'all' in a split payload is the sum of every category
+        function buildGrid(category) {
+            const size = nRows * nBins;
+            grid = new Uint32Array(size);
+            const layers = DATA.categories.length === 1 ? [0] : (category === -1 ? DATA.categories.map((_, i) => i) : [category]);
+            layers.forEach(layer => {
+                const offset = layer * size;
+                for (let i = 0; i < size; i++) grid[i] += counts[offset + i];
+            });
+        }
+
+        function color(value, max) {
+            if (!value) return '#ffffff';
+            const t = Math.log(1 + value) / Math.log(1 + max);
+            const r = Math.round(255 * Math.min(1, 2 * t));
+            const g = Math.round(255 * Math.min(1, 2 * (1 - t)));
+            return 'rgb(' + r + ',' + g + ',60)';
+        }
+
+        function draw() {
+            cellW = Math.max(2, Math.floor((window.innerWidth - LABEL_WIDTH - 80) / nBins));
+            canvas.width = LABEL_WIDTH + cellW * nBins;
+            canvas.height = AXIS_H + CELL_H * nRows;
+            ctx.font = '11px Arial';
+            ctx.textBaseline = 'middle';
+            let max = 1;
+            for (let i = 0; i < grid.length; i++) if (grid[i] > max) max = grid[i];
+            for (let r = 0; r < nRows; r++) {
+                ctx.fillStyle = '#222';
+                ctx.fillText(DATA.rows[r].slice(0, 34), 4, AXIS_H + r * CELL_H + CELL_H / 2);
+                for (let b = 0; b < nBins; b++) {
+                    ctx.fillStyle = color(grid[r * nBins + b], max);
+                    ctx.fillRect(LABEL_WIDTH + b * cellW, AXIS_H + r * CELL_H, cellW, CELL_H - 1);
+                }
+            }
+            const start = new Date(DATA.start).getTime();
+            ctx.fillStyle = '#222';
+            for (let b = 0; b < nBins; b += Math.ceil(nBins / 8)) {
+                const label = new Date(start + b * DATA.bin_seconds * 1000).toISOString().slice(11, 19);
+                ctx.fillText(label, LABEL_WIDTH + b * cellW, AXIS_H / 2);
+            }
+            document.getElementById('info').textContent =
+                nRows + ' rows x ' + nBins + ' bins of ' + DATA.bin_seconds.toFixed(2) + 's, max ' + max + ' events/bin';
+        }
+
+        canvas.addEventListener('mousemove', event => {
+            const rect = canvas.getBoundingClientRect();
+            const b = Math.floor((event.clientX - rect.left - LABEL_WIDTH) / cellW);
+            const r = Math.floor((event.clientY - rect.top - AXIS_H) / CELL_H);
+            if (b < 0 || b >= nBins || r < 0 || r >= nRows) { tooltip.style.display = 'none'; return; }
+            const time = new Date(new Date(DATA.start).getTime() + b * DATA.bin_seconds * 1000).toISOString().slice(11, 19);
+            tooltip.textContent = DATA.rows[r] + ' @ ' + time + ': ' + grid[r * nBins + b] + ' events';
+            tooltip.style.left = (event.clientX + 12) + 'px';
+            tooltip.style.top = (event.clientY + 12) + 'px';
+            tooltip.style.display = 'block';
+        });
+        canvas.addEventListener('mouseleave', () => tooltip.style.display = 'none');
+
+        if (DATA) {
+            select.innerHTML = '<option value="-1">all</option>' + (DATA.categories.length > 1 ?
+                DATA.categories.map((name, i) => '<option value="' + i + '">' + name + '</option>').join('') : '');
+            select.addEventListener('change', () => { buildGrid(parseInt(select.value)); draw(); });
+            buildGrid(-1);
+            draw();
+            window.addEventListener('resize', draw);
+        } else {
+            document.getElementById('info').textContent = 'No events to display';
+        }
+    </script>
+</body>
+</html>
+"""
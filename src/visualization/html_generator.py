@@ -3,6 +3,7 @@ def create_html_output(mermaid_code, diagram_type="flowchart"):
     mermaid_config = """
         mermaid.initialize({
             startOnLoad: true,
+            securityLevel: 'strict',
             flowchart: {
                 htmlLabels: true,
                 curve: 'basis',
@@ -202,6 +203,10 @@ def create_html_output(mermaid_code, diagram_type="flowchart"):
             
             // Initialize after Mermaid renders
             mermaid.init(undefined, ".mermaid").then(function() {{
+                // Strict mode doesn't bind Mermaid click callbacks; select nodes here instead
+                document.querySelectorAll('#mermaid-diagram g.node').forEach(node => {{
+                    node.addEventListener('click', () => showNodeDetails(node));
+                }});
                 // Add this to force text size update after rendering
                 if ("{diagram_type}" === "gantt") {{
                     document.querySelectorAll('.tick text').forEach(text => {{
@@ -311,6 +316,12 @@ def create_html_output(mermaid_code, diagram_type="flowchart"):
                 container.style.cursor = 'default';
             });
             
+            // Click handler for flowchart nodes: toggles the selection outline
+            window.showNodeDetails = function(node) {
+                node.classList.toggle('selected-node');
+                node.style.outline = node.classList.contains('selected-node') ? '3px solid #4a90e2' : '';
+            };
+            
             // Error handling
             mermaid.parseError = function(err, hash) {
                 const errorDisplay = document.getElementById('error-display');
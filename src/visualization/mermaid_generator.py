@@ -1,79 +1,149 @@
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
+import html
 import re
+import numpy as np
 import pandas as pd
+from src.analysis.process_annotations import annotate_processes, classify_process, process_risk
 
-def generate_mermaid_diagram(process_tree, security_analyzer, behavior_analyzer, df):
-    """Generate Mermaid diagram with both security and behavior analysis."""
-    mermaid_code = []
-    mermaid_code.append("flowchart TD")
-    mermaid_code.append("    classDef normal fill:#b3e0ff,stroke:#333,stroke-width:1px")
-    mermaid_code.append("    classDef suspicious fill:#ffcccc,stroke:#red,stroke-width:2px")
-    mermaid_code.append("    classDef anomalous fill:#ff99ff,stroke:#purple,stroke-width:2px")  # New class for high behavior scores
-    mermaid_code.append("    classDef root fill:#99ff99,stroke:#333,stroke-width:1px")
-    mermaid_code.append("    classDef privileged fill:#ffb366,stroke:#333,stroke-width:2px")
+# The aggregated flowchart draws at most this many descendants below each top-K process
+MAX_KEPT_DESCENDANTS = 20
+
+def _label(text):
+    """HTML-escaped label text; quotes become Mermaid's #quot; so they can't end the label."""
+    return html.escape(str(text), quote=False).replace('"', '#quot;')
+
+def _flowchart_header():
+    """Flowchart declaration and node class definitions."""
+    return [
+        "flowchart TD",
+        "    classDef normal fill:#b3e0ff,stroke:#333,stroke-width:1px",
+        "    classDef suspicious fill:#ffcccc,stroke:#red,stroke-width:2px",
+        "    classDef anomalous fill:#ff99ff,stroke:#purple,stroke-width:2px",  # New class for high behavior scores
+        "    classDef root fill:#99ff99,stroke:#333,stroke-width:1px",
+        "    classDef privileged fill:#ffb366,stroke:#333,stroke-width:2px",
+        "    classDef tainted fill:#ffe0b3,stroke:#c62828,stroke-width:2px,stroke-dasharray:4 2"
+    ]
+
+def _process_node_lines(pid, process_info, alerts, behavior_score, category_scores, folded=1, lineage=None):
+    """Mermaid lines for one process node and its parent edge, plus its style class.
+
+    folded > 1 labels the node as standing for that many clustered siblings;
+    a lineage entry (from lineage_risk) marked tainted colors the node by its
+    inherited risk.
+    """
+    process_name = _label(process_info['process'] or 'unknown')
+    
+    # Determine node style based on both analyses
+    style_class = classify_process(pid, alerts, behavior_score)
+    if lineage is not None and lineage['tainted'] and style_class != 'root':
+        style_class = 'tainted'
+    
+    # Enhanced node text with both analyses
+    node_text = [
+        f"{process_name} (PID: {int(pid)})",
+        f"Behavior Score: {behavior_score:.2f}"
+    ]
+    if folded > 1:
+        node_text.append(f"+{folded - 1} similar processes")
+    if style_class == 'tainted':
+        node_text.append(f"Inherited risk: {lineage['inherited_risk']:.2f}")
+    
+    if category_scores:
+        high_categories = [cat for cat, score in category_scores.items() if score > 0.5]
+        if high_categories:
+            node_text.append(f"High activity: {', '.join(high_categories)}")
+    
+    if alerts:
+        alert_text = '<br>' + '<br>• '.join(map(_label, alerts))
+        node_text.append(alert_text)
+    
+    lines = [
+        f'    pid{int(pid)}["{" <br> ".join(node_text)}"]',
+        f'    class pid{int(pid)} {style_class}'
+    ]
+    
+    # Add relationships
+    ppid = process_info['ppid']
+    if ppid:
+        edge_style = '-->'
+        if style_class in ['suspicious', 'anomalous']:
+            edge_style = '==>'
+        elif style_class == 'tainted':
+            edge_style = '-.->'
+        lines.append(f'    pid{int(ppid)}{edge_style}pid{int(pid)}')
+    
+    return lines, style_class
+
+def folded_leaves(process_tree, annotations):
+    """Fold childless siblings of the same behavior cluster into their first member.
+
+    Only siblings with the same alerts are folded, so a member flagged on its
+    own is still drawn. Returns ({shown pid: number of processes it stands for}, hidden pids);
+    both are empty unless the annotations carry clusters.
+    """
+    folded, hidden = {}, set()
+    for info in process_tree.values():
+        first = {}
+        for child in info['children']:
+            pid = child['pid']
+            annotation = annotations.get(pid, {})
+            if annotation.get('cluster') is None or child['children']:
+                continue
+            cluster = (annotation['cluster'], tuple(annotation['alerts']))
+            if cluster in first:
+                folded[first[cluster]] += 1
+                hidden.add(pid)
+            else:
+                first[cluster] = pid
+                folded[pid] = 1
+    return folded, hidden
+
+def generate_mermaid_diagram(process_tree, security_analyzer, behavior_analyzer, df, annotations=None,
+                             lineage=None):
+    """Generate Mermaid diagram with both security and behavior analysis.
+    
+    If precomputed annotations are given the analyzers and df are not used;
+    clustered annotations fold same-cluster leaf siblings into one node.
+    lineage (from lineage_risk) colors unflagged processes with a risky ancestry.
+    """
+    lineage = lineage or {}
+    mermaid_code = _flowchart_header()
     
     processed_nodes = set()
     node_class = {}
+    folded, hidden = folded_leaves(process_tree, annotations) if annotations is not None else ({}, set())
+    processed_nodes.update(hidden)
     
     # Get behavior scores for all processes
-    frequencies, timestamps = behavior_analyzer.calculate_syscall_frequency(df)
+    if annotations is None:
+        frequencies, timestamps = behavior_analyzer.calculate_syscall_frequency(df)
 
     def add_process_node(pid, process_info):
         if pid in processed_nodes:
             return
         
         processed_nodes.add(pid)
-        process_name = process_info['process'] or 'unknown'
         
         # Get both security alerts and behavior score
-        alerts = security_analyzer.analyze_process(pid, process_info, df)
-        behavior_score, category_scores = behavior_analyzer.calculate_behavior_score(
-            frequencies, timestamps, pid
-        )
+        if annotations is not None:
+            annotation = annotations[pid]
+            alerts = annotation['alerts']
+            behavior_score, category_scores = annotation['behavior_score'], annotation['category_scores']
+        else:
+            alerts = security_analyzer.analyze_process(pid, process_info, df)
+            behavior_score, category_scores = behavior_analyzer.calculate_behavior_score(
+                frequencies, timestamps, pid
+            )
         
-        # Determine node style based on both analyses
-        style_class = 'normal'
-        if any('Running as root' in alert for alert in alerts):
-            style_class = 'privileged'
-        if any(('⚠️' in alert or '❌' in alert) for alert in alerts):
-            style_class = 'suspicious'
-        if behavior_score > 0.7:  # High behavior score threshold
-            style_class = 'anomalous'
-        if pid == 1:
-            style_class = 'root'
-            
+        node_lines, style_class = _process_node_lines(
+            pid, process_info, alerts, behavior_score, category_scores, folded.get(pid, 1), lineage.get(pid)
+        )
         node_class[pid] = style_class
-        
-        # Enhanced node text with both analyses
-        node_text = [
-            f"{process_name} (PID: {int(pid)})",
-            f"Behavior Score: {behavior_score:.2f}"
-        ]
-        
-        if category_scores:
-            high_categories = [cat for cat, score in category_scores.items() if score > 0.5]
-            if high_categories:
-                node_text.append(f"High activity: {', '.join(high_categories)}")
-        
-        if alerts:
-            alert_text = '<br>' + '<br>• '.join(alerts)
-            node_text.append(alert_text)
-        
-        mermaid_code.append(f'    pid{int(pid)}["{" <br> ".join(node_text)}"]')
-        mermaid_code.append(f'    class pid{int(pid)} {style_class}')
-        
-        # Add relationships
-        ppid = process_info['ppid']
-        if ppid:
-            edge_style = '-->'
-            if style_class in ['suspicious', 'anomalous']:
-                edge_style = '==>'
-            mermaid_code.append(f'    pid{int(ppid)}{edge_style}pid{int(pid)}')
+        mermaid_code.extend(node_lines)
         
         for child in process_info['children']:
-            child_pid = [k for k, v in process_tree.items() if v == child][0]
-            add_process_node(child_pid, child)
+            add_process_node(child['pid'], child)
 
     # Build the tree
     if 1 in process_tree:
@@ -85,6 +155,100 @@ def generate_mermaid_diagram(process_tree, security_analyzer, behavior_analyzer,
 
     return '\n'.join(mermaid_code)
 
+def _kept_processes(process_tree, annotations, top_k, max_descendants=MAX_KEPT_DESCENDANTS):
+    """Top-K riskiest processes plus their ancestor paths and up to max_descendants
+    descendants each (breadth-first, so kept descendants stay connected)."""
+    ranked = sorted(process_tree, key=lambda pid: process_risk(annotations[pid]), reverse=True)
+    selected = ranked[:top_k]
+    
+    keep = set()
+    for pid in selected:
+        current = pid
+        while current is not None and current in process_tree and current not in keep:
+            keep.add(current)
+            current = process_tree[current]['ppid']
+    
+    for pid in selected:
+        queue, added = deque([pid]), 0
+        while queue and added < max_descendants:
+            for child in process_tree[queue.popleft()]['children']:
+                if child['pid'] in keep or child['pid'] not in process_tree:
+                    continue
+                if added == max_descendants:
+                    break
+                keep.add(child['pid'])
+                queue.append(child['pid'])
+                added += 1
+    return keep
+
+def generate_aggregated_mermaid_diagram(process_tree, security_analyzer, behavior_analyzer, df,
+                                        top_k=50, annotations=None, lineage=None,
+                                        max_descendants=MAX_KEPT_DESCENDANTS):
+    """Generate a bounded-size flowchart for large trees.
+    
+    Only the top-K riskiest processes, their ancestors and up to
+    max_descendants of their descendants each are drawn; siblings with the same executable and behavior class are folded
+    into one counted node, and alerts are reduced to a count per node.
+    """
+    if annotations is None:
+        annotations = annotate_processes(process_tree, security_analyzer, behavior_analyzer, df)
+    lineage = lineage or {}
+    
+    mermaid_code = _flowchart_header()
+    keep = _kept_processes(process_tree, annotations, top_k, max_descendants)
+    
+    def group_key(pid):
+        style_class = annotations[pid]['style_class']
+        if pid in lineage and lineage[pid]['tainted'] and style_class != 'root':
+            style_class = 'tainted'
+        return (process_tree[pid]['process'] or 'unknown', style_class)
+    
+    def grouped(pids):
+        groups = defaultdict(list)
+        for pid in sorted(pids):
+            groups[group_key(pid)].append(pid)
+        return list(groups.values())
+    
+    roots = [pid for pid in keep if process_tree[pid]['ppid'] not in keep]
+    stack = [(None, members) for members in reversed(grouped(roots))]
+    
+    while stack:
+        parent_id, members = stack.pop()
+        process_name, style_class = group_key(members[0])
+        process_name = _label(process_name)
+        score = max(annotations[pid]['behavior_score'] for pid in members)
+        alerts = list(dict.fromkeys(alert for pid in members for alert in annotations[pid]['alerts']))
+        
+        if len(members) == 1:
+            node_id = f"pid{int(members[0])}"
+            node_text = [f"{process_name} (PID: {int(members[0])})"]
+        else:
+            node_id = f"grp{int(members[0])}"
+            node_text = [f"{process_name} ×{len(members)}",
+                         f"PIDs: {int(members[0])}…{int(members[-1])}"]
+        node_text.append(f"Behavior Score: {score:.2f}")
+        if alerts:
+            node_text.append(f"Alerts: {len(alerts)}")
+        
+        mermaid_code.append(f'    {node_id}["{" <br> ".join(node_text)}"]')
+        mermaid_code.append(f'    class {node_id} {style_class}')
+        
+        if parent_id:
+            edge_style = {'suspicious': '==>', 'anomalous': '==>', 'tainted': '-.->'}.get(style_class, '-->')
+            mermaid_code.append(f'    {parent_id}{edge_style}{node_id}')
+        
+        children = [child['pid'] for pid in members
+                    for child in process_tree[pid]['children'] if child['pid'] in keep]
+        for child_members in reversed(grouped(children)):
+            stack.append((node_id, child_members))
+    
+    hidden = len(process_tree) - len(keep)
+    if hidden:
+        mermaid_code.append(f'    hidden["{hidden} lower-risk processes not shown"]')
+        mermaid_code.append('    class hidden normal')
+    
+    return '\n'.join(mermaid_code)
+
 def clean_text_for_mermaid(text):
     """Clean text to be Mermaid-compatible."""
     cleaned = re.sub(r'[^a-zA-Z0-9\s]', '_', str(text))
@@ -94,93 +258,117 @@ def clean_text_for_mermaid(text):
     cleaned = re.sub(r'_+', '_', cleaned)
     return cleaned.rstrip('_') or 'unknown'
 
-def generate_gantt_diagram(process_tree, security_analyzer, behavior_analyzer, df):
-    """Generate Gantt diagram with proper task format and behavior analysis."""
+GANTT_SECTIONS = [
+    'High Activity Processes',
+    'System Processes',
+    'User Processes',
+    'Background Services',
+    'Suspicious Processes'
+]
+
+def _gantt_process_table(process_tree, security_analyzer, behavior_analyzer, df, annotations):
+    """Per-PID start/end/user/score/section computed with one grouped aggregation."""
+    spans = df[df['pid'].isin(process_tree.keys())].groupby('pid').agg(
+        start=('timestamp', 'min'),
+        end=('timestamp', 'max'),
+        user=('user', 'first')
+    )
+    spans = spans[(spans['end'] - spans['start']).dt.total_seconds() >= 0.1]  # Skip very short processes
+    if spans.empty:
+        return spans
+
+    if annotations is None:
+        subtree = {pid: process_tree[pid] for pid in spans.index}
+        annotations = annotate_processes(subtree, security_analyzer, behavior_analyzer, df)
+
+    # Keep process-tree order so equal start times sort as before
+    spans = spans.reindex([pid for pid in process_tree if pid in spans.index])
+    pids = spans.index
+    spans['process'] = [process_tree[pid]['process'] or f'unknown_{pid}' for pid in pids]
+    spans['score'] = [annotations[pid]['behavior_score'] for pid in pids]
+    spans['has_alerts'] = [any('⚠️' in alert for alert in annotations[pid]['alerts']) for pid in pids]
+
+    # Categorize process based on both analyses (first matching rule wins)
+    names = spans['process'].astype(str).str.lower()
+    is_system = (pids == 1) | spans['user'].astype(str).str.lower().str.contains('root', regex=False)
+    is_user = names.str.contains('bash|sh|terminal', regex=True)
+    spans['section'] = np.select(
+        [spans['has_alerts'], spans['score'] > 0.7, is_system, is_user],
+        ['Suspicious Processes', 'High Activity Processes', 'System Processes', 'User Processes'],
+        default='Background Services'
+    )
+    spans['status'] = np.select(
+        [spans['has_alerts'], spans['score'] > 0.7, spans['score'] > 0.3],
+        ['crit', 'active', 'done'],
+        default='milestone'
+    )
+    return spans
+
+def _gantt_lanes(spans, bucket_count):
+    """Merge processes of the same executable into one lane segment per time bucket."""
+    first, last = spans['start'].min(), spans['end'].max()
+    bucket_seconds = max((last - first).total_seconds() / bucket_count, 1.0)
+    spans = spans.assign(bucket=((spans['start'] - first).dt.total_seconds() // bucket_seconds).astype(int))
+
+    lanes = spans.reset_index().groupby(['section', 'process', 'bucket'], sort=False).agg(
+        start=('start', 'min'),
+        end=('end', 'max'),
+        score=('score', 'max'),
+        has_alerts=('has_alerts', 'any'),
+        count=('pid', 'size'),
+        pid=('pid', 'min')
+    ).reset_index()
+    lanes['status'] = np.select(
+        [lanes['has_alerts'], lanes['score'] > 0.7, lanes['score'] > 0.3],
+        ['crit', 'active', 'done'],
+        default='milestone'
+    )
+    return lanes
+
+def generate_gantt_diagram(process_tree, security_analyzer, behavior_analyzer, df,
+                           annotations=None, max_tasks=500, bucket_count=48):
+    """Generate Gantt diagram with proper task format and behavior analysis.
+    
+    When more than max_tasks processes qualify, processes of the same
+    executable are merged into lanes with one bar per time bucket.
+    """
     mermaid_code = []
     mermaid_code.append("gantt")
     mermaid_code.append("    title Process Activity Timeline")
     mermaid_code.append("    dateFormat YYYY-MM-DD HH:mm:ss")
     mermaid_code.append("    axisFormat %H:%M:%S")
     
-    min_time = df['timestamp'].min()
-    max_time = df['timestamp'].max()
+    spans = _gantt_process_table(process_tree, security_analyzer, behavior_analyzer, df, annotations)
+    if spans.empty:
+        return '\n'.join(mermaid_code)
     
-    # Get behavior scores for all processes
-    frequencies, timestamps = behavior_analyzer.calculate_syscall_frequency(df)
-    
-    # Group processes by category and behavior
-    sections = {
-        'High Activity Processes': [],
-        'System Processes': [],
-        'User Processes': [],
-        'Background Services': [],
-        'Suspicious Processes': []
-    }
-    
-    for pid, process_info in process_tree.items():
-        try:
-            process_data = df[df['pid'] == pid]
-            if process_data.empty:
-                continue
-            
-            start_time = process_data['timestamp'].min()
-            end_time = process_data['timestamp'].max()
-            duration = (end_time - start_time).total_seconds()
-            
-            if duration < 0.1:  # Skip very short processes
-                continue
-                
-            process_name = process_info['process'] or f'unknown_{pid}'
-            
-            # Get both behavior and security analysis
-            behavior_score, category_scores = behavior_analyzer.calculate_behavior_score(
-                frequencies, timestamps, pid
-            )
-            alerts = security_analyzer.analyze_process(pid, process_info, df)
-            has_alerts = any('⚠️' in alert for alert in alerts)
-            
-            # Categorize process based on both analyses
-            if has_alerts:
-                category = 'Suspicious Processes'
-            elif behavior_score > 0.7:  # High behavior score threshold
-                category = 'High Activity Processes'
-            elif pid == 1 or 'root' in str(process_data['user'].iloc[0]).lower():
-                category = 'System Processes'
-            elif any(name in str(process_name).lower() for name in ['bash', 'sh', 'terminal']):
-                category = 'User Processes'
-            else:
-                category = 'Background Services'
-            
-            # Format timestamps
-            start_str = start_time.strftime('%Y-%m-%d %H:%M:%S')
-            end_str = end_time.strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Create task name with behavior score
-            task_name = clean_text_for_mermaid(f"{process_name}_{pid} (Score: {behavior_score:.2f})")
-            
-            # Determine status based on behavior and security analysis
-            if has_alerts:
-                status = "crit"
-            elif behavior_score > 0.7:
-                status = "active"
-            elif behavior_score > 0.3:
-                status = "done"
-            else:
-                status = "milestone"
-            
-            # Add task
-            task = f"    {task_name} : {status}, {start_str}, {end_str}"
-            sections[category].append((start_time, task))
-            
-        except Exception as e:
-            print(f"Error processing process {pid}: {str(e)}")
-            continue
+    if len(spans) > max_tasks:
+        rows = _gantt_lanes(spans, bucket_count)
+        labels = [
+            f"{process}_x{count} (Score: {score:.2f})" if count > 1 else f"{process}_{pid} (Score: {score:.2f})"
+            for process, count, pid, score in zip(rows['process'], rows['count'], rows['pid'], rows['score'])
+        ]
+    else:
+        rows = spans.reset_index()
+        labels = [f"{process}_{pid} (Score: {score:.2f})"
+                  for process, pid, score in zip(rows['process'], rows['pid'], rows['score'])]
+    
+    rows = rows.assign(
+        task_name=[clean_text_for_mermaid(label) for label in labels],
+        start_str=rows['start'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+        end_str=rows['end'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    ).sort_values('start', kind='stable')
     
     # Add sections with sorted tasks
-    for section_name, tasks in sections.items():
-        if tasks:
+    for section_name in GANTT_SECTIONS:
+        tasks = rows[rows['section'] == section_name]
+        if not tasks.empty:
             mermaid_code.append(f"\n    section {section_name}")
-            sorted_tasks = sorted(tasks, key=lambda x: x[0])
-            mermaid_code.extend(task for _, task in sorted_tasks)
+            mermaid_code.extend(
+                f"    {name} : {status}, {start}, {end}"
+                for name, status, start, end in zip(
+                    tasks['task_name'], tasks['status'], tasks['start_str'], tasks['end_str']
+                )
+            )
     
-    return '\n'.join(mermaid_code)
\ No newline at end of file
+    return '\n'.join(mermaid_code)
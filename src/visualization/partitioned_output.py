@@ -0,0 +1,214 @@
+import hashlib
+import html
+import json
+import os
+import pandas as pd
+from src.utils.process_pool import process_pool
+from .html_generator import create_html_output
+from .mermaid_generator import generate_mermaid_diagram, generate_aggregated_mermaid_diagram
+
+def top_level_roots(process_tree):
+    """Children of PID 1 plus orphan roots (processes whose parent isn't in the tree).
+
+    Processes reachable from neither (ppid cycles and their descendants) add
+    their lowest PID per cycle as a root, so every process gets a page.
+    """
+    roots = []
+    for pid, info in process_tree.items():
+        if pid == 1:
+            continue
+        ppid = info['ppid']
+        if ppid == 1 or ppid is None or ppid not in process_tree:
+            roots.append(pid)
+    reached = {1}
+    for root in roots:
+        reached.update(_subtree_pids(process_tree, root))
+    for pid in sorted(process_tree):
+        if pid not in reached:
+            roots.append(pid)
+            reached.update(_subtree_pids(process_tree, pid))
+    return sorted(roots)
+
+def _subtree_pids(process_tree, root):
+    """All PIDs under root (inclusive), iteratively."""
+    pids, stack = [root], [root]
+    seen = {root}
+    while stack:
+        for child in process_tree[stack.pop()]['children']:
+            if child['pid'] not in seen:
+                seen.add(child['pid'])
+                pids.append(child['pid'])
+                stack.append(child['pid'])
+    return pids
+
+def _detached_subtree(process_tree, pids, root):
+    """Self-contained copy of the subtree over pids; root loses its parent edge."""
+    subtree = {
+        pid: {'pid': pid, 'process': process_tree[pid]['process'], 'children': [],
+              'ppid': None if pid == root else process_tree[pid]['ppid']}
+        for pid in pids
+    }
+    for pid, info in subtree.items():
+        ppid = info['ppid']
+        if ppid in subtree:
+            subtree[ppid]['children'].append(info)
+        else:
+            info['ppid'] = None
+    return subtree
+
+def _ancestor_closure(process_tree, pids, root):
+    """Add ancestors (up to root) so a filtered subtree stays connected."""
+    closed = set(pids)
+    for pid in pids:
+        current = process_tree[pid]['ppid']
+        while pid != root and current is not None and current in process_tree and current not in closed:
+            closed.add(current)
+            if current == root:
+                break
+            current = process_tree[current]['ppid']
+    return closed
+
+def _render_page(job):
+    """Worker: render one shard's flowchart page and write it to disk."""
+    subtree, annotations, output_path, aggregate_threshold, top_k, lineage = job
+    if len(subtree) > aggregate_threshold:
+        mermaid = generate_aggregated_mermaid_diagram(subtree, None, None, None, top_k=top_k, annotations=annotations,
+                                                      lineage=lineage)
+    else:
+        mermaid = generate_mermaid_diagram(subtree, None, None, None, annotations=annotations, lineage=lineage)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(create_html_output(mermaid, diagram_type="flowchart"))
+    return output_path
+
+def _page_jobs(process_tree, annotations, df, output_dir, window_seconds, aggregate_threshold, top_k, lineage=None):
+    """One job per top-level subtree, plus one per (subtree, time window) if requested."""
+    spans = None
+    if window_seconds:
+        spans = df.groupby('pid')['timestamp'].agg(['min', 'max'])
+        origin = spans['min'].min()
+
+    jobs, pages = [], []
+    for root in top_level_roots(process_tree):
+        pids = _subtree_pids(process_tree, root)
+        shards = [(pids, f"subtree_{int(root)}.html", None)]
+
+        if spans is not None:
+            member_spans = spans.reindex(pids).dropna()
+            if not member_spans.empty:
+                first = int((member_spans['min'].min() - origin).total_seconds() // window_seconds)
+                last = int((member_spans['max'].max() - origin).total_seconds() // window_seconds)
+                for window in range(first, last + 1) if last > first else []:
+                    window_start = origin + pd.Timedelta(seconds=window * window_seconds)
+                    window_end = window_start + pd.Timedelta(seconds=window_seconds)
+                    active = member_spans[(member_spans['min'] < window_end) & (member_spans['max'] >= window_start)]
+                    if active.empty:
+                        continue
+                    members = _ancestor_closure(process_tree, list(active.index), root)
+                    shards.append((sorted(members), f"subtree_{int(root)}_w{window}.html", (window_start, window_end)))
+
+        for members, filename, window in shards:
+            subtree = _detached_subtree(process_tree, members, root)
+            subtree_annotations = {pid: annotations[pid] for pid in members}
+            subtree_lineage = {pid: lineage[pid] for pid in members if pid in lineage} if lineage else None
+            jobs.append((subtree, subtree_annotations, os.path.join(output_dir, filename),
+                         aggregate_threshold, top_k, subtree_lineage))
+            pages.append({
+                'file': filename,
+                'root': root,
+                'process': process_tree[root]['process'] or 'unknown',
+                'processes': len(members),
+                'flagged': sum(1 for pid in members
+                               if annotations[pid]['style_class'] in ('suspicious', 'anomalous')),
+                'window': window
+            })
+    return jobs, pages
+
+def _index_html(pages):
+    """Index page linking every shard."""
+    rows = []
+    for page in pages:
+        window = (f"{page['window'][0]:%Y-%m-%d %H:%M:%S} – {page['window'][1]:%H:%M:%S}"
+                  if page['window'] else 'whole capture')
+        rows.append(
+            f"<tr><td><a href=\"{page['file']}\">{html.escape(str(page['process']))} "
+            f"(PID: {int(page['root'])})</a></td><td>{window}</td>"
+            f"<td>{page['processes']}</td><td>{page['flagged']}</td></tr>"
+        )
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Process Visualization Index</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 20px; }}
+            table {{ border-collapse: collapse; width: 100%; margin-top: 20px; }}
+            th, td {{ padding: 8px; text-align: left; border: 1px solid #ddd; }}
+            th {{ background-color: #f4f4f4; }}
+        </style>
+    </head>
+    <body>
+        <h1>Process Subtrees</h1>
+        <table>
+            <tr><th>Subtree root</th><th>Time window</th><th>Processes</th><th>Flagged</th></tr>
+            {''.join(rows)}
+        </table>
+    </body>
+    </html>
+    """
+
+def _page_hash(page, members, hashes, aggregate_threshold, top_k):
+    """Content hash of one page: its subtree hash plus membership and rendering options."""
+    key = [hashes[page['root']], page['file'], str(page['window']),
+           sorted(int(pid) for pid in members), aggregate_threshold, top_k]
+    return hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+
+def remove_stale_pages(shard_dir, keep=()):
+    """Delete subtree pages of earlier runs that are not in keep (file names)."""
+    if not os.path.isdir(shard_dir):
+        return
+    for name in os.listdir(shard_dir):
+        if name.startswith('subtree_') and name.endswith('.html') and name not in keep:
+            os.remove(os.path.join(shard_dir, name))
+
+def save_partitioned_visualizations(process_tree, annotations, df, output_dir, window_seconds=None,
+                                    workers=None, aggregate_threshold=300, top_k=50,
+                                    cache=None, hashes=None, lineage=None):
+    """Write one flowchart page per top-level subtree (and optional time window) plus an index.
+
+    Pages are rendered concurrently in a process pool (inline when workers == 1);
+    returns the index path.
+    With a FragmentCache and subtree hashes, pages whose hash matches the
+    previous run's manifest are left untouched. lineage (from lineage_risk)
+    marks tainted processes as the main flowchart does.
+    """
+    shard_dir = os.path.join(output_dir, 'subtrees')
+    os.makedirs(shard_dir, exist_ok=True)
+
+    jobs, pages = _page_jobs(process_tree, annotations, df, shard_dir, window_seconds,
+                             aggregate_threshold, top_k, lineage)
+    remove_stale_pages(shard_dir, {page['file'] for page in pages})
+
+    if cache is not None and hashes is not None:
+        previous = cache.load_manifest('subtrees')
+        manifest, changed = {}, []
+        for job, page in zip(jobs, pages):
+            manifest[page['file']] = _page_hash(page, job[0], hashes, aggregate_threshold, top_k)
+            if previous.get(page['file']) != manifest[page['file']] or not os.path.exists(job[2]):
+                changed.append(job)
+        print(f"{len(jobs) - len(changed)} subtree pages unchanged")
+        jobs = changed
+
+    print(f"Rendering {len(jobs)} subtree pages...")
+    if workers == 1:
+        list(map(_render_page, jobs))
+    else:
+        with process_pool(max_workers=workers) as executor:
+            list(executor.map(_render_page, jobs, chunksize=max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))))
+    if cache is not None and hashes is not None:
+        # Only once every page is written, so an interrupted run re-renders them
+        cache.save_manifest('subtrees', manifest)
+
+    index_path = os.path.join(shard_dir, 'index.html')
+    with open(index_path, 'w', encoding='utf-8') as f:
+        f.write(_index_html(pages))
+    return index_path
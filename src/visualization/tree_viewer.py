@@ -0,0 +1,210 @@
+def create_tree_viewer_html(data_file="process_tree.json"):
+    """Create a canvas-based process tree viewer that only draws visible rows.
+
+    The page loads the compact JSON written by export_tree_json, lays the tree
+    out as an indented outline (one row per expanded node) and renders only the
+    rows inside the viewport, so trees with 100k+ nodes stay interactive.
+    """
+    return VIEWER_HTML_TEMPLATE.replace('{{DATA_FILE}}', data_file)
+
+VIEWER_HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Process Tree Viewer</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5; box-sizing: border-box; height: 100vh; display: flex; flex-direction: column; }
+        .controls { display: flex; gap: 10px; align-items: center; margin-bottom: 10px; }
+        .controls button { padding: 8px 14px; cursor: pointer; background-color: #4a90e2; color: white; border: none; border-radius: 6px; }
+        .controls button:hover { background-color: #357abd; }
+        .controls input[type=text] { padding: 7px; width: 220px; }
+        .main { flex: 1; display: flex; gap: 10px; min-height: 0; }
+        .viewport { flex: 3; position: relative; overflow: auto; background: white; border: 1px solid #ddd; border-radius: 8px; }
+        .viewport canvas { position: sticky; top: 0; left: 0; display: block; }
+        .details { flex: 1; background: white; border: 1px solid #ddd; border-radius: 8px; padding: 15px; overflow: auto; font-size: 14px; }
+        .details li { margin-bottom: 4px; }
+        #status { color: #666; font-size: 14px; }
+    </style>
+</head>
+<body>
+    <div class="controls">
+        <input type="text" id="search" placeholder="Find PID or process name">
+        <button onclick="findNode()">Find</button>
+        <button onclick="expandAll()">Expand All</button>
+        <button onclick="collapseAll()">Collapse All</button>
+        <input type="file" id="fileInput" accept=".json" style="display:none">
+        <span id="status">Loading {{DATA_FILE}}...</span>
+    </div>
+    <div class="main">
+        <div class="viewport" id="viewport">
+            <canvas id="canvas"></canvas>
+            <div id="spacer"></div>
+        </div>
+        <div class="details" id="details">Click a process to show its alerts.</div>
+    </div>
+
+    <script>
+        const ROW_HEIGHT = 22, INDENT = 16;
+        const viewport = document.getElementById('viewport');
+        const canvas = document.getElementById('canvas');
+        const spacer = document.getElementById('spacer');
+        const ctx = canvas.getContext('2d');
+
+        let data = null, children = [], depth = [], expanded = null, visible = [], selected = -1;
+
+        function init(payload) {
+            data = payload;
+            const n = data.nodes.length;
+            children = Array.from({length: n}, () => []);
+            depth = new Int32Array(n);
+            expanded = new Uint8Array(n);
+            // Parents always precede children, so one forward pass builds the tree
+            data.nodes.forEach((node, i) => {
+                const parent = node[1];
+                if (parent >= 0) {
+                    children[parent].push(i);
+                    depth[i] = depth[parent] + 1;
+                }
+            });
+            data.nodes.forEach((node, i) => { if (depth[i] < 2) expanded[i] = 1; });
+            document.getElementById('status').textContent = n + ' processes';
+            relayout();
+        }
+
+        // Layout: the visible outline in depth-first order (iterative, no recursion limits)
+        function relayout() {
+            visible = [];
+            const stack = [];
+            for (let i = data.nodes.length - 1; i >= 0; i--) {
+                if (data.nodes[i][1] < 0) stack.push(i);
+            }
+            while (stack.length) {
+                const i = stack.pop();
+                visible.push(i);
+                if (expanded[i]) {
+                    const kids = children[i];
+                    for (let k = kids.length - 1; k >= 0; k--) stack.push(kids[k]);
+                }
+            }
+            spacer.style.height = (visible.length * ROW_HEIGHT) + 'px';
+            draw();
+        }
+
+        function draw() {
+            if (!data) return;
+            const width = viewport.clientWidth, height = viewport.clientHeight;
+            const ratio = window.devicePixelRatio || 1;
+            canvas.width = width * ratio;
+            canvas.height = height * ratio;
+            canvas.style.width = width + 'px';
+            canvas.style.height = height + 'px';
+            spacer.style.marginTop = (-height) + 'px';
+            ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+            ctx.clearRect(0, 0, width, height);
+            ctx.font = '13px Arial';
+            ctx.textBaseline = 'middle';
+
+            const first = Math.floor(viewport.scrollTop / ROW_HEIGHT);
+            const last = Math.min(visible.length, first + Math.ceil(height / ROW_HEIGHT) + 1);
+            const offset = viewport.scrollTop - first * ROW_HEIGHT;
+
+            for (let r = first; r < last; r++) {
+                const i = visible[r];
+                const node = data.nodes[i];
+                const y = (r - first) * ROW_HEIGHT - offset;
+                const x = 8 + depth[i] * INDENT;
+
+                if (i === selected) {
+                    ctx.fillStyle = '#e8f0fe';
+                    ctx.fillRect(0, y, width, ROW_HEIGHT);
+                }
+                ctx.fillStyle = '#333';
+                if (children[i].length) {
+                    ctx.fillText(expanded[i] ? '▾' : '▸', x, y + ROW_HEIGHT / 2);
+                }
+                ctx.fillStyle = data.colors[node[4]];
+                ctx.fillRect(x + 14, y + 4, 14, ROW_HEIGHT - 8);
+                ctx.strokeStyle = '#333';
+                ctx.strokeRect(x + 14, y + 4, 14, ROW_HEIGHT - 8);
+                ctx.fillStyle = '#222';
+                let label = node[2] + ' (PID: ' + node[0] + ')  score ' + node[3].toFixed(2);
+                if (node[5].length) label += '  ⚠ ' + node[5].length;
+                if (children[i].length && !expanded[i]) label += '  [+' + children[i].length + ']';
+                ctx.fillText(label, x + 34, y + ROW_HEIGHT / 2);
+            }
+        }
+
+        function rowAt(event) {
+            const rect = canvas.getBoundingClientRect();
+            return Math.floor((event.clientY - rect.top + viewport.scrollTop) / ROW_HEIGHT);
+        }
+
+        function showDetails(i) {
+            const node = data.nodes[i];
+            const alerts = node[5].map(a => '<li>' + escapeHtml(data.alerts[a]) + '</li>').join('');
+            document.getElementById('details').innerHTML =
+                '<h3>' + escapeHtml(node[2]) + ' (PID: ' + node[0] + ')</h3>' +
+                '<p>Class: ' + data.classes[node[4]] + '<br>Behavior score: ' + node[3].toFixed(3) +
+                '<br>Children: ' + children[i].length + '</p>' +
+                (alerts ? '<ul>' + alerts + '</ul>' : '<p>No alerts</p>');
+        }
+
+        function escapeHtml(text) {
+            return String(text).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+        }
+
+        function setAll(value) {
+            expanded.fill(value);
+            relayout();
+        }
+        function expandAll() { setAll(1); }
+        function collapseAll() { setAll(0); }
+
+        function findNode() {
+            const needle = document.getElementById('search').value.trim().toLowerCase();
+            if (!needle || !data) return;
+            const start = selected + 1;
+            for (let step = 0; step < data.nodes.length; step++) {
+                const i = (start + step) % data.nodes.length;
+                const node = data.nodes[i];
+                if (String(node[0]) === needle || node[2].toLowerCase().includes(needle)) {
+                    for (let p = node[1]; p >= 0; p = data.nodes[p][1]) expanded[p] = 1;
+                    selected = i;
+                    relayout();
+                    viewport.scrollTop = visible.indexOf(i) * ROW_HEIGHT - viewport.clientHeight / 2;
+                    showDetails(i);
+                    return;
+                }
+            }
+            document.getElementById('status').textContent = 'No match for ' + needle;
+        }
+
+        canvas.addEventListener('click', event => {
+            const r = rowAt(event);
+            if (r < 0 || r >= visible.length) return;
+            const i = visible[r];
+            if (children[i].length) expanded[i] = expanded[i] ? 0 : 1;
+            selected = i;
+            showDetails(i);
+            relayout();
+        });
+        viewport.addEventListener('scroll', () => window.requestAnimationFrame(draw));
+        window.addEventListener('resize', draw);
+
+        // fetch() is blocked for file:// pages; fall back to picking the JSON by hand
+        document.getElementById('fileInput').addEventListener('change', event => {
+            const reader = new FileReader();
+            reader.onload = () => init(JSON.parse(reader.result));
+            reader.readAsText(event.target.files[0]);
+        });
+        fetch('{{DATA_FILE}}')
+            .then(response => response.json())
+            .then(init)
+            .catch(() => {
+                document.getElementById('status').textContent = 'Select {{DATA_FILE}} to load the tree:';
+                document.getElementById('fileInput').style.display = 'inline';
+            });
+    </script>
+</body>
+</html>
+"""